@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Calibra los factores de gol y de campo por competicion del motor CLI.
+
+Simula temporadas completas (ida y vuelta) de cada liga de COMP_INFO con el
+simulate_match real, en paralelo, y ajusta por iteraciones multiplicativas:
+  - goal_factor  (_GOAL_FACTOR_BY_COMP)  -> goles por partido objetivo
+  - home_factor  (factor de campo de _strength_to_lambda) -> % victorias local
+
+Cada temporada simulada se cachea en SQLite por (huella del motor,
+competicion, parametros, semilla): repetir o refinar un ajuste solo simula
+lo que falta. El resultado se escribe en un fichero versionado que
+pcfutbol_cli.py carga al arrancar (goal_calibration.json o
+PCF_GOAL_CALIBRATION).
+
+Uso:
+  python calibrate_goal_factors.py
+  python calibrate_goal_factors.py --comps ES1 ES2 --seasons 40 --workers 4
+  python calibrate_goal_factors.py --targets mis_objetivos.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import concurrent.futures
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+HERE = Path(__file__).resolve().parent
+if str(HERE) not in sys.path:
+    sys.path.insert(0, str(HERE))
+
+import pcfutbol_cli as engine  # noqa: E402
+
+DEFAULT_CACHE = Path.home() / ".pcfutbol_calibration_cache.db"
+
+# Medias de las ultimas temporadas: (goles por partido, % victorias local)
+DEFAULT_TARGETS: Dict[str, Tuple[float, float]] = {
+    "ES1": (2.55, 0.44),
+    "ES2": (2.25, 0.42),
+    "E3G1": (2.20, 0.42),
+    "E3G2": (2.20, 0.42),
+    "GB1": (2.85, 0.45),
+    "IT1": (2.65, 0.42),
+    "L1": (3.10, 0.44),
+    "FR1": (2.80, 0.43),
+    "NL1": (3.10, 0.47),
+    "PO1": (2.60, 0.45),
+    "BE1": (2.90, 0.46),
+    "TR1": (2.80, 0.46),
+}
+
+# Puntos de entrada de una simulacion; la huella cubre todo lo que alcanzan
+_ENGINE_ROOTS = ("simulate_match", "generate_fixtures")
+
+_TEAMS: Optional[Dict[str, List[engine.Team]]] = None
+
+
+def _engine_closure() -> List[str]:
+    """Funciones y clases de nivel modulo del motor alcanzables desde _ENGINE_ROOTS."""
+    tree = ast.parse(inspect.getsource(engine))
+    defs = {
+        node.name: node for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    }
+    seen: set = set()
+    stack = list(_ENGINE_ROOTS)
+    while stack:
+        name = stack.pop()
+        if name in seen or name not in defs:
+            continue
+        seen.add(name)
+        for node in ast.walk(defs[name]):
+            if isinstance(node, ast.Name) and node.id in defs:
+                stack.append(node.id)
+            elif isinstance(node, ast.Attribute) and node.attr in defs:
+                stack.append(node.attr)
+    return sorted(seen)
+
+
+def engine_fingerprint() -> str:
+    h = hashlib.sha1()
+    for name in _engine_closure():
+        h.update(inspect.getsource(getattr(engine, name)).encode("utf-8"))
+    h.update(engine.PLAYERS_CSV.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def _teams_by_comp() -> Dict[str, List[engine.Team]]:
+    global _TEAMS
+    if _TEAMS is None:
+        by_comp: Dict[str, List[engine.Team]] = {}
+        for team in engine.load_teams().values():
+            by_comp.setdefault(team.comp, []).append(team)
+        _TEAMS = {comp: sorted(teams, key=lambda t: t.slot_id) for comp, teams in by_comp.items()}
+    return _TEAMS
+
+
+def season_seed(comp: str, index: int) -> int:
+    return (zlib.crc32(comp.encode("ascii")) ^ (index * 0x9E3779B1)) & 0xFFFFFFFF
+
+
+def simulate_season(job: Tuple[str, float, float, int]) -> Tuple[int, int, int]:
+    """(partidos, goles, victorias local) de una temporada con los parametros dados."""
+    comp, goal_factor, home_factor, seed = job
+    engine._GOAL_FACTOR_BY_COMP[comp] = goal_factor
+    engine._HOME_FACTOR_BY_COMP[comp] = home_factor
+    matches = goals = home_wins = 0
+    for i, (home, away) in enumerate(engine.generate_fixtures(_teams_by_comp()[comp]), start=1):
+        hg, ag = engine.simulate_match(home, away, seed ^ i)
+        matches += 1
+        goals += hg + ag
+        home_wins += hg > ag
+    return matches, goals, home_wins
+
+
+class SimCache:
+    def __init__(self, path: Path, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.con = sqlite3.connect(str(path))
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS seasons ("
+            " fingerprint TEXT, comp TEXT, goal_factor REAL, home_factor REAL, seed INTEGER,"
+            " matches INTEGER, goals INTEGER, home_wins INTEGER,"
+            " PRIMARY KEY (fingerprint, comp, goal_factor, home_factor, seed))"
+        )
+
+    def get(self, job: Tuple[str, float, float, int]) -> Optional[Tuple[int, int, int]]:
+        row = self.con.execute(
+            "SELECT matches, goals, home_wins FROM seasons WHERE fingerprint = ? AND comp = ?"
+            " AND goal_factor = ? AND home_factor = ? AND seed = ?",
+            (self.fingerprint, *job),
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def put_many(self, rows: List[Tuple[Tuple[str, float, float, int], Tuple[int, int, int]]]) -> None:
+        with self.con:
+            self.con.executemany(
+                "INSERT OR REPLACE INTO seasons VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(self.fingerprint, *job, *res) for job, res in rows],
+            )
+
+    def close(self) -> None:
+        self.con.close()
+
+
+def run_jobs(jobs: List[Tuple[str, float, float, int]], cache: SimCache, workers: int) -> Dict[tuple, Tuple[int, int, int]]:
+    results: Dict[tuple, Tuple[int, int, int]] = {}
+    pending = []
+    for job in jobs:
+        cached = cache.get(job)
+        if cached is None:
+            pending.append(job)
+        else:
+            results[job] = cached
+    if pending:
+        if workers > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_teams_by_comp) as pool:
+                fresh = list(pool.map(simulate_season, pending, chunksize=max(1, len(pending) // (workers * 4))))
+        else:
+            fresh = [simulate_season(job) for job in pending]
+        cache.put_many(list(zip(pending, fresh)))
+        results.update(zip(pending, fresh))
+    return results
+
+
+def load_targets(path: Optional[Path]) -> Dict[str, Tuple[float, float]]:
+    targets = dict(DEFAULT_TARGETS)
+    if path:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        for comp, entry in payload.items():
+            targets[comp] = (float(entry["gpg"]), float(entry["home_win"]))
+    return targets
+
+
+def fit(comps: List[str], targets: Dict[str, Tuple[float, float]], start: Dict[str, Tuple[float, float]],
+        seasons: int, max_iter: int, tol_gpg: float, tol_home: float,
+        cache: SimCache, workers: int) -> Dict[str, dict]:
+    params = {comp: start[comp] for comp in comps}
+    report: Dict[str, dict] = {}
+    active = list(comps)
+    for iteration in range(1, max_iter + 1):
+        jobs = [
+            (comp, round(params[comp][0], 4), round(params[comp][1], 4), season_seed(comp, k))
+            for comp in active
+            for k in range(seasons)
+        ]
+        t0 = time.perf_counter()
+        results = run_jobs(jobs, cache, workers)
+        elapsed = time.perf_counter() - t0
+        still_active = []
+        for comp in active:
+            gf, hf = round(params[comp][0], 4), round(params[comp][1], 4)
+            rows = [results[(comp, gf, hf, season_seed(comp, k))] for k in range(seasons)]
+            matches = sum(r[0] for r in rows)
+            gpg = sum(r[1] for r in rows) / max(1, matches)
+            home_win = sum(r[2] for r in rows) / max(1, matches)
+            target_gpg, target_home = targets[comp]
+            report[comp] = {
+                "goal_factor": gf,
+                "home_factor": hf,
+                "target_gpg": target_gpg,
+                "target_home_win": target_home,
+                "sim_gpg": round(gpg, 4),
+                "sim_home_win": round(home_win, 4),
+                "matches": matches,
+                "iterations": iteration,
+            }
+            print(f"  [{iteration}] {comp:<5} goal={gf:.4f} home={hf:.4f}  gpg {gpg:.3f}/{target_gpg:.2f}"
+                  f"  local {home_win:.3f}/{target_home:.2f}")
+            if abs(gpg - target_gpg) <= tol_gpg and abs(home_win - target_home) <= tol_home:
+                continue
+            new_goal = gf * target_gpg / max(0.01, gpg)
+            new_home = hf * (target_home / max(0.01, home_win)) ** 0.6
+            params[comp] = (min(2.5, max(0.3, new_goal)), min(1.6, max(0.8, new_home)))
+            still_active.append(comp)
+        print(f"  iteracion {iteration}: {len(jobs)} temporadas en {elapsed:.1f}s")
+        active = still_active
+        if not active:
+            break
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--comps", nargs="*", default=None, help="competiciones a ajustar (por defecto todas)")
+    parser.add_argument("--targets", type=Path, default=None, help='JSON {"ES1": {"gpg": 2.5, "home_win": 0.44}}')
+    parser.add_argument("--seasons", type=int, default=24, help="temporadas simuladas por iteracion y liga")
+    parser.add_argument("--max-iter", type=int, default=8)
+    parser.add_argument("--tol-gpg", type=float, default=0.03)
+    parser.add_argument("--tol-home", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE)
+    parser.add_argument("--out", type=Path, default=engine.GOAL_CALIBRATION)
+    args = parser.parse_args()
+
+    teams = _teams_by_comp()
+    targets = load_targets(args.targets)
+    comps = [c for c in (args.comps or engine.COMP_INFO) if c in teams and c in targets]
+    if not comps:
+        print("[ERROR] Ninguna competicion con equipos y objetivo.")
+        return 1
+
+    previous = engine._load_goal_calibration(args.out) or {}
+    # Punto de partida: calibracion previa o factores del motor
+    start = {
+        comp: (engine._competition_goal_factor(comp), engine._competition_home_factor(comp))
+        for comp in comps
+    }
+
+    fingerprint = engine_fingerprint()
+    cache = SimCache(args.cache, fingerprint)
+    try:
+        report = fit(comps, targets, start, args.seasons, args.max_iter, args.tol_gpg, args.tol_home,
+                     cache, max(1, args.workers))
+    finally:
+        cache.close()
+
+    competitions = dict(previous.get("competitions") or {})
+    competitions.update(report)
+    payload = {
+        "schema": engine.GOAL_CALIBRATION_SCHEMA,
+        "revision": int(previous.get("revision", 0)) + 1,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "engine_fingerprint": fingerprint,
+        "seasons_per_fit": args.seasons,
+        "competitions": dict(sorted(competitions.items())),
+    }
+    args.out.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(f"\nCalibracion r{payload['revision']} escrita en {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,20 +8,38 @@ Uso:
 
 Requiere:
     Python 3.9+  (stdlib slo, sin dependencias externas)
+    NumPy opcional: acelera la evolucion de jugadores de fin de temporada
 """
 
+import argparse
+import atexit
+import bisect
+import concurrent.futures
 import csv
+import dataclasses
+import functools
+import heapq
 import io
 import json
 import math
+import multiprocessing
+import operator
 import os
 import random
+import sqlite3
 import sys
+import threading
 import time
+import zlib
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
+try:
+    import numpy as np
+except ImportError:  # opcional: sin NumPy el desarrollo de jugadores va jugador a jugador
+    np = None
+
 # Forzar UTF-8 en Windows para caracteres especiales
 if sys.platform == "win32":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="replace")
@@ -91,6 +109,7 @@ class Player:
     tiro:    int
     estado_forma: int = 50
     moral: int = 50
+    uid: str = ""   # id estable (slot:nombre) para enlazar con data["players"]
 
     @property
     def overall(self) -> int:
@@ -172,6 +191,7 @@ def load_teams() -> dict[str, Team]:
     """Carga equipos de todas las competiciones definidas en COMP_INFO."""
     teams: dict[str, Team] = {}  # key = slot_id str
     players_by_team: dict[str, list[Player]] = {}
+    seen_uids: set[str] = set()
 
     def infer_country_from_comp(comp_code: str) -> str:
         if comp_code in ("ES1", "ES2", "E3G1", "E3G2"):
@@ -230,6 +250,11 @@ def load_teams() -> dict[str, Team]:
                     pase    = int(row["PASE"]),
                     tiro    = int(row["TIRO"]),
                 )
+                uid = f"{slot}:{p.name}"
+                if uid in seen_uids:
+                    uid = f"{uid}#{sum(1 for q in players_by_team[key] if q.name == p.name) + 1}"
+                seen_uids.add(uid)
+                p.uid = uid
                 players_by_team[key].append(p)
             except (ValueError, KeyError):
                 continue
@@ -382,12 +407,12 @@ def _calc_team_strength_android(team: Team, tactic: Optional[dict], is_home: boo
     return max(10.0, min(99.0, base + tactical_bonus + runtime))
 
 
-def _strength_to_lambda(strength: float, is_home: bool) -> float:
+def _strength_to_lambda(strength: float, is_home: bool, home_factor: float = 1.08) -> float:
     norm = (strength - 10.0) / 89.0
     # Calibracion realista (5 ultimas temporadas principales):
     # objetivo global ~2.4-2.9 goles por partido.
     lam = 0.29 + norm * 1.78
-    return lam * 1.08 if is_home else lam
+    return lam * home_factor if is_home else lam
 
 
 def _apply_expulsion_penalty(lam: float, red_cards: int) -> float:
@@ -423,10 +448,50 @@ _GOAL_FACTOR_BY_COMP: dict[str, float] = {
 }
 
 
+# Factor de campo por competicion; vacio = 1.08 global (solo lo rellena la calibracion)
+_HOME_FACTOR_BY_COMP: dict[str, float] = {}
+
+
 def _competition_goal_factor(comp_code: str) -> float:
     return _GOAL_FACTOR_BY_COMP.get(str(comp_code), 1.0)
 
 
+def _competition_home_factor(comp_code: str) -> float:
+    return _HOME_FACTOR_BY_COMP.get(str(comp_code), 1.08)
+
+
+GOAL_CALIBRATION_SCHEMA = 1
+GOAL_CALIBRATION = Path(os.getenv("PCF_GOAL_CALIBRATION", "") or Path(__file__).resolve().parent / "goal_calibration.json")
+
+
+def _load_goal_calibration(path: Path = GOAL_CALIBRATION) -> Optional[dict]:
+    """
+    Aplica el fichero versionado de calibrate_goal_factors.py (si existe)
+    sobre los factores por competicion. Sin fichero se usan los de arriba.
+    """
+    if not path.exists():
+        return None
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        print(f"[AVISO] Calibracion ignorada ({path.name}): {exc}", file=sys.stderr)
+        return None
+    if not isinstance(payload, dict) or payload.get("schema") != GOAL_CALIBRATION_SCHEMA:
+        print(f"[AVISO] Calibracion ignorada ({path.name}): esquema no soportado", file=sys.stderr)
+        return None
+    for comp, entry in (payload.get("competitions") or {}).items():
+        if not isinstance(entry, dict):
+            continue
+        if "goal_factor" in entry:
+            _GOAL_FACTOR_BY_COMP[str(comp)] = float(entry["goal_factor"])
+        if "home_factor" in entry:
+            _HOME_FACTOR_BY_COMP[str(comp)] = float(entry["home_factor"])
+    return payload
+
+
+GOAL_CALIBRATION_INFO = _load_goal_calibration()
+
+
 def _pick_eligible_slot(lineup_size: int, dismissed: set[int], rng: KotlinXorWowRandom) -> Optional[int]:
     if lineup_size <= 0:
         return None
@@ -552,7 +617,9 @@ def simulate_match(home: Team, away: Team, seed: int,
     home_pace, away_pace = _pace_factors(home_t, away_t)
     home_lambda = max(
         0.1,
-        _apply_expulsion_penalty(_strength_to_lambda(home_strength, True), home_red) * home_pace * comp_factor,
+        _apply_expulsion_penalty(
+            _strength_to_lambda(home_strength, True, _competition_home_factor(home.comp)), home_red
+        ) * home_pace * comp_factor,
     )
     away_lambda = max(
         0.1,
@@ -937,64 +1004,281 @@ REAL_LEAGUES = [
 ]
 
 
+REAL_FOOTBALL_BASE = os.environ.get("PCFUTBOL_SPORTSDB_URL", "https://www.thesportsdb.com/api/v1/json/3")
+REAL_FOOTBALL_SEASON = "2024-2025"
+REAL_FOOTBALL_CACHE_DIR = Path.home() / ".pcfutbol_realfootball"
+REAL_FOOTBALL_TTL = 30 * 60  # segundos que una respuesta se da por fresca
+# Ritmo maximo contra la API (la clave publica "3" es de uso compartido)
+REAL_FOOTBALL_RATE = float(os.environ.get("PCFUTBOL_SPORTSDB_RATE", "2"))
+
+
+@dataclass
+class RealFootballResult:
+    data: dict
+    fetched_at: float
+    source: str   # "red", "cache" o "cache-caducada" (mas vieja que el TTL)
+    fallback: bool = False   # la red fallo (o modo sin conexion) y se sirvio la cache
+
+    @property
+    def age_min(self) -> int:
+        return max(0, int((time.time() - self.fetched_at) // 60))
+
+
+class RealFootballOffline(Exception):
+    """No hay red (o se pidio modo sin conexion) y la URL no esta en cache."""
+
+
+class _TokenBucket:
+    """Limitador de ritmo compartido entre hilos: `rate` peticiones/s, rafagas de `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RealFootballClient:
+    """
+    Cliente de TheSportsDB con cache en disco (un JSON por URL) y TTL.
+    La precarga de clasificacion + resultados de todas las ligas corre en
+    segundo plano en un pool pequeno; toda descarga pasa por un token bucket
+    para no saturar la API. Una consulta que ya esta en vuelo se espera en
+    lugar de repetirse; las demas se descargan en el hilo que las pide, sin
+    hacer cola tras la precarga. Si la red falla (o en modo sin conexion) se
+    sirve la ultima copia guardada, marcada como fallback.
+    """
+    def __init__(self, base_url: str = REAL_FOOTBALL_BASE, cache_dir: Path = REAL_FOOTBALL_CACHE_DIR,
+                 ttl: float = REAL_FOOTBALL_TTL, timeout: float = 8.0, offline: bool = False,
+                 workers: int = 2, rate: float = REAL_FOOTBALL_RATE, burst: int = 2):
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.offline = offline
+        self.workers = workers
+        self._bucket = _TokenBucket(rate, burst)
+        self._lock = threading.Lock()
+        self._inflight: dict[str, concurrent.futures.Future] = {}
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    # --- URLs -------------------------------------------------------------
+    def table_url(self, league_id: int) -> str:
+        return f"{self.base_url}/lookuptable.php?l={league_id}&s={REAL_FOOTBALL_SEASON}"
+
+    def events_url(self, league_id: int) -> str:
+        return f"{self.base_url}/eventspastleague.php?id={league_id}"
+
+    # --- cache en disco ---------------------------------------------------
+    def _cache_path(self, url: str) -> Path:
+        return self.cache_dir / f"{zlib.crc32(url.encode('utf-8')):08x}.json"
+
+    def _read_cache(self, url: str) -> Optional[RealFootballResult]:
+        try:
+            entry = json.loads(self._cache_path(url).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("url") != url or not isinstance(entry.get("data"), dict):
+            return None
+        return RealFootballResult(entry["data"], float(entry.get("fetched_at", 0.0)), "cache")
+
+    def _write_cache(self, url: str, data: dict, fetched_at: float):
+        path = self._cache_path(url)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps({"url": url, "fetched_at": fetched_at, "data": data}), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            pass  # sin cache en disco el cliente sigue funcionando
+
+    # --- red --------------------------------------------------------------
+    def _download(self, url: str) -> RealFootballResult:
+        import urllib.request
+
+        self._bucket.acquire()
+        with urllib.request.urlopen(url, timeout=self.timeout) as r:
+            data = json.loads(r.read())
+        if not isinstance(data, dict):
+            raise ValueError("respuesta inesperada")
+        now = time.time()
+        self._write_cache(url, data, now)
+        return RealFootballResult(data, now, "red")
+
+    def _executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="realfootball")
+            return self._pool
+
+    def _submit(self, url: str) -> concurrent.futures.Future:
+        pool = self._executor()
+        with self._lock:
+            fut = self._inflight.get(url)
+            if fut is not None:
+                return fut
+            fut = pool.submit(self._download, url)
+            self._inflight[url] = fut
+        # Fuera del lock: si ya termino, el callback corre aqui mismo.
+        fut.add_done_callback(lambda _f, u=url: self._forget(u))
+        return fut
+
+    def _forget(self, url: str):
+        with self._lock:
+            self._inflight.pop(url, None)
+
+    def get(self, url: str, refresh: bool = False) -> RealFootballResult:
+        cached = self._read_cache(url)
+        fresh = cached is not None and time.time() - cached.fetched_at < self.ttl
+        if fresh and not refresh:
+            return cached
+        if not self.offline:
+            with self._lock:
+                inflight = self._inflight.get(url)
+            try:
+                return inflight.result() if inflight is not None else self._download(url)
+            except Exception:
+                if cached is None:
+                    raise
+        if cached is None:
+            raise RealFootballOffline(url)
+        cached.source = "cache" if fresh else "cache-caducada"
+        cached.fallback = True
+        return cached
+
+    def table(self, league_id: int, refresh: bool = False) -> RealFootballResult:
+        return self.get(self.table_url(league_id), refresh)
+
+    def events(self, league_id: int, refresh: bool = False) -> RealFootballResult:
+        return self.get(self.events_url(league_id), refresh)
+
+    def prefetch(self, league_ids) -> list[concurrent.futures.Future]:
+        """Lanza en segundo plano lo que no este fresco en cache; no bloquea."""
+        if self.offline:
+            return []
+        futures = []
+        now = time.time()
+        for league_id in league_ids:
+            for url in (self.table_url(league_id), self.events_url(league_id)):
+                cached = self._read_cache(url)
+                if cached is None or now - cached.fetched_at >= self.ttl:
+                    futures.append(self._submit(url))
+        return futures
+
+    def close(self):
+        """Cancela las precargas pendientes; solo al salir del programa."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_REAL_FOOTBALL_CLIENT: Optional[RealFootballClient] = None
+
+
+def _real_football_client() -> RealFootballClient:
+    global _REAL_FOOTBALL_CLIENT
+    if _REAL_FOOTBALL_CLIENT is None:
+        _REAL_FOOTBALL_CLIENT = RealFootballClient()
+    return _REAL_FOOTBALL_CLIENT
+
+
+def _close_real_football_client():
+    if _REAL_FOOTBALL_CLIENT is not None:
+        _REAL_FOOTBALL_CLIENT.close()
+
+
+def _print_real_table(rows: list):
+    print(f"\n{'Pos':<4} {'Equipo':<28} {'PJ':>3} {'G':>3} {'E':>3} {'P':>3} {'GF':>4} {'GC':>4} {'Pts':>4}")
+    print("-" * 58)
+    for i, row in enumerate(rows, 1):
+        print(
+            f"{i:<4} {row.get('name', '')[:27]:<28} "
+            f"{row.get('played', '')!s:>3} {row.get('win', '')!s:>3} "
+            f"{row.get('draw', '')!s:>3} {row.get('loss', '')!s:>3} "
+            f"{row.get('goalsfor', '')!s:>4} {row.get('goalsagainst', '')!s:>4} "
+            f"{row.get('total', '')!s:>4}"
+        )
+
+
+def _print_real_events(events: list):
+    print()
+    for ev in events:
+        hs = ev.get("intHomeScore") or "-"
+        aws = ev.get("intAwayScore") or "-"
+        home = ev.get("strHomeTeam", "")[:22]
+        away = ev.get("strAwayTeam", "")[:22]
+        date = ev.get("dateEvent", "")
+        print(f"  {date}  {home:>22} {hs}-{aws}  {away}")
+
+
 def menu_real_football() -> None:
     """Muestra clasificacion y resultados reales de cualquier liga via TheSportsDB."""
-    import urllib.request
-    import json
-
-    BASE = "https://www.thesportsdb.com/api/v1/json/3"
+    client = _real_football_client()
+    # Precarga en segundo plano: al elegir liga los datos suelen estar ya en cache.
+    client.prefetch([league_id for _, league_id, _ in REAL_LEAGUES])
+    toggle = len(REAL_LEAGUES) + 1
 
     while True:
         print(_c(CYAN, "\n=== ACTUALIDAD FUTBOLISTICA ==="))
         for i, (name, _, code) in enumerate(REAL_LEAGUES, 1):
             print(f"  {i:>2}. {name} ({code})")
+        print(f"  {toggle:>2}. Modo sin conexion: {'SI' if client.offline else 'NO'}")
         print("   0. Volver")
 
-        op = input_int("  Liga: ", 0, len(REAL_LEAGUES))
+        op = input_int("  Liga: ", 0, toggle)
         if op == 0:
             return
+        if op == toggle:
+            client.offline = not client.offline
+            if not client.offline:
+                client.prefetch([league_id for _, league_id, _ in REAL_LEAGUES])
+            continue
 
         name, league_id, _ = REAL_LEAGUES[op - 1]
         print(_c(YELLOW, f"\n  {name}"))
         print("  1. Clasificacion")
         print("  2. Ultimos resultados")
-        sub = input_int("  Opcion: ", 1, 2)
+        print("  3. Clasificacion (forzar descarga)")
+        print("  4. Ultimos resultados (forzar descarga)")
+        sub = input_int("  Opcion: ", 1, 4)
 
         try:
-            if sub == 1:
-                url = f"{BASE}/lookuptable.php?l={league_id}&s=2024-2025"
-                with urllib.request.urlopen(url, timeout=8) as r:
-                    data = json.loads(r.read())
-                rows = data.get("table") or []
+            if sub in (1, 3):
+                res = client.table(league_id, refresh=sub == 3)
+                rows = res.data.get("table") or []
                 if not rows:
                     print(_c(RED, "  Sin datos para esta liga."))
                 else:
-                    print(f"\n{'Pos':<4} {'Equipo':<28} {'PJ':>3} {'G':>3} {'E':>3} {'P':>3} {'GF':>4} {'GC':>4} {'Pts':>4}")
-                    print("-" * 58)
-                    for i, row in enumerate(rows, 1):
-                        print(
-                            f"{i:<4} {row.get('name', '')[:27]:<28} "
-                            f"{row.get('played', '')!s:>3} {row.get('win', '')!s:>3} "
-                            f"{row.get('draw', '')!s:>3} {row.get('loss', '')!s:>3} "
-                            f"{row.get('goalsfor', '')!s:>4} {row.get('goalsagainst', '')!s:>4} "
-                            f"{row.get('total', '')!s:>4}"
-                        )
+                    _print_real_table(rows)
             else:
-                url = f"{BASE}/eventspastleague.php?id={league_id}"
-                with urllib.request.urlopen(url, timeout=8) as r:
-                    data = json.loads(r.read())
-                events = (data.get("events") or [])[-15:][::-1]
+                res = client.events(league_id, refresh=sub == 4)
+                events = (res.data.get("events") or [])[-15:][::-1]
                 if not events:
                     print(_c(RED, "  Sin resultados disponibles."))
                 else:
-                    print()
-                    for ev in events:
-                        hs = ev.get("intHomeScore") or "-"
-                        aws = ev.get("intAwayScore") or "-"
-                        home = ev.get("strHomeTeam", "")[:22]
-                        away = ev.get("strAwayTeam", "")[:22]
-                        date = ev.get("dateEvent", "")
-                        print(f"  {date}  {home:>22} {hs}-{aws}  {away}")
+                    _print_real_events(events)
+            if res.source != "red":
+                aviso = "sin conexion, " if res.fallback else ""
+                print(_c(GRAY, f"  ({aviso}datos en cache de hace {res.age_min} min)"))
+        except RealFootballOffline:
+            print(_c(RED, "  Sin conexion y sin datos guardados para esta liga."))
         except Exception as e:
             print(_c(RED, f"  Error de conexion: {e}"))
 
@@ -1005,6 +1289,7 @@ def menu_real_football() -> None:
 # ===========================================================================
 
 CAREER_SAVE = Path.home() / ".pcfutbol_career.json"
+CAREER_DB = Path.home() / ".pcfutbol_career.db"
 
 DEFAULT_STAFF_PROFILE: dict[str, int] = {
     "segundo_entrenador": 50,
@@ -1617,24 +1902,552 @@ def _print_career_summary(data: dict):
 
 # ---- Save / Load -----------------------------------------------------------
 
+def _career_backend() -> str:
+    """Backend de guardado: JSON (por defecto) o SQLite con PCF_CAREER_BACKEND=sqlite."""
+    raw = os.getenv("PCF_CAREER_BACKEND", "json").strip().lower()
+    return "sqlite" if raw in ("sqlite", "sqlite3", "db") else "json"
+
+
 def _save_career(data: dict):
-    with open(CAREER_SAVE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Encola un guardado en segundo plano; nunca bloquea la interaccion."""
+    _flush_player_ledger(data)
+    _CAREER_SAVER.submit(_career_snapshot(data), _players_changed_since_save(data))
+
+
+def _flush_career_saves(timeout: Optional[float] = None) -> bool:
+    """Espera a que el guardado pendiente llegue a disco."""
+    return _CAREER_SAVER.flush(timeout)
+
+
+def _career_snapshot(value):
+    """Copia inmutable de datos JSON (dict/list/escalares), mas barata que deepcopy."""
+    if isinstance(value, _LazyCareer):
+        # Las secciones aun sin parsear viajan como bytes y se reescriben tal cual.
+        snapshot = {k: _career_snapshot(v) for k, v in dict.items(value)}
+        snapshot.update({k: _RawSection(raw) for k, raw in value.raw_sections().items()})
+        return snapshot
+    if isinstance(value, dict):
+        return {k: _career_snapshot(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_career_snapshot(v) for v in value]
+    return value
+
+
+def _atomic_write_bytes(path: Path, payload: bytes):
+    """Escribe via temporal + fsync + os.replace: o carrera vieja o nueva, nunca truncada."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    if os.name == "posix":
+        dir_fd = os.open(str(path.parent), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _write_career(snapshot: dict, players_changed: Optional[set[str]] = None):
+    if _career_backend() == "sqlite":
+        _save_career_sqlite({
+            k: json.loads(v) if isinstance(v, _RawSection) else v for k, v in snapshot.items()
+        }, players_changed)
+        return
+    _atomic_write_bytes(CAREER_SAVE, _encode_career(snapshot))
+
+
+# ---- Save layout -----------------------------------------------------------
+# El fichero sigue siendo un objeto JSON plano valido, pero la primera linea
+# contiene la cabecera (manager, temporada, equipo, jornada, historial...) y
+# "_sections" con el offset/longitud en bytes de cada seccion pesada, que va
+# en su propia linea. La cabecera se lee sin parsear jugadores ni resultados.
+
+_CAREER_LAZY_SECTIONS = ("players", "results", "euro", "news")
+
+
+class _RawSection(bytes):
+    """JSON de una seccion que no se ha llegado a parsear."""
+
+
+class _LazyCareer(dict):
+    """Carrera cuya seccion pesada se parsea en el primer acceso."""
+    def __init__(self, header: dict, raw_sections: dict[str, bytes]):
+        super().__init__(header)
+        self._raw = {k: v for k, v in raw_sections.items() if k not in header}
+
+    def raw_sections(self) -> dict[str, bytes]:
+        return dict(self._raw)
+
+    def _materialize(self, key):
+        raw = self._raw.pop(key, None)
+        if raw is not None:
+            dict.__setitem__(self, key, json.loads(raw))
+
+    def _materialize_all(self):
+        for key in list(self._raw):
+            self._materialize(key)
+
+    def __getitem__(self, key):
+        self._materialize(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        self._materialize(key)
+        return dict.get(self, key, default)
+
+    def setdefault(self, key, default=None):
+        self._materialize(key)
+        return dict.setdefault(self, key, default)
+
+    def pop(self, key, *default):
+        self._materialize(key)
+        return dict.pop(self, key, *default)
+
+    def __setitem__(self, key, value):
+        self._raw.pop(key, None)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        if self._raw.pop(key, None) is not None and not dict.__contains__(self, key):
+            return
+        dict.__delitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        for key in dict(*args, **kwargs):
+            self._raw.pop(key, None)
+        dict.update(self, *args, **kwargs)
+
+    def __contains__(self, key):
+        return key in self._raw or dict.__contains__(self, key)
+
+    def __iter__(self):
+        yield from dict.__iter__(self)
+        yield from list(self._raw)
+
+    def __len__(self):
+        return dict.__len__(self) + len(self._raw)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        self._materialize_all()
+        return dict.items(self)
+
+    def values(self):
+        self._materialize_all()
+        return dict.values(self)
+
+    def __eq__(self, other):
+        self._materialize_all()
+        return dict.__eq__(self, other)
+
+    __hash__ = None
+
+
+def _encode_career(snapshot: dict) -> bytes:
+    header = {k: v for k, v in snapshot.items() if k not in _CAREER_LAZY_SECTIONS}
+    present = [k for k in _CAREER_LAZY_SECTIONS if k in snapshot]
+    if not present or not header:
+        return json.dumps(
+            {k: json.loads(v) if isinstance(v, _RawSection) else v for k, v in snapshot.items()},
+            ensure_ascii=False,
+        ).encode("utf-8") + b"\n"
+
+    body: list[bytes] = []
+    offsets: dict[str, list[int]] = {}
+    pos = 0
+    for i, key in enumerate(present):
+        value = snapshot[key]
+        if isinstance(value, _RawSection):
+            raw = bytes(value)
+        else:
+            raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        prefix = json.dumps(key).encode("utf-8") + b": "
+        suffix = b"}\n" if i == len(present) - 1 else b",\n"
+        offsets[key] = [pos + len(prefix), len(raw)]
+        body.append(prefix + raw + suffix)
+        pos += len(prefix) + len(raw) + len(suffix)
+
+    header["_sections"] = offsets
+    head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    return head[:-1] + b",\n" + b"".join(body)
+
+
+def _decode_career(blob: bytes) -> Optional[dict]:
+    newline = blob.find(b"\n")
+    first = blob if newline < 0 else blob[:newline]
+    header = None
+    try:
+        header = json.loads(first[:-1] + b"}" if first.endswith(b",") else first)
+    except ValueError:
+        pass
+    if isinstance(header, dict) and isinstance(header.get("_sections"), dict):
+        sections = header.pop("_sections")
+        body = memoryview(blob)[newline + 1:]
+        return _LazyCareer(header, {
+            key: bytes(body[int(off):int(off) + int(length)]) for key, (off, length) in sections.items()
+        })
+    # Formato antiguo (JSON monolitico indentado) o cabecera sin secciones.
+    data = header if newline < 0 and isinstance(header, dict) else json.loads(blob)
+    if isinstance(data, dict):
+        data.pop("_sections", None)
+    return data
+
+
+class _CareerSaver:
+    """
+    Hilo de guardado. Las peticiones seguidas (fichaje + jornada) se funden:
+    solo se escribe la foto mas reciente, con la union de los jugadores
+    cambiados de todas ellas (None = snapshot de jugadores completo).
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending: Optional[dict] = None
+        self._pending_players: Optional[set[str]] = None
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[BaseException] = None
+
+    def submit(self, snapshot: dict, players_changed: Optional[set[str]] = None):
+        with self._cond:
+            if self._pending is None:
+                self._pending_players = players_changed
+            elif self._pending_players is not None and players_changed is not None:
+                self._pending_players = self._pending_players | players_changed
+            else:
+                self._pending_players = None
+            self._pending = snapshot
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="career-saver", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                snapshot, self._pending = self._pending, None
+                players_changed, self._pending_players = self._pending_players, None
+                self._busy = True
+            try:
+                _write_career(snapshot, players_changed)
+                self.last_error = None
+            except Exception as exc:
+                self.last_error = exc
+                print(_c(RED, f"\n  [ERROR] No se pudo guardar la carrera: {exc}"), file=sys.stderr)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+_CAREER_SAVER = _CareerSaver()
+# Ctrl-C / sys.exit: el ultimo guardado encolado se completa antes de salir.
+atexit.register(_flush_career_saves)
 
 
 def _load_career() -> Optional[dict]:
-    if not CAREER_SAVE.exists():
+    _flush_career_saves()
+    if _career_backend() == "sqlite" and CAREER_DB.exists():
+        try:
+            data = _load_career_sqlite()
+        except (sqlite3.Error, ValueError):
+            return None
+    else:
+        # Sin base de datos aun: se parte del JSON (migracion transparente).
+        if not CAREER_SAVE.exists():
+            return None
+        try:
+            data = _decode_career(CAREER_SAVE.read_bytes())
+        except Exception:
+            return None
+    if isinstance(data, dict):
+        _ensure_manager_depth(data)
+        _ensure_president_profile(data)
+        _ensure_market_profile(data)
+    return data
+
+
+# ---- SQLite career store ---------------------------------------------------
+# Tablas por temporada (resultados, jugadores, noticias, fichajes, caja) con
+# indices por temporada/jornada/equipo. El resto del estado (manager, copa,
+# euro, tactica...) vive como JSON por clave en career_state.
+
+_CAREER_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS career_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seasons (
+    season    TEXT PRIMARY KEY,
+    team_slot INTEGER,
+    team_name TEXT,
+    comp      TEXT,
+    objective TEXT,
+    position  INTEGER,
+    met       INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    season     TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    matchday   INTEGER NOT NULL,
+    home_slot  INTEGER NOT NULL,
+    away_slot  INTEGER NOT NULL,
+    home_goals INTEGER NOT NULL,
+    away_goals INTEGER NOT NULL,
+    PRIMARY KEY (season, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_results_matchday ON results (season, matchday);
+CREATE INDEX IF NOT EXISTS idx_results_home ON results (season, home_slot);
+CREATE INDEX IF NOT EXISTS idx_results_away ON results (season, away_slot);
+CREATE TABLE IF NOT EXISTS players (
+    season    TEXT NOT NULL,
+    seq       INTEGER NOT NULL,
+    name      TEXT,
+    team_slot INTEGER,
+    position  TEXT,
+    me        INTEGER,
+    payload   TEXT NOT NULL,
+    uid       TEXT,
+    PRIMARY KEY (season, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_players_team ON players (season, team_slot);
+CREATE INDEX IF NOT EXISTS idx_players_name ON players (name, season);
+CREATE TABLE IF NOT EXISTS news (
+    season   TEXT NOT NULL,
+    seq      INTEGER NOT NULL,
+    matchday INTEGER,
+    text     TEXT NOT NULL,
+    PRIMARY KEY (season, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_news_matchday ON news (season, matchday);
+CREATE TABLE IF NOT EXISTS transfers (
+    season      TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    player_name TEXT NOT NULL,
+    from_slot   INTEGER,
+    fee         INTEGER,
+    PRIMARY KEY (season, kind, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_transfers_team ON transfers (season, from_slot);
+CREATE TABLE IF NOT EXISTS finances (
+    season   TEXT NOT NULL,
+    matchday INTEGER NOT NULL,
+    budget   INTEGER NOT NULL,
+    PRIMARY KEY (season, matchday)
+);
+"""
+
+# Secciones que se guardan en tablas propias y no en career_state.
+_CAREER_DB_TABLE_KEYS = ("results", "news", "players", "bought", "sold")
+
+
+def _career_db_connect() -> sqlite3.Connection:
+    con = sqlite3.connect(str(CAREER_DB))
+    con.executescript(_CAREER_DB_SCHEMA)
+    if "uid" not in {row[1] for row in con.execute("PRAGMA table_info(players)")}:
+        # Base de datos anterior a la columna uid: se reescribe el snapshot al guardar.
+        with con:
+            con.execute("ALTER TABLE players ADD COLUMN uid TEXT")
+            con.execute("DELETE FROM career_state WHERE key = '_players_sig'")
+    con.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_players_uid ON players (season, uid)")
+    return con
+
+
+def _news_matchday(text: str) -> Optional[int]:
+    if not text.startswith("J"):
         return None
+    digits = text[1:].split(":", 1)[0]
+    return int(digits) if digits.isdigit() else None
+
+
+def _career_db_sync_rows(con: sqlite3.Connection, table: str, season: str, rows: list[tuple],
+                         kind: Optional[str] = None):
+    """Sincroniza una lista append-only: solo inserta las filas nuevas."""
+    where = "season = ?" + (" AND kind = ?" if kind is not None else "")
+    params: tuple = (season,) if kind is None else (season, kind)
+    stored = con.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}", params).fetchone()[0]
+    if stored > len(rows):
+        # La lista se ha reiniciado o recortado: se reescribe la temporada.
+        con.execute(f"DELETE FROM {table} WHERE {where}", params)
+        stored = 0
+    if stored == len(rows):
+        return
+    placeholders = ", ".join("?" * (len(rows[0]) + len(params) + 1))
+    con.executemany(
+        f"INSERT INTO {table} VALUES ({placeholders})",
+        [params + (seq,) + row for seq, row in enumerate(rows[stored:], start=stored)],
+    )
+
+
+# Ultimo career_state escrito por este proceso (clave -> valor): solo se
+# codifican y escriben las claves que han cambiado desde el guardado anterior.
+_CAREER_DB_STATE: dict[str, object] = {}
+
+
+def _career_db_player_row(season: str, seq: int, p: dict) -> tuple:
+    return (
+        season, seq, p.get("name"), p.get("team_slot_id"), p.get("position"), p.get("me"),
+        json.dumps(p, ensure_ascii=False, separators=(",", ":")), p.get("uid"),
+    )
+
+
+def _career_db_write_players(con: sqlite3.Connection, season: str, players: list,
+                             changed: Optional[set[str]]):
+    """
+    Vuelca data["players"]. Con `changed` (uids tocados desde el guardado
+    anterior) solo se insertan/actualizan esas filas; con None, o si la tabla
+    no cuadra con el snapshot, se reescribe la temporada entera.
+    """
+    signature = f"{season}:{len(players)}"
+    row = con.execute("SELECT value FROM career_state WHERE key = '_players_sig'").fetchone()
+    if changed is not None and row is not None and row[0].split(":")[0] == season:
+        rows = [
+            _career_db_player_row(season, seq, p)
+            for seq, p in enumerate(players)
+            if isinstance(p, dict) and p.get("uid") in changed
+        ] if changed else []
+        try:
+            con.executemany(
+                "INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (season, uid) DO UPDATE SET name = excluded.name, "
+                "team_slot = excluded.team_slot, position = excluded.position, "
+                "me = excluded.me, payload = excluded.payload",
+                rows,
+            )
+            stored = con.execute("SELECT COUNT(*) FROM players WHERE season = ?", (season,)).fetchone()[0]
+        except sqlite3.IntegrityError:
+            stored = -1
+        if stored == len(players):
+            con.execute("INSERT OR REPLACE INTO career_state VALUES ('_players_sig', ?)", (signature,))
+            return
+    con.execute("DELETE FROM players WHERE season = ?", (season,))
+    con.executemany(
+        "INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [_career_db_player_row(season, seq, p) for seq, p in enumerate(players)],
+    )
+    con.execute("INSERT OR REPLACE INTO career_state VALUES ('_players_sig', ?)", (signature,))
+
+
+def _save_career_sqlite(data: dict, players_changed: Optional[set[str]] = None):
+    season = str(data.get("season", "?"))
+    results = data.get("results") if isinstance(data.get("results"), list) else []
+    news = data.get("news") if isinstance(data.get("news"), list) else []
+    bought = data.get("bought") if isinstance(data.get("bought"), list) else []
+    sold = data.get("sold") if isinstance(data.get("sold"), list) else []
+    players = data.get("players") if isinstance(data.get("players"), list) else None
+
+    con = _career_db_connect()
+    try:
+        with con:
+            state = {key: value for key, value in data.items() if key not in _CAREER_DB_TABLE_KEYS}
+            con.execute(
+                f"DELETE FROM career_state WHERE key NOT IN ({', '.join('?' * len(state))}) AND substr(key, 1, 1) != '_'",
+                list(state),
+            )
+            con.executemany(
+                "INSERT OR REPLACE INTO career_state VALUES (?, ?)",
+                [
+                    (key, json.dumps(value, ensure_ascii=False))
+                    for key, value in state.items()
+                    if key not in _CAREER_DB_STATE or _CAREER_DB_STATE[key] != value
+                ],
+            )
+
+            _career_db_sync_rows(
+                con, "results", season,
+                [(int(r["md"]), int(r["h"]), int(r["a"]), int(r["hg"]), int(r["ag"])) for r in results],
+            )
+            _career_db_sync_rows(con, "news", season, [(_news_matchday(str(n)), str(n)) for n in news])
+            _career_db_sync_rows(
+                con, "transfers", season,
+                [(str(b.get("player_name", "")), b.get("from_slot"), b.get("paid")) for b in bought],
+                kind="BUY",
+            )
+            _career_db_sync_rows(con, "transfers", season, [(str(n), None, None) for n in sold], kind="SELL")
+
+            if players is not None:
+                _career_db_write_players(con, season, players, players_changed)
+
+            con.execute(
+                "INSERT OR REPLACE INTO finances VALUES (?, ?, ?)",
+                (season, _safe_int(data.get("current_matchday", 1), 1), _safe_int(data.get("budget", 0), 0)),
+            )
+            manager = data.get("manager") if isinstance(data.get("manager"), dict) else {}
+            for h in manager.get("history", []) or []:
+                if not isinstance(h, dict):
+                    continue
+                con.execute(
+                    "INSERT OR REPLACE INTO seasons VALUES (?, "
+                    "(SELECT team_slot FROM seasons WHERE season = ?), ?, ?, ?, ?, ?)",
+                    (
+                        str(h.get("season", "?")), str(h.get("season", "?")), h.get("team"), h.get("comp"),
+                        h.get("objective"), h.get("position"), 1 if h.get("met") else 0,
+                    ),
+                )
+            if not any(isinstance(h, dict) and str(h.get("season")) == season for h in manager.get("history", []) or []):
+                con.execute(
+                    "INSERT OR REPLACE INTO seasons VALUES (?, ?, ?, ?, ?, NULL, NULL)",
+                    (season, data.get("team_slot"), data.get("team_name"), data.get("competition"), data.get("objective")),
+                )
+        _CAREER_DB_STATE.clear()
+        _CAREER_DB_STATE.update(state)
+    finally:
+        con.close()
+
+
+def _load_career_sqlite() -> Optional[dict]:
+    _CAREER_DB_STATE.clear()
+    con = _career_db_connect()
     try:
-        with open(CAREER_SAVE, encoding="utf-8") as f:
-            data = json.load(f)
-        if isinstance(data, dict):
-            _ensure_manager_depth(data)
-            _ensure_president_profile(data)
-            _ensure_market_profile(data)
+        data: dict = {
+            key: json.loads(value)
+            for key, value in con.execute("SELECT key, value FROM career_state WHERE substr(key, 1, 1) != '_'")
+        }
+        if not data:
+            return None
+        season = str(data.get("season", "?"))
+        data["results"] = [
+            {"md": md, "h": h, "a": a, "hg": hg, "ag": ag}
+            for md, h, a, hg, ag in con.execute(
+                "SELECT matchday, home_slot, away_slot, home_goals, away_goals "
+                "FROM results WHERE season = ? ORDER BY seq",
+                (season,),
+            )
+        ]
+        data["news"] = [text for (text,) in con.execute("SELECT text FROM news WHERE season = ? ORDER BY seq", (season,))]
+        data["bought"] = [
+            {"player_name": name, "from_slot": from_slot, "paid": fee}
+            for name, from_slot, fee in con.execute(
+                "SELECT player_name, from_slot, fee FROM transfers WHERE season = ? AND kind = 'BUY' ORDER BY seq",
+                (season,),
+            )
+        ]
+        data["sold"] = [
+            name for (name,) in con.execute(
+                "SELECT player_name FROM transfers WHERE season = ? AND kind = 'SELL' ORDER BY seq", (season,)
+            )
+        ]
+        players = [json.loads(payload) for (payload,) in con.execute(
+            "SELECT payload FROM players WHERE season = ? ORDER BY seq", (season,)
+        )]
+        if players:
+            data["players"] = players
         return data
-    except Exception:
-        return None
+    finally:
+        con.close()
 
 
 def _season_year(season: str) -> int:
@@ -1647,6 +2460,7 @@ def _season_year(season: str) -> int:
 def _player_snapshot_from_team_player(player: Player, team: Team, season_year: int) -> dict:
     birth_year = season_year - max(player.age, 15)
     return {
+        "uid": player.uid,
         "name": player.name,
         "position": player.position,
         "citizenship": player.citizenship,
@@ -1678,6 +2492,664 @@ def _build_players_snapshot(liga1: list[Team], liga2: list[Team], season: str) -
     return players
 
 
+# ---- Hidratacion de plantillas (data["players"] -> Team.players) ----
+
+_PLAYER_OVERLAY_ATTRS = (
+    "me", "ve", "re", "ag", "ca", "remate", "regate", "pase", "tiro", "entrada", "portero", "market_value",
+)
+_FREE_AGENT_SLOT = -1
+
+
+def _player_uid(record: dict) -> str:
+    """uid estable del registro; los snapshots antiguos lo derivan de equipo y nombre."""
+    uid = record.get("uid")
+    if not uid:
+        uid = f"{_safe_int(record.get('team_slot_id', 0), 0)}:{record.get('name', '')}"
+        record["uid"] = uid
+    return str(uid)
+
+
+def _player_from_snapshot(record: dict, team: Team, season_year: int) -> Player:
+    """Crea un Player vivo a partir de un registro (canteranos, jugadores sin CSV)."""
+    birth_year = _safe_int(record.get("birth_year", season_year - 17), season_year - 17)
+    player = Player(
+        slot_id=team.slot_id,
+        team_name=team.name,
+        comp=team.comp,
+        citizenship=str(record.get("citizenship", "") or "ES").upper()[:2],
+        name=str(record.get("name", "Jugador")),
+        position=str(record.get("position", "Central Midfield")),
+        age=max(15, season_year - birth_year),
+        market_value=0,
+        ve=50, re=50, ag=50, ca=50, me=50,
+        portero=0, entrada=0, regate=0, remate=0, pase=0, tiro=0,
+        uid=_player_uid(record),
+    )
+    return _overlay_player(player, record, team, season_year)
+
+
+def _overlay_player(player: Player, record: dict, team: Team, season_year: int) -> Player:
+    """Player con los datos del registro; el original no se toca (puede estar en un WorldState)."""
+    changes = {
+        attr: _safe_int(record[attr], getattr(player, attr))
+        for attr in _PLAYER_OVERLAY_ATTRS
+        if attr in record
+    }
+    if record.get("position"):
+        changes["position"] = str(record["position"])
+    if "birth_year" in record:
+        changes["age"] = max(15, season_year - _safe_int(record["birth_year"], season_year - player.age))
+    return dataclasses.replace(player, slot_id=team.slot_id, team_name=team.name, comp=team.comp, **changes)
+
+
+class _PlayerLedger:
+    """
+    Enlace uid -> (registro de data["players"], Player vivo). Los movimientos
+    de mercado marcan jugadores como sucios y solo esos se vuelcan al guardar.
+    """
+
+    def __init__(self, data: dict, all_slots: dict[int, Team],
+                 records: dict[str, dict], live: dict[str, Player]):
+        self.data = data
+        self.all_slots = all_slots
+        self.records = records
+        self.live = live
+        self.dirty: set[str] = set()
+        # uids volcados al snapshot desde el ultimo guardado (None = todos)
+        self.unsaved: Optional[set[str]] = set()
+        self._saved_players = data.get("players")
+        self.market: Optional["_MarketIndex"] = None
+
+    def mark(self, player: Player):
+        if not player.uid:
+            return
+        self.live[player.uid] = player
+        self.dirty.add(player.uid)
+        if self.market is not None:
+            self.market.update(player)
+
+    def flush(self):
+        if not self.dirty:
+            return
+        season_year = _season_year(self.data.get("season", "2025-26"))
+        snapshot = self.data.setdefault("players", [])
+        for uid in sorted(self.dirty):
+            player = self.live.get(uid)
+            if player is None:
+                continue
+            team = self.all_slots.get(player.slot_id)
+            if team is not None:
+                fresh = _player_snapshot_from_team_player(player, team, season_year)
+            else:
+                fresh = {"uid": uid, "team_slot_id": _FREE_AGENT_SLOT, "team_comp": "", "status": "FREE"}
+            record = self.records.get(uid)
+            if record is None:
+                if team is None:
+                    continue
+                self.records[uid] = fresh
+                snapshot.append(fresh)
+            else:
+                record.update(fresh)
+            if self.unsaved is not None:
+                self.unsaved.add(uid)
+        self.dirty.clear()
+
+    def take_unsaved(self) -> Optional[set[str]]:
+        """uids cambiados desde el guardado anterior; None si el snapshot se ha rehecho."""
+        players = self.data.get("players")
+        changed = self.unsaved if players is self._saved_players else None
+        self._saved_players = players
+        self.unsaved = set()
+        return changed
+
+
+_ACTIVE_LEDGER: Optional[_PlayerLedger] = None
+
+
+def _hydrate_rosters(data: dict, all_slots: dict[int, Team]) -> _PlayerLedger:
+    """
+    Vuelca data["players"] sobre las plantillas vivas en una sola pasada por uid:
+    atributos evolucionados, cambios de club, retirados fuera y canteranos nuevos.
+    Los equipos que el snapshot no cubre (partidas antiguas) se incorporan a el.
+    """
+    global _ACTIVE_LEDGER
+    season_year = _season_year(data.get("season", "2025-26"))
+    snapshot = data.get("players")
+    if not isinstance(snapshot, list):
+        snapshot = []
+        data["players"] = snapshot
+
+    live: dict[str, Player] = {p.uid: p for team in all_slots.values() for p in team.players if p.uid}
+    records: dict[str, dict] = {}
+    rosters: dict[int, list[Player]] = {}
+    retired: set[str] = set()
+    rewritten = False   # registros nuevos o uids derivados: el snapshot se guarda entero
+    for record in snapshot:
+        if not isinstance(record, dict):
+            continue
+        rewritten = rewritten or not record.get("uid")
+        uid = _player_uid(record)
+        if record.get("status") == "RETIRED":
+            # Cuenta como cubierto: el CSV no debe devolverlo como jugador activo.
+            retired.add(uid)
+            continue
+        records[uid] = record
+        team = all_slots.get(_safe_int(record.get("team_slot_id", _FREE_AGENT_SLOT), _FREE_AGENT_SLOT))
+        if team is None:
+            continue
+        player = live.get(uid)
+        if player is None:
+            player = _player_from_snapshot(record, team, season_year)
+        else:
+            player = _overlay_player(player, record, team, season_year)
+        live[uid] = player
+        rosters.setdefault(team.slot_id, []).append(player)
+
+    for slot, team in all_slots.items():
+        if slot in rosters:
+            team.players = rosters[slot]
+            continue
+        if retired:
+            team.players = [p for p in team.players if p.uid not in retired]
+        for player in team.players:
+            if player.uid in records:
+                continue
+            record = _player_snapshot_from_team_player(player, team, season_year)
+            records[player.uid] = record
+            snapshot.append(record)
+            rewritten = True
+
+    _ACTIVE_LEDGER = _PlayerLedger(data, all_slots, records, live)
+    if rewritten:
+        _ACTIVE_LEDGER.unsaved = None
+    return _ACTIVE_LEDGER
+
+
+def _flush_player_ledger(data: dict):
+    if _ACTIVE_LEDGER is not None and _ACTIVE_LEDGER.data is data:
+        _ACTIVE_LEDGER.flush()
+
+
+def _players_changed_since_save(data: dict) -> Optional[set[str]]:
+    """Jugadores a volcar en el guardado que se encola (None = snapshot completo)."""
+    if _ACTIVE_LEDGER is not None and _ACTIVE_LEDGER.data is data:
+        return _ACTIVE_LEDGER.take_unsaved()
+    return None
+
+
+# Las plantillas y los Player vivos nunca se modifican en sitio: cada cambio
+# crea lista u objeto nuevo (dataclasses.replace), asi un WorldState capturado
+# antes sigue viendo el estado de entonces.
+
+def _move_player(player: Player, src: Team, dst: Team) -> Player:
+    """Traspasa un jugador entre plantillas vivas y lo marca para el snapshot."""
+    moved = dataclasses.replace(player, slot_id=dst.slot_id, team_name=dst.name, comp=dst.comp)
+    src.players = [p for p in src.players if p is not player]
+    dst.players = dst.players + [moved]
+    if _ACTIVE_LEDGER is not None:
+        _ACTIVE_LEDGER.mark(moved)
+    return moved
+
+
+def _release_player(player: Player, team: Team) -> Player:
+    """Saca a un jugador de la plantilla (venta) y lo deja libre en el snapshot."""
+    released = dataclasses.replace(player, slot_id=_FREE_AGENT_SLOT)
+    team.players = [p for p in team.players if p is not player]
+    if _ACTIVE_LEDGER is not None:
+        _ACTIVE_LEDGER.mark(released)
+    return released
+
+
+# ---- Indice del mercado de fichajes ----
+
+MARKET_GROUPS = ("GK", "DEF", "MID", "FWD")
+# Tramos de valor (EUR): cada tramo guarda su lista ordenada por ME
+_MARKET_VALUE_BANDS = (250_000, 500_000, 1_000_000, 2_000_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000)
+
+
+def _position_group(position: str) -> str:
+    if position == "Goalkeeper":
+        return "GK"
+    if "Back" in position or position == "Defender":
+        return "DEF"
+    if "Forward" in position or "Winger" in position or "Attacker" in position or "Striker" in position:
+        return "FWD"
+    return "MID"
+
+
+class _MarketIndex:
+    """
+    Jugadores de todas las competiciones cargadas por grupo de posicion y
+    tramo de valor; cada tramo es una lista (-ME, uid) ordenada. Una consulta
+    fusiona los tramos que caen en el rango de precio y corta al llegar al
+    limite, sin recorrer la base completa.
+    """
+
+    def __init__(self, all_slots: dict[int, Team]):
+        self.all_slots = all_slots
+        self._bands: dict[str, list[list[tuple[int, str]]]] = {
+            group: [[] for _ in range(len(_MARKET_VALUE_BANDS) + 1)] for group in MARKET_GROUPS
+        }
+        self._players: dict[str, Player] = {}
+        self._where: dict[str, tuple[str, int, tuple[int, str]]] = {}
+        for team in all_slots.values():
+            for player in team.players:
+                self._place(player, append=True)
+        for bands in self._bands.values():
+            for band in bands:
+                band.sort()
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def _place(self, player: Player, append: bool = False):
+        uid = player.uid or f"{player.slot_id}:{player.name}"
+        group = _position_group(player.position)
+        band_idx = bisect.bisect_right(_MARKET_VALUE_BANDS, player.market_value)
+        key = (-player.me, uid)
+        if append:
+            self._bands[group][band_idx].append(key)
+        else:
+            bisect.insort(self._bands[group][band_idx], key)
+        self._players[uid] = player
+        self._where[uid] = (group, band_idx, key)
+
+    def remove(self, player: Player):
+        uid = player.uid or f"{player.slot_id}:{player.name}"
+        where = self._where.pop(uid, None)
+        if where is None:
+            return
+        group, band_idx, key = where
+        band = self._bands[group][band_idx]
+        pos = bisect.bisect_left(band, key)
+        if pos < len(band) and band[pos] == key:
+            band.pop(pos)
+        self._players.pop(uid, None)
+
+    def update(self, player: Player):
+        """Reubica al jugador tras un traspaso o un cambio de ME/valor."""
+        self.remove(player)
+        if player.slot_id in self.all_slots:
+            self._place(player)
+
+    def query(self, group: Optional[str] = None, max_value: Optional[int] = None,
+              min_value: Optional[int] = None, max_age: Optional[int] = None,
+              exclude_slot: Optional[int] = None, exclude_names: Optional[set] = None,
+              min_me: Optional[int] = None, max_me: Optional[int] = None,
+              limit: int = 20) -> list[tuple[Team, Player]]:
+        """Top `limit` por ME con valor en (min_value, max_value], grupo, ME y edad."""
+        lo = 0 if min_value is None else bisect.bisect_right(_MARKET_VALUE_BANDS, min_value)
+        hi = len(_MARKET_VALUE_BANDS) if max_value is None else bisect.bisect_right(_MARKET_VALUE_BANDS, max_value)
+        groups = MARKET_GROUPS if group is None else (group,)
+        streams = [self._bands[g][i] for g in groups for i in range(lo, hi + 1) if self._bands[g][i]]
+        if max_me is not None:
+            streams = [band[bisect.bisect_left(band, (-max_me, "")):] for band in streams]
+        out: list[tuple[Team, Player]] = []
+        for neg_me, uid in heapq.merge(*streams):
+            if min_me is not None and -neg_me < min_me:
+                break
+            player = self._players[uid]
+            if max_value is not None and player.market_value > max_value:
+                continue
+            if min_value is not None and player.market_value <= min_value:
+                continue
+            if max_age is not None and player.age > max_age:
+                continue
+            if exclude_slot is not None and player.slot_id == exclude_slot:
+                continue
+            if exclude_names and player.name in exclude_names:
+                continue
+            team = self.all_slots.get(player.slot_id)
+            if team is None:
+                continue
+            out.append((team, player))
+            if len(out) >= limit:
+                break
+        return out
+
+
+def _market_index(all_slots: dict[int, Team]) -> _MarketIndex:
+    """Indice del mercado de la partida activa (se crea en la primera consulta)."""
+    ledger = _ACTIVE_LEDGER
+    if ledger is None or ledger.all_slots is not all_slots:
+        return _MarketIndex(all_slots)
+    if ledger.market is None:
+        ledger.market = _MarketIndex(all_slots)
+    return ledger.market
+
+
+# ---- WorldState: forks copy-on-write para escenarios "y si..." ----
+
+_COW_DELETED = object()
+_COW_MAX_LAYERS = 8
+
+
+class _CowMap:
+    """
+    Mapa por capas: las capas congeladas se comparten entre forks y cada
+    fork solo escribe en su capa local. fork() es O(1) (profundidad acotada).
+    """
+
+    __slots__ = ("_layers", "_local")
+
+    def __init__(self, base: Optional[dict] = None, layers: tuple = ()):
+        self._layers = layers if base is None else layers + (base,)
+        self._local: dict = {}
+
+    def get(self, key, default=None):
+        value = self._local.get(key, _COW_DELETED)
+        if value is _COW_DELETED and key not in self._local:
+            for layer in reversed(self._layers):
+                if key in layer:
+                    value = layer[key]
+                    break
+        return default if value is _COW_DELETED else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _COW_DELETED)
+        if value is _COW_DELETED:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _COW_DELETED) is not _COW_DELETED
+
+    def __setitem__(self, key, value):
+        self._local[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._local[key] = _COW_DELETED
+
+    def owns(self, key) -> bool:
+        return key in self._local
+
+    def keys(self) -> list:
+        merged: dict = {}
+        for layer in self._layers + (self._local,):
+            merged.update(layer)
+        return [k for k, v in merged.items() if v is not _COW_DELETED]
+
+    def to_dict(self) -> dict:
+        return {k: self[k] for k in self.keys()}
+
+    def fork(self) -> "_CowMap":
+        if self._local:
+            self._layers = self._layers + (self._local,)
+            self._local = {}
+        if len(self._layers) > _COW_MAX_LAYERS:
+            self._layers = (self.to_dict(),)
+        return _CowMap(layers=self._layers)
+
+
+class WorldState:
+    """
+    Estado de partida forkable: equipos (con sus plantillas), dict de carrera
+    y resultados de liga (de los que sale la clasificacion). Un fork comparte
+    todo con su origen; Team, Player y valores de carrera se copian de forma
+    superficial solo al escribirlos desde ese fork. Lo usa what_if_season.
+    """
+
+    def __init__(self, teams: _CowMap, career: _CowMap, owned_players: Optional[set] = None):
+        self._teams = teams
+        self._career = career
+        self._owned_players: set[int] = owned_players if owned_players is not None else set()
+
+    @classmethod
+    def from_career(cls, data: dict, all_slots: dict[int, Team]) -> "WorldState":
+        """
+        Captura la partida viva. Los Team se copian sin copiar sus plantillas
+        (la partida las sustituye, no las modifica) y la carrera se copia como
+        en un guardado, sin el snapshot de jugadores; la partida puede seguir
+        sin que el mundo capturado cambie.
+        """
+        teams = {slot: dataclasses.replace(team) for slot, team in all_slots.items()}
+        career = _career_snapshot({key: data[key] for key in data.keys() if key != "players"})
+        return cls(_CowMap(teams), _CowMap(career))
+
+    def fork(self) -> "WorldState":
+        """Rama independiente en O(1); el original sigue siendo modificable."""
+        self._owned_players = set()   # lo ya copiado pasa a capa compartida
+        return WorldState(self._teams.fork(), self._career.fork())
+
+    # -- lectura (los objetos devueltos son compartidos: no modificarlos) --
+    def team(self, slot: int) -> Team:
+        return self._teams[slot]
+
+    def teams(self, slots=None) -> dict[int, Team]:
+        keys = self._teams.keys() if slots is None else slots
+        return {slot: self._teams[slot] for slot in keys if slot in self._teams}
+
+    def get(self, key, default=None):
+        return self._career.get(key, default)
+
+    def results(self) -> list:
+        return self._career.get("results") or []
+
+    def standings(self, slots) -> list[Standing]:
+        return _standings_from_results(self.results(), self.teams(slots))
+
+    # -- escritura copy-on-write --
+    def set(self, key, value):
+        self._career[key] = value
+
+    def edit(self, key):
+        """Copia propia (un nivel) de un valor list/dict de la carrera."""
+        value = self._career.get(key)
+        if not self._career.owns(key):
+            if isinstance(value, list):
+                value = list(value)
+            elif isinstance(value, dict):
+                value = dict(value)
+            self._career[key] = value
+        return value
+
+    def edit_team(self, slot: int) -> Team:
+        if not self._teams.owns(slot):
+            self._teams[slot] = dataclasses.replace(self._teams[slot], players=list(self._teams[slot].players))
+        return self._teams[slot]
+
+    def edit_player(self, slot: int, uid: str) -> Player:
+        team = self.edit_team(slot)
+        for i, player in enumerate(team.players):
+            if player.uid == uid:
+                if id(player) not in self._owned_players:
+                    player = dataclasses.replace(player)
+                    team.players[i] = player
+                    self._owned_players.add(id(player))
+                return player
+        raise KeyError(uid)
+
+    def move_player(self, uid: str, src_slot: int, dst_slot: int):
+        src = self.edit_team(src_slot)
+        player = next(p for p in src.players if p.uid == uid)
+        dst = self.edit_team(dst_slot)
+        src.players = [p for p in src.players if p is not player]
+        moved = dataclasses.replace(player, slot_id=dst.slot_id, team_name=dst.name, comp=dst.comp)
+        self._owned_players.add(id(moved))
+        dst.players.append(moved)
+
+    def play_matchday(self, md: int, fixtures: list, tactics: Optional[dict] = None) -> list[dict]:
+        """Simula una jornada ([(local, visitante, semilla)] por slot) y anade los resultados a este fork."""
+        tactics = tactics or {}
+        played = []
+        for h_slot, a_slot, seed in fixtures:
+            hg, ag = simulate_match(
+                self.team(h_slot), self.team(a_slot), seed,
+                home_tactic=tactics.get(h_slot), away_tactic=tactics.get(a_slot),
+            )
+            played.append({"md": md, "h": h_slot, "a": a_slot, "hg": hg, "ag": ag})
+        self.edit("results").extend(played)
+        return played
+
+
+_FORK_JOBS: tuple = ()
+
+
+def _run_fork_job(index: int):
+    items, fn = _FORK_JOBS
+    return fn(items[index])
+
+
+def _map_forked(items: list, fn, workers: Optional[int] = None) -> list:
+    """
+    Aplica fn(item) a cada elemento en un pool de procesos. Con el arranque
+    'fork' de POSIX los hijos heredan items y fn sin serializarlos (sirven
+    closures); en otras plataformas o con un solo worker va en serie.
+    """
+    global _FORK_JOBS
+    workers = workers or min(len(items), os.cpu_count() or 1)
+    if workers <= 1 or len(items) <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return [fn(item) for item in items]
+    # Sin guardado a medias: el hilo de guardado no debe tener el lock ni un fichero abierto al forkear.
+    _flush_career_saves()
+    _FORK_JOBS = (items, fn)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        ) as pool:
+            return list(pool.map(_run_fork_job, range(len(items))))
+    finally:
+        _FORK_JOBS = ()
+
+
+def run_world_forks(forks: list, fn, workers: Optional[int] = None) -> list:
+    """Aplica fn(fork) a cada WorldState en paralelo (ver _map_forked)."""
+    return _map_forked(forks, fn, workers)
+
+
+# ---- Escenarios "y si...": resto de la liga con y sin una decision ----
+
+_WHAT_IF_PRESETS: dict[str, dict] = {
+    "ofensiva": {"tipoJuego": 3, "tipoPresion": 3},
+    "defensiva": {"tipoJuego": 1, "tipoPresion": 1},
+}
+
+
+def _apply_what_if(world: WorldState, decision: dict, mgr_slot: int) -> str:
+    """Aplica la decision al fork y devuelve su descripcion."""
+    if "tactic" in decision:
+        tactic = dict(DEFAULT_TACTIC, **(world.get("tactic") or {}))
+        tactic.update(decision["tactic"])
+        world.set("tactic", tactic)
+        return f"Tactica {_tactic_summary(tactic)}"
+    if "sign" in decision:
+        uid = decision["sign"]
+        src = next((t for t in world.teams().values() if any(p.uid == uid for p in t.players)), None)
+        if src is None or src.slot_id == mgr_slot:
+            raise ValueError(f"jugador no disponible: {uid}")
+        player = next(p for p in src.players if p.uid == uid)
+        world.move_player(uid, src.slot_id, mgr_slot)
+        world.set("budget", _safe_int(world.get("budget", 0), 0) - int(player.market_value))
+        return f"Fichaje de {player.name} ({src.name})"
+    raise ValueError(f"decision desconocida: {decision!r}")
+
+
+def _what_if_run(world: WorldState, schedule: dict, start_md: int, mgr_slot: int, run: int) -> tuple[int, int]:
+    """Juega en el fork las jornadas que faltan; (puntos, posicion) del manager."""
+    mix = 0 if run == 0 else (run * 0x9E3779B1) & _MASK_32
+    tactics = {mgr_slot: world.get("tactic")}
+    for md in range(start_md, max(schedule, default=0) + 1):
+        world.play_matchday(md, [(h, a, seed ^ mix) for h, a, seed in schedule.get(md, [])], tactics)
+    slots = {slot for fixtures in schedule.values() for h, a, _ in fixtures for slot in (h, a)}
+    table = world.standings(slots)
+    pos = next(i for i, st in enumerate(table, 1) if st.team.slot_id == mgr_slot)
+    return table[pos - 1].points, pos
+
+
+def what_if_season(data: dict, all_slots: dict[int, Team], decision: dict,
+                   runs: int = 8, workers: Optional[int] = None) -> dict:
+    """
+    Simula el resto de la liga `runs` veces tal cual y con la decision
+    ({"tactic": {...}} o {"sign": uid}), cada simulacion en su propio fork del
+    mundo actual; la partida no se toca. La simulacion 0 usa las semillas del
+    calendario real. Solo liga: sin copa, Europa ni mercado IA.
+    """
+    mgr_slot = int(data["team_slot"])
+    base = WorldState.from_career(data, all_slots)
+    alt = base.fork()
+    label = _apply_what_if(alt, decision, mgr_slot)
+    schedule = _league_schedule(data, all_slots)
+    start_md = int(data.get("current_matchday", 1))
+    runs = max(1, int(runs))
+    jobs = [(name, world.fork(), run) for name, world in (("actual", base), ("alternativa", alt)) for run in range(runs)]
+    outcomes = _map_forked(
+        jobs, lambda job: (job[0], *_what_if_run(job[1], schedule, start_md, mgr_slot, job[2])), workers
+    )
+    report: dict = {"decision": label, "runs": runs, "from_md": start_md}
+    for name in ("actual", "alternativa"):
+        rows = [(pts, pos) for n, pts, pos in outcomes if n == name]
+        report[name] = {
+            "points": sum(pts for pts, _ in rows) / len(rows),
+            "position": sum(pos for _, pos in rows) / len(rows),
+            "best": min(pos for _, pos in rows),
+            "worst": max(pos for _, pos in rows),
+        }
+    return report
+
+
+def _print_what_if(report: dict, elapsed: float):
+    print(_c(BOLD + YELLOW, f"\n  Escenario: {report['decision']}"))
+    print(_c(GRAY, f"  Liga desde J{report['from_md']}, {report['runs']} simulaciones por escenario ({elapsed:.1f}s)"))
+    print(_c(GRAY, f"  {'':<12} {'PTS':>6} {'POS':>6}  MEJOR-PEOR"))
+    for name, label in (("actual", "Actual"), ("alternativa", "Alternativa")):
+        row = report[name]
+        print(f"  {label:<12} {row['points']:>6.1f} {row['position']:>6.1f}  {row['best']}-{row['worst']}")
+    diff = report["alternativa"]["points"] - report["actual"]["points"]
+    color = GREEN if diff > 0 else (RED if diff < 0 else GRAY)
+    print(_c(color, f"  Diferencia: {diff:+.1f} puntos\n"))
+
+
+def _find_signing_candidates(all_slots: dict[int, Team], mgr_slot: int, text: str, limit: int = 10) -> list[tuple[Team, Player]]:
+    text = text.strip().lower()
+    found = [
+        (team, p) for slot, team in all_slots.items() if slot != mgr_slot
+        for p in team.players if text and text in p.name.lower()
+    ]
+    found.sort(key=lambda tp: (-tp[1].me, tp[1].name))
+    return found[:limit]
+
+
+def _what_if_menu(data: dict, all_slots: dict[int, Team], next_match: Optional[tuple[Team, Team]]):
+    print(_c(BOLD + YELLOW, "\n   ESCENARIO 'Y SI...' "))
+    print(_c(GRAY, "  Simula el resto de la liga con y sin el cambio; la partida no se modifica."))
+    if next_match:
+        print(_c(CYAN, "  1. Tactica del optimizador contra el proximo rival"))
+    print(_c(CYAN, "  2. Tactica ofensiva (juego ofensivo, presion alta)"))
+    print(_c(CYAN, "  3. Tactica defensiva (juego defensivo, presion baja)"))
+    print(_c(CYAN, "  4. Fichar un jugador (busqueda por nombre, sin negociar)"))
+    print(_c(CYAN, "  0. Volver"))
+    op = input_int("  Opcion: ", 0, 4)
+    mgr_slot = int(data["team_slot"])
+    if op == 0 or (op == 1 and not next_match):
+        return
+    if op == 1:
+        home, away = next_match
+        mgr_is_home = home.slot_id == mgr_slot
+        rival = away if mgr_is_home else home
+        best = optimize_tactic(home if mgr_is_home else away, rival, mgr_is_home, base=data.get("tactic"))[0]
+        decision = {"tactic": best["tactic"]}
+    elif op in (2, 3):
+        decision = {"tactic": _WHAT_IF_PRESETS["ofensiva" if op == 2 else "defensiva"]}
+    else:
+        candidates = _find_signing_candidates(all_slots, mgr_slot, input_str("  Nombre (o parte): "))
+        if not candidates:
+            print(_c(GRAY, "  Ningun jugador encontrado.\n"))
+            return
+        for i, (team, p) in enumerate(candidates, 1):
+            print(f"  {i:>2}. {p.name[:25]:<26} {team.name[:20]:<21} {p.position[:17]:<18} {p.me:>3}")
+        idx = input_int(f"  Jugador (1-{len(candidates)}, 0=cancelar): ", 0, len(candidates))
+        if idx == 0:
+            return
+        decision = {"sign": candidates[idx - 1][1].uid}
+    runs = max(1, _safe_int(os.getenv("PCF_WHATIF_RUNS", "8"), 8))
+    print(_c(GRAY, "  Simulando..."))
+    t0 = time.perf_counter()
+    report = what_if_season(data, all_slots, decision, runs=runs)
+    _print_what_if(report, time.perf_counter() - t0)
+
+
 def _format_attr_delta(delta: int, attr: str) -> str:
     label = {
         "me": "ME",
@@ -1812,8 +3284,177 @@ def _print_development_summary(summary: dict):
     print()
 
 
+_DEV_ATTRS = ["ve", "re", "ag", "ca", "remate", "regate", "pase", "tiro", "entrada", "portero"]
+
+
+def _develop_player(p: dict, age: int, is_goalkeeper: bool, intensity: str, focus: str,
+                    segundo: int, fisio: int, rng: random.Random):
+    """Evoluciona un jugador (no retirado) un ano segun edad, entrenamiento y staff."""
+    if age < 24:
+        base_count = rng.randint(1, 3)
+        intensity_adjust = 1 if intensity == "HIGH" else (-1 if intensity == "LOW" and base_count > 1 and rng.random() < 0.40 else 0)
+        coach_adjust = 1 if age <= 21 and segundo >= 70 else 0
+        improve_count = max(1, min(5, base_count + intensity_adjust + coach_adjust))
+        pool = _training_focus_attr_pool(focus, is_goalkeeper=is_goalkeeper)
+        weakest = sorted(_DEV_ATTRS, key=lambda key: int(p.get(key, 50)))[:improve_count]
+        targets: list[str] = []
+        for attr in weakest:
+            if attr not in targets:
+                targets.append(attr)
+        for attr in _pick_unique_attrs(rng, pool, improve_count + 1):
+            if attr not in targets:
+                targets.append(attr)
+            if len(targets) >= improve_count:
+                break
+        gain = 0
+        for attr in targets[:improve_count]:
+            intensity_bonus = 1 if intensity == "HIGH" and rng.random() < 0.55 else (1 if intensity == "MEDIUM" and rng.random() < 0.20 else 0)
+            coach_bonus = 1 if segundo >= 75 and rng.random() < 0.35 else 0
+            inc = min(4, rng.randint(1, 3) + intensity_bonus + coach_bonus)
+            p[attr] = min(99, int(p.get(attr, 50)) + inc)
+            gain += inc
+        p["me"] = min(99, int(p.get("me", 50)) + max(1, round(gain / max(1, len(targets[:improve_count])))))
+    elif age >= 31:
+        decline = 2 if age >= 34 else 1
+        if intensity == "HIGH" and age >= 33:
+            decline += 1
+        if fisio >= 85:
+            decline -= 1
+        elif fisio >= 65 and age >= 34:
+            decline -= 1
+        decline = max(0, decline)
+        if decline > 0:
+            p["ve"] = max(1, int(p.get("ve", 50)) - decline)
+            p["re"] = max(1, int(p.get("re", 50)) - decline)
+        if decline > 0 and intensity == "HIGH" and fisio < 40 and age >= 34 and rng.random() < 0.35:
+            p["ag"] = max(0, int(p.get("ag", 50)) - 1)
+        p["me"] = max(1, int(p.get("me", 50)) - (1 if decline >= 2 else 0))
+    else:
+        adjust_count = rng.randint(0, 2)
+        if intensity == "HIGH" and rng.random() < 0.35:
+            adjust_count = min(3, adjust_count + 1)
+        elif intensity == "LOW" and adjust_count > 0 and rng.random() < 0.35:
+            adjust_count -= 1
+        prime_pool = _training_focus_attr_pool(focus, is_goalkeeper=is_goalkeeper)
+        focus_attrs = set(prime_pool)
+        for attr in _pick_unique_attrs(rng, prime_pool, adjust_count):
+            delta = rng.randint(-1, 1)
+            if delta > 0 and focus != "BALANCED" and attr in focus_attrs and rng.random() < 0.45:
+                delta += 1
+            if delta < 0 and segundo >= 75 and rng.random() < 0.40:
+                delta += 1
+            p[attr] = max(0, min(99, int(p.get(attr, 50)) + delta))
+        p["me"] = max(1, min(99, int(p.get("me", 50)) + rng.randint(-1, 1)))
+
+
+def _develop_players_columnar(players: list[dict], year: int, intensity: str, focus: str,
+                              segundo: int, fisio: int, seed: int) -> int:
+    """
+    Misma evolucion que _develop_player, en columnas NumPy para toda la liga.
+    Devuelve cuantos jugadores se retiran ahora. Determinista por seed.
+    """
+    n = len(players)
+    if n == 0:
+        return 0
+    rng = np.random.default_rng(seed & 0xFFFFFFFFFFFFFFFF)
+    try:
+        attrs = np.array(list(map(operator.itemgetter(*_DEV_ATTRS), players)), dtype=np.int64)
+    except KeyError:
+        attrs = np.array([[int(p.get(a, 50)) for a in _DEV_ATTRS] for p in players], dtype=np.int64)
+    me = np.array([int(p.get("me", 50)) for p in players], dtype=np.int64)
+    age = year - np.array([int(p.get("birth_year", year - 22)) for p in players], dtype=np.int64)
+    is_gk = np.array([str(p.get("position", "")).lower().startswith("goal") for p in players])
+    was_retired = np.array([p.get("status") == "RETIRED" for p in players])
+    cols = np.arange(len(_DEV_ATTRS))
+
+    retire = (age >= 37) | ((age >= 35) & (attrs[:, 0] <= 30))
+    young = ~retire & (age < 24)
+    veteran = ~retire & (age >= 31)
+    prime = ~retire & ~young & ~veteran
+
+    def row_rank(keys):
+        # Posicion de cada atributo dentro de su fila tras ordenar por keys.
+        order = np.argsort(keys, axis=1, kind="stable")
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.broadcast_to(cols, order.shape), axis=1)
+        return rank
+
+    # Jovenes: mejoran sus k atributos mas flojos.
+    base_count = rng.integers(1, 4, n)
+    if intensity == "HIGH":
+        intensity_adjust = np.ones(n, dtype=np.int64)
+    elif intensity == "LOW":
+        intensity_adjust = -((base_count > 1) & (rng.random(n) < 0.40)).astype(np.int64)
+    else:
+        intensity_adjust = np.zeros(n, dtype=np.int64)
+    coach_adjust = ((age <= 21) & (segundo >= 70)).astype(np.int64)
+    improve_count = np.clip(base_count + intensity_adjust + coach_adjust, 1, 5)
+    targets = young[:, None] & (row_rank(attrs) < improve_count[:, None])
+    bonus_p = 0.55 if intensity == "HIGH" else (0.20 if intensity == "MEDIUM" else 0.0)
+    inc = (
+        rng.integers(1, 4, attrs.shape)
+        + (rng.random(attrs.shape) < bonus_p)
+        + ((segundo >= 75) & (rng.random(attrs.shape) < 0.35))
+    )
+    inc = np.where(targets, np.minimum(4, inc), 0)
+    attrs = np.where(targets, np.minimum(99, attrs + inc), attrs)
+    gain_me = np.maximum(1, np.round(inc.sum(axis=1) / improve_count)).astype(np.int64)
+    me = np.where(young, np.minimum(99, me + gain_me), me)
+
+    # Veteranos: pierden fisico; el fisio amortigua.
+    decline = np.where(age >= 34, 2, 1) + ((intensity == "HIGH") & (age >= 33))
+    if fisio >= 85:
+        decline = decline - 1
+    elif fisio >= 65:
+        decline = decline - (age >= 34)
+    decline = np.maximum(0, decline)
+    declining = veteran & (decline > 0)
+    for col in (0, 1):  # ve, re
+        attrs[:, col] = np.where(declining, np.maximum(1, attrs[:, col] - decline), attrs[:, col])
+    if intensity == "HIGH" and fisio < 40:
+        ag_drop = declining & (age >= 34) & (rng.random(n) < 0.35)
+        attrs[:, 2] = np.where(ag_drop, np.maximum(0, attrs[:, 2] - 1), attrs[:, 2])
+    me = np.where(veteran, np.maximum(1, me - (decline >= 2)), me)
+
+    # Plenitud: pequenos ajustes sobre atributos del foco (muestreo ponderado sin reemplazo).
+    adjust_count = rng.integers(0, 3, n)
+    if intensity == "HIGH":
+        adjust_count = np.where(rng.random(n) < 0.35, np.minimum(3, adjust_count + 1), adjust_count)
+    elif intensity == "LOW":
+        adjust_count = np.where((adjust_count > 0) & (rng.random(n) < 0.35), adjust_count - 1, adjust_count)
+    weights = np.array([
+        [_training_focus_attr_pool(focus, is_goalkeeper=gk).count(a) for a in _DEV_ATTRS]
+        for gk in (False, True)
+    ], dtype=np.float64)
+    row_weights = weights[is_gk.astype(np.int64)]
+    sample_keys = np.where(row_weights > 0, rng.exponential(size=attrs.shape) / np.maximum(row_weights, 1e-9), np.inf)
+    chosen = prime[:, None] & (row_rank(sample_keys) < adjust_count[:, None]) & (row_weights > 0)
+    delta = rng.integers(-1, 2, attrs.shape)
+    if focus != "BALANCED":
+        delta = delta + ((delta > 0) & (row_weights > 0) & (rng.random(attrs.shape) < 0.45))
+    if segundo >= 75:
+        delta = delta + ((delta < 0) & (rng.random(attrs.shape) < 0.40))
+    attrs = np.where(chosen, np.clip(attrs + delta, 0, 99), attrs)
+    me = np.where(prime, np.clip(me + rng.integers(-1, 2, n), 1, 99), me)
+
+    attr_rows = attrs.tolist()
+    me_values = me.tolist()
+    for i in np.flatnonzero(~retire).tolist():
+        p = players[i]
+        p.update(zip(_DEV_ATTRS, attr_rows[i]))
+        p["me"] = me_values[i]
+    for i in np.flatnonzero(retire).tolist():
+        players[i]["status"] = "RETIRED"
+    return int((retire & ~was_retired).sum())
+
+
 def _apply_season_development(data: dict) -> dict:
-    """Aplica evolucion/retiro de jugadores tras fin de temporada y devuelve resumen."""
+    """
+    Aplica evolucion/retiro de jugadores tras fin de temporada y devuelve resumen.
+    Solo la plantilla del manager genera detalle; el resto de la liga va en una
+    pasada por columnas (NumPy si esta disponible).
+    """
+    _flush_player_ledger(data)
     players = data.get("players", [])
     if not isinstance(players, list):
         return {"improved": [], "declined": [], "retired": [], "youth_added": 0}
@@ -1834,117 +3475,46 @@ def _apply_season_development(data: dict) -> dict:
     season_hash = sum((i + 1) * ord(ch) for i, ch in enumerate(season_str))
     seed = int(data.get("season_seed", 0)) ^ season_hash
     rng = random.Random(seed)
-    attrs = ["ve", "re", "ag", "ca", "remate", "regate", "pase", "tiro", "entrada", "portero"]
 
     manager_slot = int(data.get("team_slot", -1))
     improved: list[str] = []
     declined: list[str] = []
     retired: list[str] = []
 
+    squad = [p for p in players if isinstance(p, dict) and int(p.get("team_slot_id", -1)) == manager_slot]
+    league = [p for p in players if isinstance(p, dict) and int(p.get("team_slot_id", -1)) != manager_slot]
+
     retired_now = 0
-    for p in players:
-        if not isinstance(p, dict):
-            continue
+    if np is not None:
+        retired_now += _develop_players_columnar(league, year, intensity, focus, segundo, fisio, seed ^ 0x1EA6)
+    else:
+        league_rng = random.Random(seed ^ 0x1EA6)
+        for p in league:
+            age = year - int(p.get("birth_year", year - 22))
+            if age >= 37 or (age >= 35 and int(p.get("ve", 50)) <= 30):
+                if p.get("status") != "RETIRED":
+                    retired_now += 1
+                p["status"] = "RETIRED"
+                continue
+            is_goalkeeper = str(p.get("position", "")).lower().startswith("goal")
+            _develop_player(p, age, is_goalkeeper, intensity, focus, segundo, fisio, league_rng)
 
+    detail_keys = ["me"] + _DEV_ATTRS
+    for p in squad:
         birth_year = int(p.get("birth_year", year - 22))
         age = year - birth_year
         is_goalkeeper = str(p.get("position", "")).lower().startswith("goal")
-        is_manager_player = int(p.get("team_slot_id", -1)) == manager_slot
-        before = {
-            "me": int(p.get("me", 50)),
-            "ve": int(p.get("ve", 50)),
-            "re": int(p.get("re", 50)),
-            "ca": int(p.get("ca", 50)),
-            "ag": int(p.get("ag", 50)),
-            "remate": int(p.get("remate", 0)),
-            "regate": int(p.get("regate", 0)),
-            "pase": int(p.get("pase", 0)),
-            "tiro": int(p.get("tiro", 0)),
-            "entrada": int(p.get("entrada", 0)),
-            "portero": int(p.get("portero", 0)),
-        }
-
         will_retire = age >= 37 or (age >= 35 and int(p.get("ve", 50)) <= 30)
         if will_retire:
             if p.get("status") != "RETIRED":
                 retired_now += 1
-                if is_manager_player:
-                    retired.append(f"{p.get('name', 'Jugador')} ({age} anos)")
+                retired.append(f"{p.get('name', 'Jugador')} ({age} anos)")
             p["status"] = "RETIRED"
             continue
 
-        if age < 24:
-            base_count = rng.randint(1, 3)
-            intensity_adjust = 1 if intensity == "HIGH" else (-1 if intensity == "LOW" and base_count > 1 and rng.random() < 0.40 else 0)
-            coach_adjust = 1 if age <= 21 and segundo >= 70 else 0
-            improve_count = max(1, min(5, base_count + intensity_adjust + coach_adjust))
-            pool = _training_focus_attr_pool(focus, is_goalkeeper=is_goalkeeper)
-            weakest = sorted(attrs, key=lambda key: int(p.get(key, 50)))[:improve_count]
-            targets: list[str] = []
-            for attr in weakest:
-                if attr not in targets:
-                    targets.append(attr)
-            for attr in _pick_unique_attrs(rng, pool, improve_count + 1):
-                if attr not in targets:
-                    targets.append(attr)
-                if len(targets) >= improve_count:
-                    break
-            gain = 0
-            for attr in targets[:improve_count]:
-                intensity_bonus = 1 if intensity == "HIGH" and rng.random() < 0.55 else (1 if intensity == "MEDIUM" and rng.random() < 0.20 else 0)
-                coach_bonus = 1 if segundo >= 75 and rng.random() < 0.35 else 0
-                inc = min(4, rng.randint(1, 3) + intensity_bonus + coach_bonus)
-                p[attr] = min(99, int(p.get(attr, 50)) + inc)
-                gain += inc
-            p["me"] = min(99, int(p.get("me", 50)) + max(1, round(gain / max(1, len(targets[:improve_count])))))
-        elif age >= 31:
-            decline = 2 if age >= 34 else 1
-            if intensity == "HIGH" and age >= 33:
-                decline += 1
-            if fisio >= 85:
-                decline -= 1
-            elif fisio >= 65 and age >= 34:
-                decline -= 1
-            decline = max(0, decline)
-            if decline > 0:
-                p["ve"] = max(1, int(p.get("ve", 50)) - decline)
-                p["re"] = max(1, int(p.get("re", 50)) - decline)
-            if decline > 0 and intensity == "HIGH" and fisio < 40 and age >= 34 and rng.random() < 0.35:
-                p["ag"] = max(0, int(p.get("ag", 50)) - 1)
-            p["me"] = max(1, int(p.get("me", 50)) - (1 if decline >= 2 else 0))
-        else:
-            adjust_count = rng.randint(0, 2)
-            if intensity == "HIGH" and rng.random() < 0.35:
-                adjust_count = min(3, adjust_count + 1)
-            elif intensity == "LOW" and adjust_count > 0 and rng.random() < 0.35:
-                adjust_count -= 1
-            prime_pool = _training_focus_attr_pool(focus, is_goalkeeper=is_goalkeeper)
-            focus_attrs = set(_training_focus_attr_pool(focus, is_goalkeeper=is_goalkeeper))
-            for attr in _pick_unique_attrs(rng, prime_pool, adjust_count):
-                delta = rng.randint(-1, 1)
-                if delta > 0 and focus != "BALANCED" and attr in focus_attrs and rng.random() < 0.45:
-                    delta += 1
-                if delta < 0 and segundo >= 75 and rng.random() < 0.40:
-                    delta += 1
-                p[attr] = max(0, min(99, int(p.get(attr, 50)) + delta))
-            p["me"] = max(1, min(99, int(p.get("me", 50)) + rng.randint(-1, 1)))
-
-        if not is_manager_player:
-            continue
-
-        after = {
-            "me": int(p.get("me", 50)),
-            "ve": int(p.get("ve", 50)),
-            "re": int(p.get("re", 50)),
-            "ca": int(p.get("ca", 50)),
-            "ag": int(p.get("ag", 50)),
-            "remate": int(p.get("remate", 0)),
-            "regate": int(p.get("regate", 0)),
-            "pase": int(p.get("pase", 0)),
-            "tiro": int(p.get("tiro", 0)),
-            "entrada": int(p.get("entrada", 0)),
-            "portero": int(p.get("portero", 0)),
-        }
+        before = {k: int(p.get(k, 50 if k in ("me", "ve", "re", "ca", "ag") else 0)) for k in detail_keys}
+        _develop_player(p, age, is_goalkeeper, intensity, focus, segundo, fisio, rng)
+        after = {k: int(p.get(k, 50 if k in ("me", "ve", "re", "ca", "ag") else 0)) for k in detail_keys}
         deltas = {k: after[k] - before[k] for k in before}
         pos_changes = [(k, v) for k, v in deltas.items() if v > 0]
         neg_changes = [(k, v) for k, v in deltas.items() if v < 0]
@@ -2013,6 +3583,7 @@ def _apply_season_development(data: dict) -> dict:
             )
             quality_hint = (ca + pase + regate + remate + tiro) // 5
             players.append({
+                "uid": f"youth:{season_str}:{manager_slot}:{youth_added}",
                 "name": f"Cantera {rng.randint(100, 999)}",
                 "position": position,
                 "birth_year": year - 17,
@@ -2653,9 +4224,278 @@ def _tactic_summary(t: dict) -> str:
     return f"{tj}  {tm}  Presin {tp}  Toque {t.get('porcToque',50)}%  Contra {t.get('porcContra',30)}%{pt}"
 
 
-def _tactic_menu(data: dict):
+# ---- Optimizador tactico ----
+
+_TACTIC_GRID_AXES: dict = {
+    "tipoJuego":     (1, 2, 3),
+    "tipoMarcaje":   (1, 2),
+    "tipoPresion":   (1, 2, 3),
+    "tipoDespejes":  (1, 2),
+    "faltas":        (1, 2, 3),
+    "perdidaTiempo": (0, 1),
+}
+_VAR_CANCEL_P = 0.18 * 0.38   # _apply_var_to_goals
+_MAX_GOALS = 8                # tope de _poisson_goals
+
+
+def _tactic_grid(base: dict) -> list[dict]:
+    """Todas las combinaciones con efecto en el motor (porcToque no influye)."""
+    contra = int(base.get("porcContra", 30))
+    grid = [dict(base)]
+    for key, values in _TACTIC_GRID_AXES.items():
+        grid = [dict(t, **{key: v}) for t in grid for v in values]
+    # porcContra solo cuenta por encima de 60: se prueba a cada lado del umbral
+    sides = (contra if contra <= 60 else 30, contra if contra > 60 else 70)
+    return [dict(t, porcContra=c) for t in grid for c in sides]
+
+
+@functools.lru_cache(maxsize=4096)
+def _goal_pmf(lam: float) -> tuple:
+    """Reparto de goles del motor: Poisson truncado a 8 y anulaciones VAR."""
+    raw = [math.exp(-lam) * lam ** k / math.factorial(k) for k in range(_MAX_GOALS)]
+    raw.append(max(0.0, 1.0 - sum(raw)))
+    keep = 1.0 - _VAR_CANCEL_P
+    out = [0.0] * (_MAX_GOALS + 1)
+    for k, pk in enumerate(raw):
+        for j in range(k + 1):
+            out[j] += pk * math.comb(k, j) * keep ** j * _VAR_CANCEL_P ** (k - j)
+    return tuple(out)
+
+
+@functools.lru_cache(maxsize=64)
+def _red_card_prob(lineup_size: int, hard_fouls: bool) -> float:
+    """P(al menos una roja): dos amarillas al mismo jugador o roja directa por juego duro."""
+    no_double = 0.0
+    lam = 1.5   # amarillas por equipo: la mitad de Poisson(1.5) + Poisson(1.5)
+    for n in range(0, 25):
+        p_n = math.exp(-lam) * lam ** n / math.factorial(n)
+        distinct = 1.0
+        for i in range(n):
+            distinct *= max(0, lineup_size - i) / max(1, lineup_size)
+        no_double += p_n * distinct
+    p_red = 1.0 - no_double
+    if hard_fouls:
+        p_red = 1.0 - (1.0 - p_red) * 0.95
+    return p_red
+
+
+def _mixture_pmf(lam: float, p_red: float, pace: float, comp_factor: float) -> tuple:
+    clean = _goal_pmf(max(0.1, lam * pace * comp_factor))
+    if p_red <= 0.0:
+        return clean
+    down = _goal_pmf(max(0.1, _apply_expulsion_penalty(lam, 1) * pace * comp_factor))
+    return tuple((1.0 - p_red) * a + p_red * b for a, b in zip(clean, down))
+
+
+def _tactic_outcome(home: Team, away: Team, home_t: Optional[dict], away_t: Optional[dict],
+                    strength_cache: Optional[dict] = None) -> tuple[float, float, float]:
+    """(P victoria local, P empate, P victoria visitante) con el modelo analitico del motor."""
+    cache = strength_cache if strength_cache is not None else {}
+    home_t = home_t or {}
+    away_t = away_t or {}
+
+    def strength(team: Team, tactic: dict, is_home: bool) -> float:
+        key = (team.slot_id, is_home, _tactic_adj(tactic, is_home))
+        if key not in cache:
+            cache[key] = _calc_team_strength_android(team, tactic, is_home=is_home)
+        return cache[key]
+
+    comp_factor = (_competition_goal_factor(home.comp) + _competition_goal_factor(away.comp)) * 0.5
+    home_pace, away_pace = _pace_factors(home_t, away_t)
+    size_key = ("squad", home.slot_id, away.slot_id)
+    if size_key not in cache:
+        cache[size_key] = (len(_match_squad(home)), len(_match_squad(away)))
+    home_n, away_n = cache[size_key]
+    home_pmf = _mixture_pmf(
+        _strength_to_lambda(strength(home, home_t, True), True, _competition_home_factor(home.comp)),
+        _red_card_prob(home_n, int(home_t.get("faltas", 2)) == 3), home_pace, comp_factor,
+    )
+    away_pmf = _mixture_pmf(
+        _strength_to_lambda(strength(away, away_t, False), False),
+        _red_card_prob(away_n, int(away_t.get("faltas", 2)) == 3), away_pace, comp_factor,
+    )
+    win = draw = 0.0
+    for hg, ph in enumerate(home_pmf):
+        for ag, pa in enumerate(away_pmf):
+            if hg > ag:
+                win += ph * pa
+            elif hg == ag:
+                draw += ph * pa
+    return win, draw, max(0.0, 1.0 - win - draw)
+
+
+def optimize_tactic(mgr_team: Team, opponent: Team, mgr_is_home: bool, base: Optional[dict] = None,
+                    sims: int = 0, top_k: int = 8, seed: int = 0,
+                    workers: Optional[int] = None) -> list[dict]:
+    """
+    Recorre la rejilla tactica contra el rival y ordena por puntos esperados
+    (modelo analitico). Con sims > 0 las top_k mejores se contrastan con
+    partidos simulados repartidos en procesos.
+    """
+    base = dict(DEFAULT_TACTIC, **(base or {}))
+    cache: dict = {}
+    ranked: list[dict] = []
+    for tactic in _tactic_grid(base):
+        if mgr_is_home:
+            win, draw, loss = _tactic_outcome(mgr_team, opponent, tactic, None, cache)
+        else:
+            loss, draw, win = _tactic_outcome(opponent, mgr_team, None, tactic, cache)
+        ranked.append({"tactic": tactic, "xpts": 3.0 * win + draw, "win": win, "draw": draw, "loss": loss})
+    ranked.sort(key=lambda r: (-r["xpts"], r["loss"]))
+
+    if sims > 0:
+        head = ranked[:top_k]
+
+        def simulate_candidate(entry: dict) -> dict:
+            w = d = 0
+            for i in range(sims):
+                s = (seed ^ (i * 0x9E3779B1)) & _MASK_32
+                if mgr_is_home:
+                    gf, ga = simulate_match(mgr_team, opponent, s, home_tactic=entry["tactic"])
+                else:
+                    ga, gf = simulate_match(opponent, mgr_team, s, away_tactic=entry["tactic"])
+                w += gf > ga
+                d += gf == ga
+            return dict(entry, sim_xpts=(3.0 * w + d) / sims)
+
+        head = _map_forked(head, simulate_candidate, workers)
+        head.sort(key=lambda r: (-r["sim_xpts"], -r["xpts"]))
+        ranked = head + ranked[top_k:]
+    return ranked
+
+
+def _print_tactic_ranking(ranked: list[dict], limit: int = 5):
+    print(_c(GRAY, f"  {'#':>2}  {'xPTS':>5} {'V%':>5} {'E%':>5} {'D%':>5}  TACTICA"))
+    for i, r in enumerate(ranked[:limit], 1):
+        sim = f" (sim {r['sim_xpts']:.2f})" if "sim_xpts" in r else ""
+        print(
+            f"  {i:>2}  {r['xpts']:>5.2f} {r['win'] * 100:>5.1f} {r['draw'] * 100:>5.1f} {r['loss'] * 100:>5.1f}"
+            f"  {_tactic_summary(r['tactic'])}  {_TACTIC_LABELS['tipoDespejes'].get(r['tactic']['tipoDespejes'], '?')}"
+            f"  Faltas {_TACTIC_LABELS['faltas'].get(r['tactic']['faltas'], '?')}{sim}"
+        )
+
+
+def _league_schedule(data: dict, teams: dict[int, Team]) -> dict[int, list[tuple[int, int, int]]]:
+    """Calendario de liga de la partida: jornada -> [(local, visitante, semilla)], como en _season_loop."""
+    comp_key = data.get("competition")
+    comp_t = sorted([t for t in teams.values() if t.comp == comp_key], key=lambda t: t.slot_id)
+    if len(comp_t) < 2:
+        return {}
+    fpm = len(comp_t) // 2
+    seed = int(data.get("season_seed", 0))
+    schedule: dict[int, list[tuple[int, int, int]]] = {}
+    for i, (h, a) in enumerate(generate_fixtures(comp_t), start=1):
+        schedule.setdefault((i - 1) // fpm + 1, []).append((h.slot_id, a.slot_id, seed ^ i))
+    return schedule
+
+
+def _next_manager_fixture(data: dict, teams: dict[int, Team]) -> Optional[tuple[Team, Team]]:
+    """Proximo partido de liga del manager segun el calendario determinista."""
+    md = int(data.get("current_matchday", 1))
+    mgr_slot = data.get("team_slot")
+    for h, a, _ in _league_schedule(data, teams).get(md, []):
+        if mgr_slot in (h, a):
+            return teams[h], teams[a]
+    return None
+
+
+def _headless_optimize_tactic(argv: list[str]) -> int:
+    """Modo sin menus: python pcfutbol_cli.py --optimize-tactic [--sims N] [--apply]"""
+    parser = argparse.ArgumentParser(prog="pcfutbol_cli.py --optimize-tactic")
+    parser.add_argument("--optimize-tactic", action="store_true")
+    parser.add_argument("--sims", type=int, default=0, help="partidos simulados por tactica finalista")
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--apply", action="store_true", help="guardar la mejor tactica en la partida")
+    args = parser.parse_args(argv)
+
+    data = _load_career()
+    if not data or data.get("phase") != "SEASON":
+        print("[ERROR] No hay partida de ProManager en curso.")
+        return 1
+    teams = {t.slot_id: t for t in load_teams().values()}
+    _hydrate_rosters(data, teams)
+    fixture = _next_manager_fixture(data, teams)
+    if fixture is None:
+        print("[ERROR] No hay proximo partido de liga.")
+        return 1
+    home, away = fixture
+    mgr_is_home = home.slot_id == data.get("team_slot")
+    mgr_team, opponent = (home, away) if mgr_is_home else (away, home)
+    t0 = time.perf_counter()
+    ranked = optimize_tactic(
+        mgr_team, opponent, mgr_is_home, base=data.get("tactic"),
+        sims=args.sims, seed=int(data.get("season_seed", 0)), workers=args.workers,
+    )
+    elapsed = time.perf_counter() - t0
+    print(f"  {home.name} vs {away.name}  (J{data.get('current_matchday', 1)}, {len(_tactic_grid(DEFAULT_TACTIC))} tacticas, {elapsed:.2f}s)")
+    _print_tactic_ranking(ranked, args.top)
+    if args.apply:
+        data["tactic"] = dict(ranked[0]["tactic"])
+        _save_career(data)
+        _flush_career_saves()
+        print("  Tactica aplicada a la partida.")
+    return 0
+
+
+def _headless_what_if(argv: list[str]) -> int:
+    """
+    Modo sin menus: python pcfutbol_cli.py --what-if (--sign NOMBRE | --tactic k=v,... |
+    --best-tactic) [--runs N]. No guarda nada en la partida.
+    """
+    parser = argparse.ArgumentParser(prog="pcfutbol_cli.py --what-if")
+    parser.add_argument("--what-if", action="store_true")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--sign", metavar="NOMBRE", help="fichar al mejor jugador cuyo nombre contenga NOMBRE")
+    group.add_argument("--tactic", metavar="K=V,...", help="cambios de tactica, p.ej. tipoJuego=3,tipoPresion=3")
+    group.add_argument("--best-tactic", action="store_true", help="tactica del optimizador contra el proximo rival")
+    parser.add_argument("--runs", type=int, default=8, help="simulaciones por escenario")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    data = _load_career()
+    if not data or data.get("phase") != "SEASON":
+        print("[ERROR] No hay partida de ProManager en curso.")
+        return 1
+    teams = {t.slot_id: t for t in load_teams().values()}
+    _hydrate_rosters(data, teams)
+    mgr_slot = int(data["team_slot"])
+    if args.sign:
+        candidates = _find_signing_candidates(teams, mgr_slot, args.sign, limit=1)
+        if not candidates:
+            print(f"[ERROR] Ningun jugador coincide con {args.sign!r}.")
+            return 1
+        decision = {"sign": candidates[0][1].uid}
+    elif args.tactic:
+        changes = {}
+        for item in args.tactic.split(","):
+            key, _, value = item.partition("=")
+            key = key.strip()
+            if key not in DEFAULT_TACTIC or not value.strip().lstrip("-").isdigit():
+                print(f"[ERROR] Ajuste tactico no valido: {item!r}")
+                return 1
+            changes[key] = int(value)
+        decision = {"tactic": changes}
+    else:
+        fixture = _next_manager_fixture(data, teams)
+        if fixture is None:
+            print("[ERROR] No hay proximo partido de liga.")
+            return 1
+        home, away = fixture
+        mgr_is_home = home.slot_id == mgr_slot
+        ranked = optimize_tactic(home if mgr_is_home else away, away if mgr_is_home else home,
+                                 mgr_is_home, base=data.get("tactic"))
+        decision = {"tactic": ranked[0]["tactic"]}
+    t0 = time.perf_counter()
+    report = what_if_season(data, teams, decision, runs=args.runs, workers=args.workers)
+    _print_what_if(report, time.perf_counter() - t0)
+    return 0
+
+
+def _tactic_menu(data: dict, next_match: Optional[tuple[Team, Team]] = None):
     t = data.setdefault("tactic", dict(DEFAULT_TACTIC))
     print(_c(BOLD + YELLOW, "\n   TCTICA "))
+    max_op = 9 if next_match else 8
 
     while True:
         print(_c(GRAY, f"\n  Ajuste tctico actual: {_tactic_adj(t, is_home=False):+.1f}"))
@@ -2668,9 +4508,12 @@ def _tactic_menu(data: dict):
         print(f"  7. % Contragolpe    : {_c(CYAN, str(t['porcContra']))}%")
         pt_lbl = _c(YELLOW, "ACTIVA") if t.get("perdidaTiempo", 0) == 1 else _c(GRAY, "NO")
         print(f"  8. Prdida de tiempo: {pt_lbl}  {_c(GRAY, '(ms amarillas  +tiempo aadido)')}")
+        if next_match:
+            rival = next_match[1] if next_match[0].slot_id == data.get("team_slot") else next_match[0]
+            print(f"  9. Optimizar contra {rival.name}")
         print(_c(CYAN, "  0. Volver"))
 
-        op = input_int("  Opcin: ", 0, 8)
+        op = input_int("  Opcin: ", 0, max_op)
         if op == 0:
             _save_career(data)
             break
@@ -2695,6 +4538,18 @@ def _tactic_menu(data: dict):
             t["porcContra"] = input_int("  % Contragolpe (0-100): ", 0, 100)
         elif op == 8:
             t["perdidaTiempo"] = 1 - t.get("perdidaTiempo", 0)  # toggle
+        elif op == 9:
+            home, away = next_match
+            mgr_is_home = home.slot_id == data.get("team_slot")
+            mgr_team, rival = (home, away) if mgr_is_home else (away, home)
+            sims = max(0, _safe_int(os.getenv("PCF_TACTIC_SIMS", "0"), 0))
+            ranked = optimize_tactic(mgr_team, rival, mgr_is_home, base=t, sims=sims,
+                                     seed=int(data.get("season_seed", 0)))
+            print(_c(BOLD + YELLOW, f"\n  Mejores tacticas vs {rival.name} ({'casa' if mgr_is_home else 'fuera'}):"))
+            _print_tactic_ranking(ranked)
+            if input_int("  1. Aplicar la mejor  0. Mantener: ", 0, 1) == 1:
+                t.clear()
+                t.update(ranked[0]["tactic"])
 
 
 def _manager_depth_menu(data: dict):
@@ -3096,543 +4951,745 @@ def _coach_input_int(prompt: str, min_val: int, max_val: int, default: int = 0)
         print(f"  Introduce un numero entre {min_val} y {max_val}.")
 
 
-def _entrenador_substitution(mgr_team: "Team", subs_made: list) -> bool:
-    """Cosmetic substitution during entrenador mode."""
-    squad = sorted(mgr_team.players, key=lambda p: p.overall, reverse=True)
-    if len(squad) < 2:
-        print(_c(GRAY, "  No hay suficientes jugadores.\n"))
-        return False
-    print(_c(YELLOW + BOLD, "\n   SUSTITUCIN "))
-    print(_c(GRAY, f"  {'#':>3}  {'JUGADOR':<26} {'POSICIN':<18} {'ME':>3}"))
-    print(_c(GRAY, "  " + "" * 52))
-    for i, p in enumerate(squad, 1):
-        tag = _c(RED, " sale") if p.name in subs_made else ""
-        print(f"  {i:>3}  {p.name[:25]:<26} {p.position[:17]:<18} {p.me:>3}{tag}")
-    print()
-    out_i = _coach_input_int(f"  Sale  (1-{len(squad)}, 0=cancelar): ", 0, len(squad), default=0)
-    if out_i == 0:
-        return False
-    in_i = _coach_input_int(f"  Entra (1-{len(squad)}, 0=cancelar): ", 0, len(squad), default=0)
-    if in_i == 0 or in_i == out_i:
-        return False
-    subs_made.append(squad[out_i - 1].name)
-    print(_c(GREEN, f"   Sale {squad[out_i-1].name}    Entra {squad[in_i-1].name}\n"))
-    return True
+@dataclass(frozen=True)
+class CoachSpeed:
+    """Perfil de ritmo del Modo Entrenador.
 
+    tick/sleep_scale solo marcan las esperas en pantalla; event_boost,
+    narration_every y micro_event_base cambian el partido (y el consumo del
+    rng), por eso el perfil va en el log y una repeticion usa el mismo.
+    """
+    name: str
+    tick: float
+    sleep_scale: float
+    event_boost: float
+    narration_every: int      # minutos entre frases del narrador (0 = nunca)
+    micro_event_base: float
 
-def _match_entrenador(
-    home: "Team", away: "Team", seed: int,
-    mgr_slot: int, data: dict,
-) -> tuple:
+    @property
+    def is_human(self) -> bool:
+        return self.name != "FAST"
+
+
+COACH_SPEEDS: dict[str, CoachSpeed] = {
+    "FAST": CoachSpeed("FAST", 0.11, 0.40, 1.0, 0, 0.04),
+    # Modo humano largo: ~8 minutos reales por partido.
+    "HUMAN8": CoachSpeed("HUMAN8", 5.2, 1.0, 1.65, max(1, int(round(10.0 / 5.2))), 0.16),
+    # Modo humano corto (default): ~5 minutos reales por partido.
+    "HUMAN5": CoachSpeed("HUMAN5", 3.5, 1.0, 1.50, max(1, int(round(10.0 / 3.5))), 0.14),
+}
+COACH_LOG_VERSION = 1
+
+
+def _coach_speed_from_env() -> tuple[CoachSpeed, bool]:
+    """(perfil, animar) segun PCF_COACH_SPEED.
+
+    instant/headless: mismo partido que fast, sin esperas ni frames.
     """
-    Modo entrenador avanzado.
-    El partido se genera minuto a minuto y las decisiones en vivo del manager
-    modifican ritmo, ocasiones, conversion y riesgo disciplinario.
+    raw = os.getenv("PCF_COACH_SPEED", "human5").strip().lower()
+    if raw in ("instant", "headless", "0"):
+        return COACH_SPEEDS["FAST"], False
+    if raw in ("fast", "qa", "bot"):
+        return COACH_SPEEDS["FAST"], True
+    if raw in ("human8", "h8", "8m", "8min", "slow"):
+        return COACH_SPEEDS["HUMAN8"], True
+    return COACH_SPEEDS["HUMAN5"], True
+
+
+class TerminalCoach:
+    """Presentacion en terminal + decisiones del manager por teclado."""
+
+    def __init__(self, data: dict, speed: CoachSpeed, animate: bool = True):
+        self.data = data
+        self.speed = speed
+        self.animate = animate
+
+    def show(self, eng: "CoachMatchEngine", minute, msg: str = ""):
+        if not self.animate:
+            # Sin animacion: una linea por suceso en lugar del campo dibujado.
+            if msg:
+                label = f"{minute}'" if isinstance(minute, int) else str(minute)
+                print(f"  {label:>5} {msg}")
+            return
+        status = _c(CYAN, f"Ordenes: {eng.order_status()}  Mom {eng.momentum:+.2f}  Rojas {eng.reds[0]}-{eng.reds[1]}")
+        payload = (msg + "\n  " + status) if msg else status
+        _draw_frame(eng.home, eng.away, eng.is_home_mgr, eng.cur[0], eng.cur[1], minute, eng.ball, payload)
+
+    def wait(self, seconds: float):
+        if self.animate and seconds > 0:
+            time.sleep(seconds * self.speed.sleep_scale)
+
+    def kickoff(self, eng: "CoachMatchEngine"):
+        self.show(eng, 1, _c(GRAY, f"[Intro] para comenzar... ({self.speed.name})"))
+        _coach_input("")
+
+    def stop_choice(self, eng: "CoachMatchEngine", minute, msg: str) -> str:
+        self.show(eng, minute, msg)
+        print()
+        if eng.wins > 0 and eng.subs > 0:
+            print(_c(CYAN, f"  W. Ventana de cambios ({eng.wins} ventanas  {eng.subs} cambios)"))
+        print(_c(CYAN, "  A. Todo al ataque (10')"))
+        print(_c(CYAN, "  D. Bloque bajo (10')"))
+        print(_c(CYAN, "  P. Presion alta (8', mas tarjetas)"))
+        print(_c(CYAN, "  C. Calmar partido (8')"))
+        print(_c(CYAN, "  T. Cambiar tactica completa"))
+        print(_c(CYAN, "  0. Continuar"))
+        return _coach_input("  > ")
+
+    def halftime_choice(self, eng: "CoachMatchEngine", first: bool) -> str:
+        if first:
+            print()
+        print(_c(CYAN, "  T. Cambiar tactica"))
+        if eng.subs > 0:
+            print(_c(CYAN, f"  S. Sustitucion ({eng.subs} cambios, ventana gratis de descanso)"))
+        print(_c(CYAN, "  A. Todo al ataque (10')"))
+        print(_c(CYAN, "  D. Bloque bajo (10')"))
+        print(_c(CYAN, "  P. Presion alta (8')"))
+        print(_c(CYAN, "  C. Calmar partido (8')"))
+        print(_c(CYAN, "  0. Empezar 2a parte"))
+        return _coach_input("  Opcion: ")
+
+    def substitution(self, eng: "CoachMatchEngine") -> Optional[tuple[str, str]]:
+        """Cambio cosmetico: (sale, entra) o None; marca a los que ya salieron."""
+        squad = sorted(eng.mgr_team.players, key=lambda p: p.overall, reverse=True)
+        if len(squad) < 2:
+            print(_c(GRAY, "  No hay suficientes jugadores.\n"))
+            return None
+        print(_c(YELLOW + BOLD, "\n   SUSTITUCIN "))
+        print(_c(GRAY, f"  {'#':>3}  {'JUGADOR':<26} {'POSICIN':<18} {'ME':>3}"))
+        print(_c(GRAY, "  " + "" * 52))
+        for i, p in enumerate(squad, 1):
+            tag = _c(RED, " sale") if p.name in eng.smade else ""
+            print(f"  {i:>3}  {p.name[:25]:<26} {p.position[:17]:<18} {p.me:>3}{tag}")
+        print()
+        out_i = _coach_input_int(f"  Sale  (1-{len(squad)}, 0=cancelar): ", 0, len(squad), default=0)
+        if out_i == 0:
+            return None
+        in_i = _coach_input_int(f"  Entra (1-{len(squad)}, 0=cancelar): ", 0, len(squad), default=0)
+        if in_i == 0 or in_i == out_i:
+            return None
+        print(_c(GREEN, f"   Sale {squad[out_i-1].name}    Entra {squad[in_i-1].name}\n"))
+        return squad[out_i - 1].name, squad[in_i - 1].name
+
+    def another_sub(self, eng: "CoachMatchEngine", halftime: bool) -> bool:
+        hint = "[S/N]" if halftime else "[S=Si / Intro=No]"
+        return _coach_input(_c(CYAN, f"  Otro cambio? ({eng.subs} restantes) {hint}: ")).upper() == "S"
+
+    def change_tactic(self, eng: "CoachMatchEngine") -> dict:
+        _tactic_menu(self.data)
+        return self.data.get("tactic", eng.tactic)
+
+    def final(self, eng: "CoachMatchEngine", msg: str):
+        self.show(eng, "FT", msg)
+        _coach_input(_c(GRAY, "  [Intro] para continuar..."))
+
+
+class ScriptedCoach:
+    """
+    Decisiones sacadas de una lista [minuto, tipo, valor] (log de un partido
+    o guion de pruebas). Sin `view` no pinta ni espera nada; con un
+    TerminalCoach como `view` sirve para ver una repeticion animada.
+    Si la lista se acaba, continua sin ordenes ni cambios.
     """
-    tactic_ref = [data.get("tactic", dict(DEFAULT_TACTIC))]
-    rng = random.Random(seed)
 
-    is_home_mgr = home.slot_id == mgr_slot
-    mgr_team_obj = home if is_home_mgr else away
-
-    home_base = home.strength() * 1.05
-    away_base = away.strength()
-    our_base = home_base if is_home_mgr else away_base
-    opp_base = away_base if is_home_mgr else home_base
-    comp_goal_factor = (_competition_goal_factor(home.comp) + _competition_goal_factor(away.comp)) * 0.5
-
-    # Mutable state refs
-    cur = [0, 0]              # score home/away
-    ball = [2]                # 0..4 (towards manager attack -> 0)
-    subs = [5]
-    wins = [3]
-    concuss = [True]          # one extra concussion sub
-    smade: list[str] = []
-
-    halfdone = [False]
-    yellows = [0, 0]
-    reds = [0, 0]             # [manager, rival]
-    var_rev = [0, 0]
-    goals_h = [0, 0]
-    subs_h = [0, 0]
-
-    attack_boost = [0]
-    defend_boost = [0]
-    press_boost = [0]
-    calm_boost = [0]
-    momentum = [0.0]          # positive favours manager
-
-    speed_mode_raw = os.getenv("PCF_COACH_SPEED", "human5").strip().lower()
-    if speed_mode_raw in ("fast", "qa", "bot"):
-        speed_mode = "FAST"
-        TICK = 0.11
-        sleep_scale = 0.40
-        event_boost = 1.0
-        narration_every_minutes = 0
-        micro_event_base = 0.04
-    elif speed_mode_raw in ("human8", "h8", "8m", "8min", "slow"):
-        # Modo humano largo: ~8 minutos reales por partido.
-        speed_mode = "HUMAN8"
-        TICK = 5.2
-        sleep_scale = 1.0
-        event_boost = 1.65
-        narration_every_minutes = max(1, int(round(10.0 / max(TICK, 0.01))))
-        micro_event_base = 0.16
-    else:
-        # Modo humano corto (default): ~5 minutos reales por partido.
-        speed_mode = "HUMAN5"
-        TICK = 3.5
-        sleep_scale = 1.0
-        event_boost = 1.50
-        narration_every_minutes = max(1, int(round(10.0 / max(TICK, 0.01))))
-        micro_event_base = 0.14
-    is_human_mode = speed_mode != "FAST"
-    last_narration_minute = [0]
-
-    def _wait(seconds: float):
-        if seconds <= 0:
-            return
-        time.sleep(seconds * sleep_scale)
+    def __init__(self, decisions=(), view: Optional[TerminalCoach] = None):
+        self.decisions = list(decisions)
+        self.pos = 0
+        self.view = view
+
+    def _next(self, minute, kind: str, default):
+        if self.pos >= len(self.decisions):
+            return default
+        d_minute, d_kind, value = self.decisions[self.pos]
+        if d_kind != kind or d_minute != minute:
+            raise ValueError(f"log de partido no coincide: se esperaba {kind}@{minute}, hay {d_kind}@{d_minute}")
+        self.pos += 1
+        return value
+
+    def show(self, eng: "CoachMatchEngine", minute, msg: str = ""):
+        if self.view is not None:
+            self.view.show(eng, minute, msg)
+
+    def wait(self, seconds: float):
+        if self.view is not None:
+            self.view.wait(seconds)
+
+    def kickoff(self, eng: "CoachMatchEngine"):
+        self.show(eng, 1, _c(GRAY, "Repeticion"))
 
-    def clamp(v: float, lo: float, hi: float) -> float:
-        return max(lo, min(hi, v))
+    def stop_choice(self, eng: "CoachMatchEngine", minute, msg: str) -> str:
+        self.show(eng, minute, msg)
+        return self._next(minute, "stop", "0")
 
-    def manager_score() -> int:
-        return cur[0] if is_home_mgr else cur[1]
+    def halftime_choice(self, eng: "CoachMatchEngine", first: bool) -> str:
+        return self._next("HT", "ht", "0")
 
-    def rival_score() -> int:
-        return cur[1] if is_home_mgr else cur[0]
+    def substitution(self, eng: "CoachMatchEngine") -> Optional[tuple[str, str]]:
+        pick = self._next(eng.decision_minute, "sub", None)
+        return tuple(pick) if pick else None
 
-    def manager_leading() -> bool:
-        return manager_score() > rival_score()
+    def another_sub(self, eng: "CoachMatchEngine", halftime: bool) -> bool:
+        return bool(self._next(eng.decision_minute, "more", False))
+
+    def change_tactic(self, eng: "CoachMatchEngine") -> dict:
+        return dict(self._next(eng.decision_minute, "tactic", eng.tactic))
+
+    def final(self, eng: "CoachMatchEngine", msg: str):
+        self.show(eng, "FT", msg)
+
+
+class CoachMatchEngine:
+    """
+    Motor del Modo Entrenador: el partido minuto a minuto, sin E/S ni esperas.
+    Lo que se ve y lo que decide el manager pasa por `coach` (TerminalCoach
+    en partida, ScriptedCoach sin pantalla o en repeticiones). El resultado
+    solo depende de la semilla, las entradas fijadas en el log (fuerzas,
+    factor de gol, tactica, perfil) y las decisiones, que se apuntan en
+    `log` junto a los eventos y el marcador: repetir el log da el mismo partido.
+    """
+
+    def __init__(
+        self, home: "Team", away: "Team", seed: int, mgr_slot: int,
+        tactic: dict, speed: CoachSpeed, coach,
+        strengths: Optional[tuple[float, float]] = None,
+        goal_factor: Optional[float] = None,
+    ):
+        self.home = home
+        self.away = away
+        self.rng = random.Random(seed)
+        self.speed = speed
+        self.coach = coach
+        self.tactic = tactic
+
+        self.is_home_mgr = home.slot_id == mgr_slot
+        self.mgr_team = home if self.is_home_mgr else away
+        if strengths is None:
+            strengths = (home.strength(), away.strength())
+        home_base = strengths[0] * 1.05
+        away_base = strengths[1]
+        self.our_base = home_base if self.is_home_mgr else away_base
+        self.opp_base = away_base if self.is_home_mgr else home_base
+        if goal_factor is None:
+            goal_factor = (_competition_goal_factor(home.comp) + _competition_goal_factor(away.comp)) * 0.5
+        self.goal_factor = goal_factor
+
+        self.cur = [0, 0]             # marcador local/visitante
+        self.ball = 2                 # 0..4 (hacia el ataque del manager -> 0)
+        self.subs = 5
+        self.wins = 3
+        self.concuss = True           # un cambio extra por conmocion
+        self.smade: list[str] = []
+        self.halfdone = False
+        self.yellows = [0, 0]
+        self.reds = [0, 0]            # [manager, rival]
+        self.var_rev = [0, 0]
+        self.goals_h = [0, 0]
+        self.subs_h = [0, 0]
+        self.attack_boost = 0
+        self.defend_boost = 0
+        self.press_boost = 0
+        self.calm_boost = 0
+        self.momentum = 0.0           # positivo favorece al manager
+        self.last_narration_minute = 0
+        self.decision_minute = 1
+
+        self.log: dict = {
+            "v": COACH_LOG_VERSION,
+            "seed": seed,
+            "home": home.slot_id,
+            "away": away.slot_id,
+            "mgr_slot": mgr_slot,
+            "speed": speed.name,
+            "strength": [strengths[0], strengths[1]],
+            "goal_factor": goal_factor,
+            "tactic": dict(tactic),
+            "decisions": [],   # [minuto, tipo, valor]
+            "events": [],      # [minuto, codigo, lado]  lado: 1 manager / 0 rival
+            "score": [],       # [minuto, local, visitante] en cada cambio de marcador
+            "added": [],
+            "result": None,
+        }
 
-    def current_half_idx() -> int:
-        return 1 if halfdone[0] else 0
+    # --- log -------------------------------------------------------------
+    def _decide(self, kind: str, value):
+        self.log["decisions"].append([self.decision_minute, kind, value])
+        return value
 
-    def order_status() -> str:
+    def _event(self, minute, code: str, side: int):
+        self.log["events"].append([minute, code, side])
+
+    def _score_changed(self, minute):
+        self.log["score"].append([minute, self.cur[0], self.cur[1]])
+
+    def _show(self, minute, msg: str = "", pause: float = 0.0):
+        self.coach.show(self, minute, msg)
+        if pause > 0:
+            self.coach.wait(pause)
+
+    # --- estado ------------------------------------------------------------
+    def manager_score(self) -> int:
+        return self.cur[0] if self.is_home_mgr else self.cur[1]
+
+    def rival_score(self) -> int:
+        return self.cur[1] if self.is_home_mgr else self.cur[0]
+
+    def manager_leading(self) -> bool:
+        return self.manager_score() > self.rival_score()
+
+    def current_half_idx(self) -> int:
+        return 1 if self.halfdone else 0
+
+    def order_status(self) -> str:
         st = []
-        if attack_boost[0] > 0:
-            st.append(f"Ataque total {attack_boost[0]}'")
-        if defend_boost[0] > 0:
-            st.append(f"Bloque bajo {defend_boost[0]}'")
-        if press_boost[0] > 0:
-            st.append(f"Presion alta {press_boost[0]}'")
-        if calm_boost[0] > 0:
-            st.append(f"Calmar juego {calm_boost[0]}'")
+        if self.attack_boost > 0:
+            st.append(f"Ataque total {self.attack_boost}'")
+        if self.defend_boost > 0:
+            st.append(f"Bloque bajo {self.defend_boost}'")
+        if self.press_boost > 0:
+            st.append(f"Presion alta {self.press_boost}'")
+        if self.calm_boost > 0:
+            st.append(f"Calmar juego {self.calm_boost}'")
         return " | ".join(st) if st else "Sin orden especial"
 
-    def draw(minute, msg: str = ""):
-        status = _c(CYAN, f"Ordenes: {order_status()}  Mom {momentum[0]:+.2f}  Rojas {reds[0]}-{reds[1]}")
-        payload = (msg + "\n  " + status) if msg else status
-        _draw_frame(home, away, is_home_mgr, cur[0], cur[1], minute, ball[0], payload)
-
-    def narration_message(minute: int) -> str:
-        if narration_every_minutes <= 0:
+    def narration_message(self, minute: int) -> str:
+        every = self.speed.narration_every
+        if every <= 0:
             return ""
-        if minute - last_narration_minute[0] < narration_every_minutes:
+        if minute - self.last_narration_minute < every:
             return ""
-        last_narration_minute[0] = minute
-        if ball[0] <= 1:
-            msg = rng.choice(_COMM_ATT_OUR)
-        elif ball[0] >= 3:
-            msg = rng.choice(_COMM_ATT_RIVAL)
+        self.last_narration_minute = minute
+        if self.ball <= 1:
+            msg = self.rng.choice(_COMM_ATT_OUR)
+        elif self.ball >= 3:
+            msg = self.rng.choice(_COMM_ATT_RIVAL)
         else:
-            msg = rng.choice(_COMM_MID)
+            msg = self.rng.choice(_COMM_MID)
         return _c(GRAY, f"NARRADOR: {msg}")
 
-    def decay_orders():
-        for ref in (attack_boost, defend_boost, press_boost, calm_boost):
-            if ref[0] > 0:
-                ref[0] -= 1
+    def decay_orders(self):
+        self.attack_boost = max(0, self.attack_boost - 1)
+        self.defend_boost = max(0, self.defend_boost - 1)
+        self.press_boost = max(0, self.press_boost - 1)
+        self.calm_boost = max(0, self.calm_boost - 1)
 
-    def set_live_order(code: str, minute) -> bool:
+    # --- decisiones ----------------------------------------------------------
+    def set_live_order(self, code: str, minute) -> bool:
         code = code.strip().upper()
         if code == "A":
-            attack_boost[0] = 10
-            defend_boost[0] = 0
-            calm_boost[0] = 0
-            momentum[0] += 0.12
-            draw(minute, _c(BOLD + YELLOW, "ORDEN: Todo al ataque (10')"))
-            _wait(0.9)
+            self.attack_boost = 10
+            self.defend_boost = 0
+            self.calm_boost = 0
+            self.momentum += 0.12
+            self._show(minute, _c(BOLD + YELLOW, "ORDEN: Todo al ataque (10')"), 0.9)
             return True
         if code == "D":
-            defend_boost[0] = 10
-            attack_boost[0] = 0
-            press_boost[0] = 0
-            momentum[0] -= 0.05
-            draw(minute, _c(BOLD + CYAN, "ORDEN: Bloque bajo (10')"))
-            _wait(0.9)
+            self.defend_boost = 10
+            self.attack_boost = 0
+            self.press_boost = 0
+            self.momentum -= 0.05
+            self._show(minute, _c(BOLD + CYAN, "ORDEN: Bloque bajo (10')"), 0.9)
             return True
         if code == "P":
-            press_boost[0] = 8
-            calm_boost[0] = 0
-            momentum[0] += 0.08
-            draw(minute, _c(BOLD + YELLOW, "ORDEN: Presion alta (8')  mas riesgo de amarillas"))
-            _wait(0.9)
+            self.press_boost = 8
+            self.calm_boost = 0
+            self.momentum += 0.08
+            self._show(minute, _c(BOLD + YELLOW, "ORDEN: Presion alta (8')  mas riesgo de amarillas"), 0.9)
             return True
         if code == "C":
-            calm_boost[0] = 8
-            press_boost[0] = 0
-            momentum[0] += 0.03 if manager_leading() else -0.03
-            draw(minute, _c(BOLD + CYAN, "ORDEN: Calmar partido / pausa (8')"))
-            _wait(0.9)
+            self.calm_boost = 8
+            self.press_boost = 0
+            self.momentum += 0.03 if self.manager_leading() else -0.03
+            self._show(minute, _c(BOLD + CYAN, "ORDEN: Calmar partido / pausa (8')"), 0.9)
             return True
         return False
 
-    def sub_window(half_idx: int):
-        while subs[0] > 0:
-            if not _entrenador_substitution(mgr_team_obj, smade):
+    def _substitution(self) -> Optional[tuple[str, str]]:
+        pick = self.coach.substitution(self)
+        self._decide("sub", list(pick) if pick else None)
+        if pick:
+            self.smade.append(pick[0])
+        return pick
+
+    def _another_sub(self, halftime: bool) -> bool:
+        return self._decide("more", bool(self.coach.another_sub(self, halftime)))
+
+    def _change_tactic(self):
+        self.tactic = self.coach.change_tactic(self)
+        self._decide("tactic", dict(self.tactic))
+
+    def sub_window(self, half_idx: int):
+        while self.subs > 0:
+            if not self._substitution():
                 break
-            subs[0] -= 1
-            subs_h[half_idx] += 1
-            momentum[0] += 0.06
-            if subs[0] == 0:
+            self.subs -= 1
+            self.subs_h[half_idx] += 1
+            self.momentum += 0.06
+            if self.subs == 0:
                 break
-            nx = _coach_input(_c(CYAN, f"  Otro cambio? ({subs[0]} restantes) [S=Si / Intro=No]: ")).upper()
-            if nx != "S":
+            if not self._another_sub(halftime=False):
                 break
-        wins[0] -= 1
+        self.wins -= 1
 
-    def offer_stop(minute, msg: str):
-        draw(minute, msg)
-        print()
-        if wins[0] > 0 and subs[0] > 0:
-            print(_c(CYAN, f"  W. Ventana de cambios ({wins[0]} ventanas  {subs[0]} cambios)"))
-        print(_c(CYAN, "  A. Todo al ataque (10')"))
-        print(_c(CYAN, "  D. Bloque bajo (10')"))
-        print(_c(CYAN, "  P. Presion alta (8', mas tarjetas)"))
-        print(_c(CYAN, "  C. Calmar partido (8')"))
-        print(_c(CYAN, "  T. Cambiar tactica completa"))
-        print(_c(CYAN, "  0. Continuar"))
-        ch = _coach_input("  > ").upper()
+    def offer_stop(self, minute, msg: str):
+        self.decision_minute = minute
+        ch = self._decide("stop", self.coach.stop_choice(self, minute, msg).upper())
 
-        half_idx = current_half_idx()
-        if ch == "W" and wins[0] > 0 and subs[0] > 0:
-            sub_window(half_idx)
+        half_idx = self.current_half_idx()
+        if ch == "W" and self.wins > 0 and self.subs > 0:
+            self.sub_window(half_idx)
         elif ch == "T":
-            _tactic_menu(data)
-            tactic_ref[0] = data.get("tactic", tactic_ref[0])
+            self._change_tactic()
         else:
-            set_live_order(ch, minute)
+            self.set_live_order(ch, minute)
+
+    def halftime(self):
+        self.decision_minute = "HT"
+        first = True
+        while True:
+            ch = self._decide("ht", self.coach.halftime_choice(self, first).upper())
+            first = False
+            if ch in ("", "0"):
+                break
+            if ch == "T":
+                self._change_tactic()
+                continue
+            if ch == "S" and self.subs > 0:
+                while self.subs > 0:
+                    if not self._substitution():
+                        break
+                    self.subs -= 1
+                    self.subs_h[1] += 1
+                    if self.subs == 0:
+                        break
+                    if not self._another_sub(halftime=True):
+                        break
+                continue
+            self.set_live_order(ch, "HT")
 
-    def register_goal(scored_by_manager: bool, minute, source: str):
-        half_idx = current_half_idx()
+    # --- eventos -------------------------------------------------------------
+    def register_goal(self, scored_by_manager: bool, minute, source: str):
+        half_idx = self.current_half_idx()
+        mgr_idx = 0 if self.is_home_mgr else 1
+        side_idx = mgr_idx if scored_by_manager else 1 - mgr_idx
 
+        self.cur[side_idx] += 1
         if scored_by_manager:
-            if is_home_mgr:
-                cur[0] += 1
-            else:
-                cur[1] += 1
             gc = GREEN
-            tname = mgr_team_obj.name
-            momentum[0] += 0.75
+            tname = self.mgr_team.name
+            self.momentum += 0.75
         else:
-            if is_home_mgr:
-                cur[1] += 1
-            else:
-                cur[0] += 1
             gc = RED
-            tname = away.name if is_home_mgr else home.name
-            momentum[0] -= 0.75
-
-        goals_h[half_idx] += 1
-        draw(minute, _c(gc + BOLD, f"GOOOL {tname} ({source})  ->  {cur[0]}-{cur[1]}"))
-        _wait(1.3)
-
-        # VAR review
-        if rng.random() < 0.15:
-            var_rev[half_idx] += 1
-            draw(minute, _c(BOLD + CYAN, "VAR revisando la accion..."))
-            _wait(1.0)
-            if rng.random() < 0.32:
+            tname = self.away.name if self.is_home_mgr else self.home.name
+            self.momentum -= 0.75
+        self._event(minute, "G", int(scored_by_manager))
+        self._score_changed(minute)
+
+        self.goals_h[half_idx] += 1
+        self._show(minute, _c(gc + BOLD, f"GOOOL {tname} ({source})  ->  {self.cur[0]}-{self.cur[1]}"), 1.3)
+
+        # Revision VAR
+        if self.rng.random() < 0.15:
+            self.var_rev[half_idx] += 1
+            self._show(minute, _c(BOLD + CYAN, "VAR revisando la accion..."), 1.0)
+            if self.rng.random() < 0.32:
+                self.cur[side_idx] -= 1
                 if scored_by_manager:
-                    if is_home_mgr:
-                        cur[0] -= 1
-                    else:
-                        cur[1] -= 1
-                    momentum[0] -= 0.35
+                    self.momentum -= 0.35
                     dc = RED
                 else:
-                    if is_home_mgr:
-                        cur[1] -= 1
-                    else:
-                        cur[0] -= 1
-                    momentum[0] += 0.35
+                    self.momentum += 0.35
                     dc = GREEN
-                goals_h[half_idx] -= 1
-                draw(minute, _c(dc + BOLD, "GOL ANULADO por VAR"))
-                ball[0] = 2
-                _wait(1.1)
+                self.goals_h[half_idx] -= 1
+                self._event(minute, "VAR", int(scored_by_manager))
+                self._score_changed(minute)
+                self._show(minute, _c(dc + BOLD, "GOL ANULADO por VAR"))
+                self.ball = 2
+                self.coach.wait(1.1)
                 return
-            draw(minute, _c(GREEN + BOLD, "GOL confirmado por VAR"))
-            _wait(0.9)
+            self._show(minute, _c(GREEN + BOLD, "GOL confirmado por VAR"), 0.9)
 
-        offer_stop(minute, _c(gc + BOLD, f"Tras el gol de {tname}: decide rapido."))
-        ball[0] = 2
+        self.offer_stop(minute, _c(gc + BOLD, f"Tras el gol de {tname}: decide rapido."))
+        self.ball = 2
 
-    def maybe_card(minute):
-        half_idx = current_half_idx()
-        faltas = int(tactic_ref[0].get("faltas", 2))
-        p_card = (0.008 + (0.004 if faltas == 3 else 0.0) + (0.004 if press_boost[0] > 0 else 0.0)) * event_boost
+    def maybe_card(self, minute):
+        rng = self.rng
+        half_idx = self.current_half_idx()
+        faltas = int(self.tactic.get("faltas", 2))
+        p_card = (0.008 + (0.004 if faltas == 3 else 0.0) + (0.004 if self.press_boost > 0 else 0.0)) * self.speed.event_boost
         if rng.random() >= p_card:
             return
 
         manager_team_card = rng.random() < (0.52 + (0.10 if faltas == 3 else 0.0))
         if manager_team_card:
-            yellows[half_idx] += 1
-            draw(minute, _c(YELLOW, f"Amarilla para {mgr_team_obj.name} ({minute}')"))
-            _wait(0.6)
+            self.yellows[half_idx] += 1
+            self._event(minute, "Y", 1)
+            self._show(minute, _c(YELLOW, f"Amarilla para {self.mgr_team.name} ({minute}')"), 0.6)
 
-            p_red = 0.06 + (0.08 if faltas == 3 else 0.0) + (0.05 if press_boost[0] > 0 else 0.0)
+            p_red = 0.06 + (0.08 if faltas == 3 else 0.0) + (0.05 if self.press_boost > 0 else 0.0)
             if rng.random() < p_red:
-                reds[0] += 1
-                momentum[0] -= 0.45
-                draw(minute, _c(RED + BOLD, f"ROJA para {mgr_team_obj.name}. Te quedas con {11 - reds[0]}."))
-                _wait(0.9)
-                offer_stop(minute, _c(RED + BOLD, "Con 10 (o menos): ajusta el plan."))
+                self.reds[0] += 1
+                self.momentum -= 0.45
+                self._event(minute, "R", 1)
+                self._show(minute, _c(RED + BOLD, f"ROJA para {self.mgr_team.name}. Te quedas con {11 - self.reds[0]}."), 0.9)
+                self.offer_stop(minute, _c(RED + BOLD, "Con 10 (o menos): ajusta el plan."))
         else:
-            yellows[half_idx] += 1
-            rival_name = away.name if is_home_mgr else home.name
-            draw(minute, _c(GRAY, f"Amarilla para {rival_name} ({minute}')"))
-            _wait(0.5)
+            self.yellows[half_idx] += 1
+            rival_name = self.away.name if self.is_home_mgr else self.home.name
+            self._event(minute, "Y", 0)
+            self._show(minute, _c(GRAY, f"Amarilla para {rival_name} ({minute}')"), 0.5)
             if rng.random() < 0.07:
-                reds[1] += 1
-                momentum[0] += 0.35
-                draw(minute, _c(GREEN + BOLD, f"ROJA para {rival_name}. Juegan con {11 - reds[1]}."))
-                _wait(0.9)
-                offer_stop(minute, _c(GREEN + BOLD, "Rival con uno menos: quieres apretar o pausar?"))
-
-    def maybe_injury(minute):
-        half_idx = current_half_idx()
-        p_injury = (0.0025 + (0.0015 if press_boost[0] > 0 else 0.0)) * (1.20 if is_human_mode else 1.0)
-        if rng.random() >= p_injury:
+                self.reds[1] += 1
+                self.momentum += 0.35
+                self._event(minute, "R", 0)
+                self._show(minute, _c(GREEN + BOLD, f"ROJA para {rival_name}. Juegan con {11 - self.reds[1]}."), 0.9)
+                self.offer_stop(minute, _c(GREEN + BOLD, "Rival con uno menos: quieres apretar o pausar?"))
+
+    def maybe_injury(self, minute):
+        half_idx = self.current_half_idx()
+        p_injury = (0.0025 + (0.0015 if self.press_boost > 0 else 0.0)) * (1.20 if self.speed.is_human else 1.0)
+        if self.rng.random() >= p_injury:
             return
 
-        manager_side = rng.random() < 0.5
-        if manager_side and concuss[0]:
-            draw(minute, _c(RED + BOLD, "Golpe en la cabeza en tu equipo. Tienes cambio extra."))
-            if _entrenador_substitution(mgr_team_obj, smade):
-                concuss[0] = False
-                subs_h[half_idx] += 1
-                momentum[0] -= 0.10
+        manager_side = self.rng.random() < 0.5
+        self._event(minute, "I", int(manager_side))
+        if manager_side and self.concuss:
+            self._show(minute, _c(RED + BOLD, "Golpe en la cabeza en tu equipo. Tienes cambio extra."))
+            self.decision_minute = minute
+            if self._substitution():
+                self.concuss = False
+                self.subs_h[half_idx] += 1
+                self.momentum -= 0.10
         elif manager_side:
-            draw(minute, _c(GRAY, "Golpe leve en tu equipo. Siguen todos."))
-            momentum[0] -= 0.08
+            self._show(minute, _c(GRAY, "Golpe leve en tu equipo. Siguen todos."))
+            self.momentum -= 0.08
         else:
-            draw(minute, _c(GRAY, "Golpe leve en el rival. El juego sigue."))
-            momentum[0] += 0.05
-        _wait(0.7)
-
-    def maybe_time_wasting(minute):
-        manager_waste_on = int(tactic_ref[0].get("perdidaTiempo", 0)) == 1
-        if manager_waste_on and manager_leading():
-            p_manager = 0.045 if is_human_mode else 0.020
+            self._show(minute, _c(GRAY, "Golpe leve en el rival. El juego sigue."))
+            self.momentum += 0.05
+        self.coach.wait(0.7)
+
+    def maybe_time_wasting(self, minute):
+        human = self.speed.is_human
+        manager_waste_on = int(self.tactic.get("perdidaTiempo", 0)) == 1
+        if manager_waste_on and self.manager_leading():
+            p_manager = 0.045 if human else 0.020
             if minute < 60:
                 p_manager *= 0.60
-            if rng.random() < p_manager:
-                draw(minute, _c(CYAN, "Pierdes tiempo: saques lentos y pausas en banda."))
-                momentum[0] += 0.03
-                _wait(0.25 if is_human_mode else 0.10)
+            if self.rng.random() < p_manager:
+                self._show(minute, _c(CYAN, "Pierdes tiempo: saques lentos y pausas en banda."))
+                self.momentum += 0.03
+                self.coach.wait(0.25 if human else 0.10)
                 return
 
-        if manager_score() < rival_score() and minute >= 70:
-            p_rival = 0.040 if is_human_mode else 0.018
-            if rng.random() < p_rival:
-                draw(minute, _c(GRAY, "El rival retrasa la reanudacion y enfria el partido."))
-                momentum[0] -= 0.04
-                _wait(0.25 if is_human_mode else 0.10)
+        if self.manager_score() < self.rival_score() and minute >= 70:
+            p_rival = 0.040 if human else 0.018
+            if self.rng.random() < p_rival:
+                self._show(minute, _c(GRAY, "El rival retrasa la reanudacion y enfria el partido."))
+                self.momentum -= 0.04
+                self.coach.wait(0.25 if human else 0.10)
 
-    def minute_strengths() -> tuple[float, float, float]:
-        our_adj = _tactic_adj(tactic_ref[0], is_home=False)
+    def minute_strengths(self) -> tuple[float, float, float]:
+        our_adj = _tactic_adj(self.tactic, is_home=False)
 
         tempo = 1.0
-        if calm_boost[0] > 0:
+        if self.calm_boost > 0:
             tempo *= 0.82
-        if press_boost[0] > 0:
+        if self.press_boost > 0:
             tempo *= 1.18
-        if int(tactic_ref[0].get("perdidaTiempo", 0)) == 1 and manager_leading():
+        if int(self.tactic.get("perdidaTiempo", 0)) == 1 and self.manager_leading():
             tempo *= 0.78
 
-        our_live = our_base + our_adj + momentum[0] * 1.0
-        opp_live = opp_base - momentum[0] * 0.75
+        our_live = self.our_base + our_adj + self.momentum * 1.0
+        opp_live = self.opp_base - self.momentum * 0.75
 
-        if attack_boost[0] > 0:
+        if self.attack_boost > 0:
             our_live += 1.7
             opp_live += 0.9
-        if defend_boost[0] > 0:
+        if self.defend_boost > 0:
             our_live -= 0.6
             opp_live -= 0.8
-        if press_boost[0] > 0:
+        if self.press_boost > 0:
             our_live += 0.8
             opp_live -= 0.4
 
-        our_live *= max(0.62, 1.0 - reds[0] * 0.10)
-        opp_live *= max(0.62, 1.0 - reds[1] * 0.10)
+        our_live *= max(0.62, 1.0 - self.reds[0] * 0.10)
+        opp_live *= max(0.62, 1.0 - self.reds[1] * 0.10)
 
         return max(10.0, our_live), max(10.0, opp_live), tempo
 
-    def maybe_chance(minute):
-        our_live, opp_live, tempo = minute_strengths()
-        ball[0] = _ball_drift(ball[0], rng, our_live, opp_live)
+    def maybe_chance(self, minute):
+        rng = self.rng
+        our_live, opp_live, tempo = self.minute_strengths()
+        self.ball = _ball_drift(self.ball, rng, our_live, opp_live)
+        event_boost = self.speed.event_boost
+        gf = self.goal_factor
 
-        zone_our = [1.90, 1.40, 1.00, 0.64, 0.35][ball[0]]
-        zone_opp = [0.35, 0.64, 1.00, 1.40, 1.90][ball[0]]
+        zone_our = [1.90, 1.40, 1.00, 0.64, 0.35][self.ball]
+        zone_opp = [0.35, 0.64, 1.00, 1.40, 1.90][self.ball]
         ratio = our_live / max(our_live + opp_live, 0.01)
 
-        p_our = min(0.42, 0.020 * zone_our * (0.85 + ratio * 0.9) * tempo * event_boost * comp_goal_factor)
-        p_opp = min(0.42, 0.020 * zone_opp * (0.85 + (1.0 - ratio) * 0.9) * tempo * event_boost * comp_goal_factor)
+        p_our = min(0.42, 0.020 * zone_our * (0.85 + ratio * 0.9) * tempo * event_boost * gf)
+        p_opp = min(0.42, 0.020 * zone_opp * (0.85 + (1.0 - ratio) * 0.9) * tempo * event_boost * gf)
 
         r = rng.random()
         if r < p_our:
             conv = 0.18 + (our_live - opp_live) / 220.0
-            if attack_boost[0] > 0:
+            if self.attack_boost > 0:
                 conv += 0.05
-            if defend_boost[0] > 0:
+            if self.defend_boost > 0:
                 conv -= 0.03
-            if calm_boost[0] > 0:
+            if self.calm_boost > 0:
                 conv -= 0.02
-            conv *= comp_goal_factor
-            conv = clamp(conv, 0.07, 0.62)
+            conv *= gf
+            conv = max(0.07, min(0.62, conv))
 
             if rng.random() < conv:
-                register_goal(True, minute, "jugada")
+                self.register_goal(True, minute, "jugada")
             else:
                 msg = rng.choice(_COMM_ATT_OUR)
-                draw(minute, _c(YELLOW, f"Ocasion tuya: {msg}"))
-                _wait(0.35)
+                self._show(minute, _c(YELLOW, f"Ocasion tuya: {msg}"), 0.35)
             return
 
         if r < p_our + p_opp:
             conv = 0.18 + (opp_live - our_live) / 220.0
-            if defend_boost[0] > 0:
+            if self.defend_boost > 0:
                 conv -= 0.04
-            if attack_boost[0] > 0:
+            if self.attack_boost > 0:
                 conv += 0.04
-            conv *= comp_goal_factor
-            conv = clamp(conv, 0.07, 0.60)
+            conv *= gf
+            conv = max(0.07, min(0.60, conv))
 
             if rng.random() < conv:
-                register_goal(False, minute, "contra rival")
+                self.register_goal(False, minute, "contra rival")
             else:
-                draw(minute, _c(GRAY, f"Rival avisa: {rng.choice(_COMM_ATT_RIVAL)}"))
-                _wait(0.30)
+                self._show(minute, _c(GRAY, f"Rival avisa: {rng.choice(_COMM_ATT_RIVAL)}"), 0.30)
             return
 
         # Sin ocasion clara, pero mantenemos continuidad narrativa del partido.
-        p_live = micro_event_base if ball[0] != 2 else micro_event_base * 0.55
+        base = self.speed.micro_event_base
+        p_live = base if self.ball != 2 else base * 0.55
         if rng.random() < p_live:
-            if ball[0] <= 1:
-                draw(minute, _c(YELLOW, rng.choice(_COMM_ATT_OUR)))
-            elif ball[0] >= 3:
-                draw(minute, _c(GRAY, rng.choice(_COMM_ATT_RIVAL)))
+            if self.ball <= 1:
+                msg = _c(YELLOW, rng.choice(_COMM_ATT_OUR))
+            elif self.ball >= 3:
+                msg = _c(GRAY, rng.choice(_COMM_ATT_RIVAL))
             else:
-                draw(minute, _c(GRAY, rng.choice(_COMM_MID)))
-            _wait(0.25 if is_human_mode else 0.10)
-
-    # Kickoff
-    draw(1, _c(GRAY, f"[Intro] para comenzar... ({speed_mode})"))
-    _coach_input("")
-
-    # 1st half
-    for minute in range(1, 46):
-        maybe_chance(minute)
-        maybe_card(minute)
-        maybe_injury(minute)
-        maybe_time_wasting(minute)
-
-        if minute in (25, 30, 40):
-            offer_stop(minute, _c(CYAN, "Parada tactica de banquillo."))
-        narr = narration_message(minute)
-        draw(minute, narr if narr else "")
-        _wait(TICK)
-
-        decay_orders()
-        momentum[0] *= 0.92
-
-    # Added time 1st half
-    at1 = max(1, min(6, 1 + yellows[0] + var_rev[0] * 2 + goals_h[0] + reds[0] + reds[1] + rng.randint(0, 1)))
-    draw(f"45+{at1}", _c(BOLD + YELLOW, f"Tiempo anadido: +{at1}"))
-    _wait(1.0)
-    for a in range(1, at1 + 1):
-        draw(f"45+{a}")
-        _wait(TICK * 0.6)
-
-    # Halftime
-    halfdone[0] = True
-    draw("HT", _c(BOLD + YELLOW, "DESCANSO"))
-    print()
-    while True:
-        print(_c(CYAN, "  T. Cambiar tactica"))
-        if subs[0] > 0:
-            print(_c(CYAN, f"  S. Sustitucion ({subs[0]} cambios, ventana gratis de descanso)"))
-        print(_c(CYAN, "  A. Todo al ataque (10')"))
-        print(_c(CYAN, "  D. Bloque bajo (10')"))
-        print(_c(CYAN, "  P. Presion alta (8')"))
-        print(_c(CYAN, "  C. Calmar partido (8')"))
-        print(_c(CYAN, "  0. Empezar 2a parte"))
-        ch = _coach_input("  Opcion: ").upper()
-        if ch in ("", "0"):
-            break
-        if ch == "T":
-            _tactic_menu(data)
-            tactic_ref[0] = data.get("tactic", tactic_ref[0])
-            continue
-        if ch == "S" and subs[0] > 0:
-            while subs[0] > 0:
-                if not _entrenador_substitution(mgr_team_obj, smade):
-                    break
-                subs[0] -= 1
-                subs_h[1] += 1
-                if subs[0] == 0:
-                    break
-                nx = _coach_input(_c(CYAN, f"  Otro cambio? ({subs[0]} restantes) [S/N]: ")).upper()
-                if nx != "S":
-                    break
-            continue
-        set_live_order(ch, "HT")
-
-    ball[0] = 2
-
-    # 2nd half
-    for minute in range(46, 91):
-        maybe_chance(minute)
-        maybe_card(minute)
-        maybe_injury(minute)
-        maybe_time_wasting(minute)
-
-        if minute in (55, 60, 70, 80) and wins[0] > 0 and subs[0] > 0:
-            offer_stop(minute, _c(CYAN, f"min {minute}: ventana de decisiones"))
-        elif minute in (75, 85):
-            offer_stop(minute, _c(CYAN, f"min {minute}: tramo clave, decide."))
-        narr = narration_message(minute)
-        draw(minute, narr if narr else "")
-        _wait(TICK)
-
-        decay_orders()
-        momentum[0] *= 0.92
-
-    # Added time 2nd half
-    at2 = max(2, min(10,
-           2 + yellows[1] + var_rev[1] * 2 + goals_h[1]
-           + int(subs_h[1] * 0.5)
-           + reds[0] + reds[1]
-           + (2 if int(tactic_ref[0].get("perdidaTiempo", 0)) == 1 else 0)
-           + rng.randint(0, 2)))
-    draw(90, _c(BOLD + YELLOW, f"Tiempo anadido: +{at2}"))
-    _wait(1.1)
-    for a in range(1, at2 + 1):
-        draw(f"90+{a}")
-        _wait(TICK * 0.5)
-
-    fhg, fag = cur[0], cur[1]
-    won = (is_home_mgr and fhg > fag) or (not is_home_mgr and fag > fhg)
-    lost = (is_home_mgr and fhg < fag) or (not is_home_mgr and fag < fhg)
-    rc = GREEN if won else (RED if lost else CYAN)
-    res = "VICTORIA" if won else ("DERROTA" if lost else "EMPATE")
-    draw("FT", _c(rc + BOLD, f"PITIDO FINAL  {res}  {fhg}-{fag}"))
-    _coach_input(_c(GRAY, "  [Intro] para continuar..."))
-    return fhg, fag
+                msg = _c(GRAY, rng.choice(_COMM_MID))
+            self._show(minute, msg, 0.25 if self.speed.is_human else 0.10)
+
+    def _play_minute(self, minute: int, stops: tuple = (), windows: tuple = ()):
+        self.maybe_chance(minute)
+        self.maybe_card(minute)
+        self.maybe_injury(minute)
+        self.maybe_time_wasting(minute)
+
+        if minute in windows and self.wins > 0 and self.subs > 0:
+            self.offer_stop(minute, _c(CYAN, f"min {minute}: ventana de decisiones"))
+        elif minute in stops:
+            if self.halfdone:
+                self.offer_stop(minute, _c(CYAN, f"min {minute}: tramo clave, decide."))
+            else:
+                self.offer_stop(minute, _c(CYAN, "Parada tactica de banquillo."))
+        narr = self.narration_message(minute)
+        self._show(minute, narr if narr else "", self.speed.tick)
+
+        self.decay_orders()
+        self.momentum *= 0.92
+
+    # --- partido -------------------------------------------------------------
+    def run(self) -> tuple[int, int]:
+        tick = self.speed.tick
+        self.coach.kickoff(self)
+
+        for minute in range(1, 46):
+            self._play_minute(minute, stops=(25, 30, 40))
+
+        at1 = max(1, min(6, 1 + self.yellows[0] + self.var_rev[0] * 2 + self.goals_h[0]
+                         + self.reds[0] + self.reds[1] + self.rng.randint(0, 1)))
+        self.log["added"].append(at1)
+        self._show(f"45+{at1}", _c(BOLD + YELLOW, f"Tiempo anadido: +{at1}"), 1.0)
+        for a in range(1, at1 + 1):
+            self._show(f"45+{a}", "", tick * 0.6)
+
+        self.halfdone = True
+        self._show("HT", _c(BOLD + YELLOW, "DESCANSO"))
+        self.halftime()
+        self.ball = 2
+
+        for minute in range(46, 91):
+            self._play_minute(minute, stops=(75, 85), windows=(55, 60, 70, 80))
+
+        at2 = max(2, min(10,
+                  2 + self.yellows[1] + self.var_rev[1] * 2 + self.goals_h[1]
+                  + int(self.subs_h[1] * 0.5)
+                  + self.reds[0] + self.reds[1]
+                  + (2 if int(self.tactic.get("perdidaTiempo", 0)) == 1 else 0)
+                  + self.rng.randint(0, 2)))
+        self.log["added"].append(at2)
+        self._show(90, _c(BOLD + YELLOW, f"Tiempo anadido: +{at2}"), 1.1)
+        for a in range(1, at2 + 1):
+            self._show(f"90+{a}", "", tick * 0.5)
+
+        fhg, fag = self.cur[0], self.cur[1]
+        self.log["result"] = [fhg, fag]
+        won = (self.is_home_mgr and fhg > fag) or (not self.is_home_mgr and fag > fhg)
+        lost = (self.is_home_mgr and fhg < fag) or (not self.is_home_mgr and fag < fhg)
+        rc = GREEN if won else (RED if lost else CYAN)
+        res = "VICTORIA" if won else ("DERROTA" if lost else "EMPATE")
+        self.coach.final(self, _c(rc + BOLD, f"PITIDO FINAL  {res}  {fhg}-{fag}"))
+        return fhg, fag
+
+
+def simulate_coach_match(
+    home: "Team", away: "Team", seed: int, mgr_slot: int,
+    tactic: Optional[dict] = None, decisions=(), speed: str = "FAST",
+) -> tuple[tuple[int, int], dict]:
+    """Modo Entrenador sin pantalla ni esperas: ((goles local, visitante), log)."""
+    engine = CoachMatchEngine(
+        home, away, seed, mgr_slot, dict(tactic or DEFAULT_TACTIC), COACH_SPEEDS[speed], ScriptedCoach(decisions),
+    )
+    return engine.run(), engine.log
+
 
+def replay_coach_match(home: "Team", away: "Team", log: dict, animate: bool = False) -> tuple[int, int]:
+    """
+    Vuelve a jugar un partido desde su log (con animacion si `animate`).
+    Las fuerzas, el factor de gol y la tactica salen del log, asi que el
+    resultado no cambia aunque la plantilla haya cambiado despues.
+    """
+    if log.get("v") != COACH_LOG_VERSION:
+        raise ValueError("log de partido de otra version")
+    speed = COACH_SPEEDS[log["speed"]]
+    view = TerminalCoach({}, speed, animate=True) if animate else None
+    engine = CoachMatchEngine(
+        home, away, log["seed"], log["mgr_slot"], dict(log["tactic"]), speed,
+        ScriptedCoach(log["decisions"], view),
+        strengths=tuple(log["strength"]), goal_factor=log["goal_factor"],
+    )
+    result = engine.run()
+    for key in ("decisions", "events", "score", "added", "result"):
+        if engine.log[key] != log[key]:
+            raise ValueError(f"la repeticion no coincide con el log ({key})")
+    return result
+
+
+def _match_entrenador(
+    home: "Team", away: "Team", seed: int,
+    mgr_slot: int, data: dict,
+) -> tuple:
+    """
+    Modo entrenador avanzado.
+    El partido se genera minuto a minuto y las decisiones en vivo del manager
+    modifican ritmo, ocasiones, conversion y riesgo disciplinario.
+    El log del partido queda en data["coach_last_match"] para repetirlo.
+    """
+    speed, animate = _coach_speed_from_env()
+    engine = CoachMatchEngine(
+        home, away, seed, mgr_slot, data.get("tactic", dict(DEFAULT_TACTIC)), speed,
+        TerminalCoach(data, speed, animate),
+    )
+    result = engine.run()
+    data["coach_last_match"] = engine.log
+    return result
 
 
 # ---- Transfer market -------------------------------------------------------
@@ -3656,9 +5713,13 @@ def _is_window_open(matchday: int, total_md: int) -> bool:
 
 
 def _apply_squad_changes(mgr_team: Team, all_slots: dict[int, Team], data: dict):
-    """Aplica fichajes/ventas persistidos al objeto Team en memoria."""
+    """
+    Aplica fichajes/ventas persistidos al objeto Team en memoria. Con el
+    snapshot hidratado ya vienen aplicados; esto cubre partidas antiguas.
+    """
     sold = set(data.get("sold", []))
-    mgr_team.players = [p for p in mgr_team.players if p.name not in sold]
+    for player in [p for p in mgr_team.players if p.name in sold]:
+        _release_player(player, mgr_team)
     existing = {p.name for p in mgr_team.players}
     for b in data.get("bought", []):
         if b["player_name"] in existing:
@@ -3668,8 +5729,7 @@ def _apply_squad_changes(mgr_team: Team, all_slots: dict[int, Team], data: dict)
             continue
         player = next((p for p in src.players if p.name == b["player_name"]), None)
         if player:
-            src.players  = [p for p in src.players if p.name != player.name]
-            mgr_team.players.append(player)
+            _move_player(player, src, mgr_team)
             existing.add(player.name)
 
 
@@ -3678,31 +5738,17 @@ def _market_buy(data: dict, mgr_team: Team, all_slots: dict[int, Team],
     budget    = data.get("budget", 0)
     _ensure_president_profile(data, mgr_team)
     mgr_names = {p.name for p in mgr_team.players}
-
-    avail: list[tuple[Team, Player]] = [
-        (t, p)
-        for t in liga1 + liga2
-        if t.slot_id != mgr_team.slot_id
-        for p in t.players
-        if p.name not in mgr_names
-    ]
+    index     = _market_index(all_slots)
 
     print(_c(CYAN, "\n  Filtrar por posicin: 1.Todos  2.Porteros  3.Defensas  4.Medios  5.Delanteros"))
     pf = input_int("  Filtro (1-5): ", 1, 5)
-    filters = {
-        2: lambda p: p.is_goalkeeper,
-        3: lambda p: "Back" in p.position,
-        4: lambda p: "Midfield" in p.position,
-        5: lambda p: "Forward" in p.position or "Winger" in p.position or "Attacker" in p.position,
-    }
-    if pf in filters:
-        avail = [(t, p) for t, p in avail if filters[pf](p)]
+    group = {2: "GK", 3: "DEF", 4: "MID", 5: "FWD"}.get(pf)
+    max_age = input_int("  Edad maxima (0=sin limite): ", 0, 45) or None
 
-    affordable = sorted([(t, p) for t, p in avail if p.market_value <= budget],
-                        key=lambda x: x[1].overall, reverse=True)
-    pricey     = sorted([(t, p) for t, p in avail if p.market_value > budget],
-                        key=lambda x: x[1].overall, reverse=True)
-    candidates = affordable[:15] + pricey[:5]
+    common = dict(group=group, max_age=max_age, exclude_slot=mgr_team.slot_id, exclude_names=mgr_names)
+    affordable = index.query(max_value=budget, limit=15, **common)
+    pricey     = index.query(min_value=budget, limit=5, **common)
+    candidates = affordable + pricey
 
     if not candidates:
         print(_c(GRAY, "  No hay jugadores disponibles.\n"))
@@ -3740,8 +5786,7 @@ def _market_buy(data: dict, mgr_team: Team, all_slots: dict[int, Team],
         return
     data["budget"] = budget - fee
     data.setdefault("bought", []).append({"player_name": player.name, "from_slot": src_team.slot_id, "paid": fee})
-    src_team.players  = [p for p in src_team.players if p.name != player.name]
-    mgr_team.players.append(player)
+    _move_player(player, src_team, mgr_team)
     _save_career(data)
     print(_c(GREEN, f"   {player.name} fichado. Presupuesto restante: {data['budget']:,.0f}\n"))
 
@@ -3769,7 +5814,7 @@ def _market_sell(data: dict, mgr_team: Team):
         return
     data["budget"] = data.get("budget", 0) + sale
     data.setdefault("sold", []).append(player.name)
-    mgr_team.players = [p for p in mgr_team.players if p.name != player.name]
+    _release_player(player, mgr_team)
     _save_career(data)
     print(_c(GREEN, f"   {player.name} vendido. Presupuesto: {data['budget']:,.0f}\n"))
 
@@ -3881,12 +5926,150 @@ def _winter_market_menu(data: dict, mgr_team: Team, comp_teams: list[Team], md:
         "from_slot": src_team.slot_id,
         "paid": fee,
     })
-    src_team.players = [p for p in src_team.players if p.name != player.name]
-    mgr_team.players.append(player)
+    _move_player(player, src_team, mgr_team)
     _save_career(data)
     print(_c(GREEN, f"   {player.name} fichado por {fee:,.0f}. Presupuesto: {data['budget']:,.0f}\n"))
 
 
+# ---- Mercado IA (resto de clubes) ----
+
+_AI_SQUAD_TARGET = {"GK": 3, "DEF": 8, "MID": 8, "FWD": 6}
+_AI_STARTERS = {"GK": 1, "DEF": 4, "MID": 4, "FWD": 2}
+_AI_MAX_SQUAD = 32
+
+
+def _ai_winter_md(tot_md: int) -> int:
+    return 21 if tot_md >= 42 else max(1, tot_md // 2)
+
+
+def _ai_market_state(data: dict) -> dict:
+    state = data.get("ai_market")
+    if not isinstance(state, dict) or state.get("season") != data.get("season"):
+        state = {"season": data.get("season"), "windows": [], "moves": []}
+        data["ai_market"] = state
+    return state
+
+
+def _run_ai_transfer_window(data: dict, all_slots: dict[int, Team], window: str,
+                            md: int, news: Optional[list] = None) -> list[dict]:
+    """
+    Cierre de ventana para todos los clubes salvo el del manager: cada club
+    detecta sus carencias por demarcacion y ficha del indice de mercado segun
+    presupuesto. Determinista por season_seed; los traspasos pasan por el
+    ledger (snapshot) y quedan registrados en data["ai_market"].
+    """
+    state = _ai_market_state(data)
+    if window in state["windows"]:
+        return []
+    state["windows"].append(window)
+
+    summer = window == "SUMMER"
+    mgr_slot = data.get("team_slot")
+    rng = random.Random(int(data.get("season_seed", 0)) ^ (0x5A1E if summer else 0x1A7E))
+    index = _market_index(all_slots)
+
+    # Valoracion por lotes: una pasada por plantilla deja ME por grupo y nivel
+    depth: dict[int, dict[str, list[int]]] = {}
+    level: dict[int, int] = {}
+    budgets: dict[int, int] = {}
+    for slot, team in all_slots.items():
+        if slot == mgr_slot or not team.players:
+            continue
+        by_group: dict[str, list[int]] = {g: [] for g in MARKET_GROUPS}
+        squad_value = 0
+        for player in team.players:
+            by_group[_position_group(player.position)].append(-player.me)
+            squad_value += player.market_value
+        starters: list[int] = []
+        for g, mes in by_group.items():
+            mes.sort()
+            starters.extend(-me for me in mes[:_AI_STARTERS[g]])
+        depth[slot] = by_group
+        level[slot] = sum(starters) // max(1, len(starters))
+        budgets[slot] = int(squad_value * (0.10 if summer else 0.04))
+
+    # Indice de necesidades: (prioridad, slot, grupo)
+    needs: list[tuple[int, int, str]] = []
+    for slot, by_group in depth.items():
+        for g, mes in by_group.items():
+            deficit = max(0, _AI_SQUAD_TARGET[g] - len(mes))
+            starters = mes[:_AI_STARTERS[g]]
+            weakest = -starters[-1] if len(starters) == _AI_STARTERS[g] else 0
+            score = deficit * 6 + max(0, level[slot] - weakest)
+            if score >= 3:
+                needs.append((-score, slot, g))
+    needs.sort()
+
+    buys_left = {slot: (2 if summer else 1) for slot in depth}
+    moved: set[str] = set()
+    moves: list[dict] = []
+    for _, slot, g in needs:
+        if buys_left[slot] <= 0:
+            continue
+        team = all_slots[slot]
+        mes = depth[slot][g]
+        starters = mes[:_AI_STARTERS[g]]
+        short = len(mes) < _AI_SQUAD_TARGET[g] or len(starters) < _AI_STARTERS[g]
+        floor = level[slot] - 8 if short else -starters[-1] + 2
+        options: list[tuple[Team, Player]] = []
+        for seller, player in index.query(group=g, max_value=budgets[slot], exclude_slot=slot,
+                                          min_me=floor, max_me=level[slot] + 6, limit=12):
+            if seller.slot_id == mgr_slot or player.uid in moved or seller.slot_id not in depth:
+                continue
+            seller_mes = depth[seller.slot_id][g]
+            if len(seller_mes) <= _AI_STARTERS[g] + 1:
+                continue
+            is_starter = -player.me <= seller_mes[_AI_STARTERS[g] - 1]
+            if is_starter and level[seller.slot_id] > level[slot]:
+                continue
+            options.append((seller, player))
+            if len(options) == 3:
+                break
+        if not options:
+            continue
+        seller, player = rng.choice(options)
+        fee = int(player.market_value)
+        _move_player(player, seller, team)
+        moved.add(player.uid)
+        buys_left[slot] -= 1
+        budgets[slot] -= fee
+        budgets[seller.slot_id] += fee
+        depth[seller.slot_id][g].remove(-player.me)
+        bisect.insort(mes, -player.me)
+        moves.append({
+            "window": window, "md": md, "kind": "BUY", "uid": player.uid, "player": player.name,
+            "from_slot": seller.slot_id, "to_slot": slot, "fee": fee,
+        })
+
+    # Ventas por exceso de plantilla: sale el peor del grupo mas sobrado
+    for slot in sorted(depth):
+        team = all_slots[slot]
+        while len(team.players) > _AI_MAX_SQUAD:
+            counts = {g: len(depth[slot][g]) - _AI_SQUAD_TARGET[g] for g in MARKET_GROUPS}
+            g = max(MARKET_GROUPS, key=lambda k: counts[k])
+            pool = [p for p in team.players if _position_group(p.position) == g]
+            if not pool:
+                break
+            player = min(pool, key=lambda p: (p.me, -p.age, p.uid))
+            _release_player(player, team)
+            depth[slot][g].remove(-player.me)
+            moves.append({
+                "window": window, "md": md, "kind": "RELEASE", "uid": player.uid, "player": player.name,
+                "from_slot": slot, "to_slot": _FREE_AGENT_SLOT, "fee": 0,
+            })
+
+    state["moves"].extend(moves)
+    if news is not None:
+        label = "verano" if summer else "invierno"
+        top = sorted((m for m in moves if m["kind"] == "BUY"), key=lambda m: -m["fee"])[:3]
+        for m in top:
+            buyer = all_slots[m["to_slot"]].name
+            seller = all_slots[m["from_slot"]].name
+            fee_txt = f"{m['fee']/1e6:.1f}M" if m["fee"] >= 1_000_000 else f"{m['fee']//1000}K"
+            news.append(f"Mercado de {label}: {buyer} ficha a {m['player']} ({seller}) por {fee_txt}.")
+    return moves
+
+
 def _init_copa_state(data: dict, liga1: list[Team], liga2: list[Team]) -> dict:
     top_l1 = sorted(liga1, key=lambda t: t.strength(), reverse=True)[:8]
     top_l2 = sorted(liga2, key=lambda t: t.strength(), reverse=True)[:8]
@@ -4870,11 +7053,13 @@ def _season_loop(data: dict, liga1: list[Team], liga2: list[Team], liga_rfef: li
     tbs       = {t.slot_id: t for t in comp_t}   # teams_by_slot
     all_slots = {t.slot_id: t for t in liga1 + liga2 + liga_rfef + all_foreign}
 
-    # Apply saved squad changes (fichajes/ventas)
+    # Hidratar plantillas desde el snapshot evolucionado y aplicar fichajes/ventas
+    if "players" not in data:
+        data["players"] = _build_players_snapshot(liga1 + liga_rfef + all_foreign, liga2, data.get("season", "2025-26"))
+    _hydrate_rosters(data, all_slots)
     _apply_squad_changes(mgr_team, all_slots, data)
     _ensure_president_profile(data, mgr_team)
     _ensure_market_profile(data, mgr_team)
-    data.setdefault("players", _build_players_snapshot(liga1 + liga_rfef + all_foreign, liga2, data.get("season", "2025-26")))
     if not isinstance(data.get("copa"), dict) or data.get("copa", {}).get("season") != data.get("season"):
         data["copa"] = _init_copa_state(data, liga1, liga2)
         _save_career(data)
@@ -4898,6 +7083,11 @@ def _season_loop(data: dict, liga1: list[Team], liga2: list[Team], liga_rfef: li
     cur_md  = data.get("current_matchday", 1)
 
     while cur_md <= tot_md:
+        # Mercado IA: verano antes de la primera jornada, invierno tras la mitad
+        if _run_ai_transfer_window(data, all_slots, "SUMMER", cur_md, news) or (
+            cur_md > _ai_winter_md(tot_md) and _run_ai_transfer_window(data, all_slots, "WINTER", cur_md, news)
+        ):
+            _save_career(data)
         play_mode = _ensure_manager_play_mode(data)
         standings = _standings_from_results(results, tbs)
         _pm_header(data, cur_md, tot_md, mgr_team)
@@ -4945,13 +7135,17 @@ def _season_loop(data: dict, liga1: list[Team], liga2: list[Team], liga_rfef: li
         print(_c(CYAN,  " 11. Despacho del presidente"))
         print(_c(CYAN,  f" 12. Nivel de control ({_play_mode_label(play_mode)})"))
         print(_c(CYAN,  " 13. Declaraciones (rueda de prensa)"))
+        if isinstance(data.get("coach_last_match"), dict):
+            print(_c(CYAN,  " 14. Repetir ultimo partido (Modo Entrenador)"))
+        print(_c(CYAN,  " 15. Escenario 'y si...' (fichaje o tactica)"))
         print(_c(CYAN,  "  0. Guardar y salir"))
 
-        op = input_int("  Opcin: ", 0, 13)
+        op = input_int("  Opcin: ", 0, 15)
 
         if op == 0:
             data["current_matchday"] = cur_md
             _save_career(data)
+            _flush_career_saves()
             print(_c(GREEN, "  Partida guardada.\n"))
             return
 
@@ -5028,7 +7222,7 @@ def _season_loop(data: dict, liga1: list[Team], liga2: list[Team], liga_rfef: li
             _market_menu(data, mgr_team, all_slots, liga1, liga2)
 
         elif op == 7:
-            _tactic_menu(data)
+            _tactic_menu(data, my_fix)
             tactic = data.get("tactic", tactic)
 
         elif op == 8:
@@ -5060,9 +7254,28 @@ def _season_loop(data: dict, liga1: list[Team], liga2: list[Team], liga_rfef: li
             else:
                 print(_c(GRAY, "  Declaraciones disponibles en nivel Total.\n"))
 
+        elif op == 14:
+            log = data.get("coach_last_match")
+            rh = all_slots.get(log.get("home")) if isinstance(log, dict) else None
+            ra = all_slots.get(log.get("away")) if isinstance(log, dict) else None
+            if rh is None or ra is None:
+                print(_c(GRAY, "  No hay partido de Modo Entrenador para repetir.\n"))
+            else:
+                try:
+                    rhg, rag = replay_coach_match(rh, ra, log, animate=_coach_speed_from_env()[1])
+                    print(_c(GREEN, f"\n  Repeticion: {rh.name} {rhg}-{rag} {ra.name}\n"))
+                except (KeyError, ValueError) as exc:
+                    print(_c(RED, f"  No se puede repetir el partido: {exc}\n"))
+            _pause()
+
+        elif op == 15:
+            data["current_matchday"] = cur_md
+            _what_if_menu(data, all_slots, my_fix)
+            _pause()
+
         elif op == 5:
             print(_c(YELLOW, f"\n  Simulando jornadas {cur_md}{tot_md}..."))
-            winter_md = 21 if tot_md >= 42 else max(1, tot_md // 2)
+            winter_md = _ai_winter_md(tot_md)
             for md in range(cur_md, tot_md + 1):
                 md_res = []
                 for h, a in fix_by_md.get(md, []):
@@ -5103,6 +7316,8 @@ def _season_loop(data: dict, liga1: list[Team], liga2: list[Team], liga_rfef: li
                     data["winter_market_done"] = True
                     _save_career(data)
                     _winter_market_menu(data, mgr_team, comp_t, md)
+                if md == winter_md:
+                    _run_ai_transfer_window(data, all_slots, "WINTER", md, news)
                 _play_copa_round(data, md, all_slots, mgr_slot, show_output=False)
                 _play_euro_round(data, md, all_slots, mgr_slot, show_output=False)
                 _simulate_national_window(data, md, all_slots, show_output=False)
@@ -5159,6 +7374,7 @@ def _setup_season(data: dict, team: Team, liga1: list[Team], liga2: list[Team],
         "bought":           [],
         "sold":             [],
         "winter_market_done": False,
+        "ai_market":        None,
         "results":          [],
         "news":             [f"Inicio de temporada {season}. {m['name']} llega a {team.name}."],
         "manager_team":     {"slot_id": team.slot_id, "name": team.name},
@@ -5196,7 +7412,9 @@ def _setup_season(data: dict, team: Team, liga1: list[Team], liga2: list[Team],
     })
     _ensure_president_profile(data, team)
     _ensure_market_profile(data, team)
-    data.setdefault("players", _build_players_snapshot(liga1, liga2, season))
+    all_foreign = [t for teams in liga_foreign.values() for t in teams]
+    if "players" not in data:
+        data["players"] = _build_players_snapshot(liga1 + liga_rfef + all_foreign, liga2, season)
     _save_career(data)
 
 
@@ -5375,4 +7593,12 @@ if __name__ == "__main__":
     if not sys.stdout.isatty():
         for name in ("CYAN", "YELLOW", "GREEN", "RED", "GRAY", "BOLD", "RESET"):
             globals()[name] = ""
-    main_menu()
+    if "--optimize-tactic" in sys.argv[1:]:
+        sys.exit(_headless_optimize_tactic(sys.argv[1:]))
+    if "--what-if" in sys.argv[1:]:
+        sys.exit(_headless_what_if(sys.argv[1:]))
+    try:
+        main_menu()
+    finally:
+        # Salir del menu de actualidad no corta la precarga; salir del programa si.
+        _close_real_football_client()
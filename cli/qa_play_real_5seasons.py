@@ -36,7 +36,11 @@ try:
 except ValueError:
     COACH_PADDING_LINES = 8000
 COACH_PADDING_TOKEN = os.getenv("PCF_COACH_PADDING_TOKEN", "0")
-COACH_SPEED_FOR_BOTS = os.getenv("PCF_COACH_SPEED_FOR_BOTS", "fast").strip().lower() or "fast"
+COACH_SPEED_FOR_BOTS = os.getenv("PCF_COACH_SPEED_FOR_BOTS", "instant").strip().lower() or "instant"
+# En instant/headless el partido no anima ni espera y lee menos de 20 lineas:
+# basta con una tanda corta en lugar del colchon de COACH_PADDING_LINES.
+COACH_INSTANT_SPEEDS = ("instant", "headless", "0")
+COACH_INSTANT_PADDING_LINES = 64
 try:
     SESSION_TIMEOUT_SECONDS = max(420, int(os.getenv("PCF_QA_SESSION_TIMEOUT_SECONDS", "900")))
 except ValueError:
@@ -386,12 +390,13 @@ def _coach_matchdays(total_md: int) -> set[int]:
 
 def _coach_padding_inputs() -> list[str]:
     pattern = ["", "A", "0", "P", "0", "D", "0", "C", "0", "W", "0", "0", COACH_PADDING_TOKEN]
-    if COACH_PADDING_LINES <= 0:
+    lines = COACH_INSTANT_PADDING_LINES if COACH_SPEED_FOR_BOTS in COACH_INSTANT_SPEEDS else COACH_PADDING_LINES
+    if lines <= 0:
         return []
     out: list[str] = []
-    while len(out) < COACH_PADDING_LINES:
+    while len(out) < lines:
         out.extend(pattern)
-    return out[:COACH_PADDING_LINES]
+    return out[:lines]
 
 
 def _choose_declaration_option(
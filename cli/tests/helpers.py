@@ -0,0 +1,25 @@
+"""Equipos sinteticos para los tests del CLI (no dependen de los CSV de temporada)."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pcfutbol_cli import Player, Team  # noqa: E402
+
+
+def make_player(slot: int, team: str, name: str, position: str, level: int) -> Player:
+    return Player(
+        slot_id=slot, team_name=team, comp="ES1", citizenship="ES", name=name,
+        position=position, age=25, market_value=level * 100_000,
+        ve=level, re=level, ag=level, ca=level, me=level, portero=level,
+        entrada=level, regate=level, remate=level, pase=level, tiro=level,
+        uid=f"{slot}:{name}",
+    )
+
+
+def make_team(slot: int, level: int) -> Team:
+    name = f"Equipo {slot}"
+    positions = ["Goalkeeper"] + ["Defender"] * 5 + ["Midfielder"] * 5 + ["Forward"] * 4
+    players = [make_player(slot, name, f"J{slot}-{i}", pos, level) for i, pos in enumerate(positions)]
+    return Team(slot_id=slot, name=name, comp="ES1", players=players)
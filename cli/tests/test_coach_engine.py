@@ -0,0 +1,85 @@
+"""Modo Entrenador: motor sin pantalla, velocidades y repeticion desde el log."""
+
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pcfutbol_cli as cli  # noqa: E402
+from helpers import make_team  # noqa: E402
+
+# Teclado de bot: ordenes en cada parada y cambios en las ventanas
+BOT_INPUTS = ["", "A", "0", "P", "0", "D", "0", "C", "0", "W", "1", "2", "S", "3", "4", "0", "0"]
+SEEDS = (7, 1234, 987654)
+
+
+def _play_terminal(home, away, seed: int, speed: str) -> tuple[tuple[int, int], dict, str]:
+    """Partido de _match_entrenador con PCF_COACH_SPEED=speed y teclado simulado."""
+    data = {"tactic": dict(cli.DEFAULT_TACTIC)}
+    answers = itertools.cycle(BOT_INPUTS)
+    out = io.StringIO()
+    with mock.patch.dict(os.environ, {"PCF_COACH_SPEED": speed}), \
+            mock.patch("builtins.input", lambda prompt="": next(answers)), \
+            mock.patch.object(cli.time, "sleep"), \
+            contextlib.redirect_stdout(out):
+        result = cli._match_entrenador(home, away, seed, home.slot_id, data)
+    return result, data["coach_last_match"], out.getvalue()
+
+
+class CoachEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.home, self.away = make_team(1, 70), make_team(2, 62)
+
+    def test_headless_match_is_deterministic(self):
+        for seed in SEEDS:
+            first = cli.simulate_coach_match(self.home, self.away, seed, 1)
+            again = cli.simulate_coach_match(self.home, self.away, seed, 1)
+            self.assertEqual(first, again)
+            self.assertEqual(list(first[0]), first[1]["result"])
+
+    def test_instant_and_fast_play_the_same_match(self):
+        for seed in SEEDS:
+            fast = _play_terminal(self.home, self.away, seed, "fast")
+            instant = _play_terminal(self.home, self.away, seed, "instant")
+            self.assertEqual(instant[:2], fast[:2])
+            self.assertIn("PITIDO FINAL", instant[2])
+            self.assertLess(len(instant[2]), len(fast[2]))
+
+    def test_headless_replays_terminal_decisions(self):
+        for seed in SEEDS:
+            result, log, _ = _play_terminal(self.home, self.away, seed, "instant")
+            self.assertTrue(log["decisions"])
+            headless = cli.simulate_coach_match(
+                self.home, self.away, seed, 1, decisions=log["decisions"], speed=log["speed"],
+            )
+            self.assertEqual(headless, (result, log))
+
+    def test_replay_after_json_round_trip(self):
+        for seed in SEEDS:
+            result, log, _ = _play_terminal(self.home, self.away, seed, "instant")
+            stored = json.loads(json.dumps(log))
+            # La plantilla cambia despues del partido: la repeticion usa las fuerzas del log
+            weaker = make_team(1, 40)
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(cli.replay_coach_match(weaker, self.away, stored), result)
+
+    def test_replay_rejects_a_tampered_log(self):
+        _, log, _ = _play_terminal(self.home, self.away, SEEDS[0], "instant")
+        stored = json.loads(json.dumps(log))
+        stored["result"] = [stored["result"][0] + 1, stored["result"][1]]
+        with self.assertRaises(ValueError):
+            cli.replay_coach_match(self.home, self.away, stored)
+        stored["v"] = cli.COACH_LOG_VERSION + 1
+        with self.assertRaises(ValueError):
+            cli.replay_coach_match(self.home, self.away, stored)
+
+
+if __name__ == "__main__":
+    unittest.main()
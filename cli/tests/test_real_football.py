@@ -0,0 +1,121 @@
+"""RealFootballClient contra un servidor HTTP local: cache, TTL, modo sin conexion y precarga."""
+
+import http.server
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pcfutbol_cli as cli  # noqa: E402
+
+
+class _StubHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits.append(self.path)
+        server.gate.wait(5.0)
+        body = json.dumps({"table": [{"name": f"Equipo {len(server.hits)}"}], "events": []}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class RealFootballClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.server.hits = []
+        self.server.lock = threading.Lock()
+        self.server.gate = threading.Event()
+        self.server.gate.set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = cli.RealFootballClient(
+            base_url=f"http://127.0.0.1:{self.server.server_port}/api",
+            cache_dir=Path(self.tmp.name), timeout=5.0, rate=0,
+        )
+
+    def tearDown(self):
+        self.client.close()
+        self.stop_server()
+        self.tmp.cleanup()
+
+    def stop_server(self):
+        if self.server is not None:
+            self.server.gate.set()
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def hits(self) -> int:
+        with self.server.lock:
+            return len(self.server.hits)
+
+    def test_fresh_cache_is_served_without_request(self):
+        first = self.client.table(4335)
+        again = self.client.table(4335)
+        self.assertEqual(first.source, "red")
+        self.assertEqual((again.source, again.fallback), ("cache", False))
+        self.assertEqual(again.data, first.data)
+        self.assertEqual(self.hits(), 1)
+
+    def test_forced_refresh_downloads_again(self):
+        self.client.table(4335)
+        refreshed = self.client.table(4335, refresh=True)
+        self.assertEqual(refreshed.source, "red")
+        self.assertEqual(refreshed.data["table"][0]["name"], "Equipo 2")
+        self.assertEqual(self.hits(), 2)
+
+    def test_dead_network_falls_back_to_cache(self):
+        saved = self.client.table(4335)
+        self.stop_server()
+        refreshed = self.client.table(4335, refresh=True)
+        self.assertEqual((refreshed.source, refreshed.fallback), ("cache", True))
+        self.assertEqual(refreshed.data, saved.data)
+        self.client.ttl = 0
+        stale = self.client.table(4335)
+        self.assertEqual((stale.source, stale.fallback), ("cache-caducada", True))
+        with self.assertRaises(OSError):
+            self.client.events(4335)
+
+    def test_offline_mode_uses_cache_and_misses_raise(self):
+        self.client.table(4335)
+        self.client.offline = True
+        cached = self.client.table(4335, refresh=True)
+        self.assertTrue(cached.fallback)
+        with self.assertRaises(cli.RealFootballOffline):
+            self.client.events(4335)
+        self.assertEqual(self.client.prefetch([4335, 4400]), [])
+        self.assertEqual(self.hits(), 1)
+
+    def test_prefetch_does_not_block_and_in_flight_requests_are_shared(self):
+        self.server.gate.clear()
+        t0 = time.perf_counter()
+        futures = self.client.prefetch([4335])
+        self.assertLess(time.perf_counter() - t0, 1.0)
+        self.assertEqual(len(futures), 2)
+        result = {}
+        reader = threading.Thread(target=lambda: result.update(res=self.client.table(4335)))
+        reader.start()
+        time.sleep(0.2)
+        self.server.gate.set()
+        reader.join(5.0)
+        for fut in futures:
+            fut.result(5.0)
+        self.assertEqual(result["res"].source, "red")
+        self.assertEqual(self.hits(), 2)   # tabla + resultados, sin repetir la tabla
+        self.assertEqual(self.client.prefetch([4335]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Aislamiento de WorldState y escenarios 'y si...' (python -m unittest discover cli/tests)."""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pcfutbol_cli as cli  # noqa: E402
+from helpers import make_team  # noqa: E402
+
+
+def _career() -> tuple[dict, dict[int, cli.Team]]:
+    teams = {slot: make_team(slot, 50 + 5 * slot) for slot in range(1, 7)}
+    data = {
+        "team_slot": 1, "competition": "ES1", "season_seed": 1234, "current_matchday": 3,
+        "results": [{"md": 1, "h": 1, "a": 2, "hg": 1, "ag": 0}],
+        "tactic": dict(cli.DEFAULT_TACTIC), "budget": 5_000_000,
+    }
+    return data, teams
+
+
+class WorldStateIsolationTest(unittest.TestCase):
+    def test_live_moves_do_not_reach_captured_world(self):
+        data, teams = _career()
+        world = cli.WorldState.from_career(data, teams)
+        fork = world.fork()
+        star = teams[6].players[-1]
+        cli._move_player(star, teams[6], teams[1])
+        cli._release_player(teams[2].players[0], teams[2])
+        data["results"].append({"md": 2, "h": 3, "a": 1, "hg": 4, "ag": 0})
+        data["budget"] = 0
+
+        for w in (world, fork):
+            self.assertIn(star, w.team(6).players)
+            self.assertEqual(star.slot_id, 6)
+            self.assertEqual(len(w.team(1).players), 15)
+            self.assertEqual(len(w.team(2).players), 15)
+            self.assertEqual(len(w.results()), 1)
+            self.assertEqual(w.get("budget"), 5_000_000)
+
+    def test_fork_writes_stay_in_the_fork(self):
+        data, teams = _career()
+        live_players = {slot: list(t.players) for slot, t in teams.items()}
+        world = cli.WorldState.from_career(data, teams)
+        a, b = world.fork(), world.fork()
+        uid = teams[6].players[-1].uid
+        a.move_player(uid, 6, 1)
+        a.edit_player(1, uid).moral = 99
+        a.play_matchday(3, [(1, 2, 7), (3, 4, 8)])
+
+        self.assertEqual([p.uid for p in a.team(1).players][-1], uid)
+        self.assertEqual(len(b.team(1).players), 15)
+        self.assertEqual(len(world.team(1).players), 15)
+        self.assertEqual(len(b.results()), 1)
+        self.assertEqual(len(a.results()), 3)
+        for slot, team in teams.items():
+            self.assertEqual(team.players, live_players[slot])
+        self.assertEqual(teams[6].players[-1].slot_id, 6)
+        self.assertEqual(teams[6].players[-1].moral, 50)
+        self.assertEqual(len(data["results"]), 1)
+
+
+class WhatIfSeasonTest(unittest.TestCase):
+    def test_signing_scenario_is_deterministic_and_read_only(self):
+        data, teams = _career()
+        before = (cli._career_snapshot(data), {slot: list(t.players) for slot, t in teams.items()})
+        decision = {"sign": teams[6].players[-1].uid}
+        serial = cli.what_if_season(data, teams, decision, runs=3, workers=1)
+        forked = cli.what_if_season(data, teams, decision, runs=3, workers=2)
+
+        self.assertEqual(serial, forked)
+        self.assertEqual(serial["runs"], 3)
+        self.assertEqual(serial["from_md"], 3)
+        for name in ("actual", "alternativa"):
+            self.assertLessEqual(serial[name]["best"], serial[name]["worst"])
+        self.assertEqual(cli._career_snapshot(data), before[0])
+        self.assertEqual({slot: list(t.players) for slot, t in teams.items()}, before[1])
+
+    def test_unchanged_tactic_gives_same_outcome(self):
+        data, teams = _career()
+        report = cli.what_if_season(data, teams, {"tactic": {}}, runs=2, workers=1)
+        self.assertEqual(report["actual"], report["alternativa"])
+
+    def test_unknown_decision_is_rejected(self):
+        data, teams = _career()
+        with self.assertRaises(ValueError):
+            cli.what_if_season(data, teams, {"sign": "no:existe"}, runs=1, workers=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,9 +8,10 @@ import csv
 import json
 import struct
 from collections import Counter
-from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Optional
+
+from pkf_container import PkfFile
 
 
 DEFAULT_PKF = (
@@ -28,47 +29,6 @@ SPANISH_COMPS = {"ES1", "ES2", "E3G1", "E3G2"}
 CDM = b"Copyright (c)1996 Dinamic Multimedia"
 
 
-@dataclass
-class Pointer:
-    index: int
-    start: int
-    size: int
-
-
-def parse_pointers(blob: bytes) -> List[Pointer]:
-    pointers: List[Pointer] = []
-    i = 232
-    idx = 1
-    offset = 232
-    while i < len(blob):
-        b = blob[i]
-        if b == 0x04:
-            if i + 5 > len(blob):
-                break
-            jump_to = struct.unpack_from("<I", blob, i + 1)[0]
-            i += 5
-            skip = jump_to - offset - 5
-            if skip < 0:
-                break
-            i += skip
-            offset = jump_to
-            continue
-        if b == 0x02:
-            if i + 38 > len(blob):
-                break
-            start = struct.unpack_from("<I", blob, i + 26)[0]
-            size = struct.unpack_from("<I", blob, i + 30)[0]
-            pointers.append(Pointer(index=idx, start=start, size=size))
-            i += 38
-            idx += 1
-            offset += 38
-            continue
-        if b == 0x05 and blob[i + 1 : i + 5] == b"\x00\x00\x00\x00":
-            break
-        i += 1
-    return pointers
-
-
 def read_u8(chunk: bytes, i: int) -> tuple[int, int]:
     if i >= len(chunk):
         raise ValueError("u8 out of bounds")
@@ -92,7 +52,7 @@ def parse_country_byte(chunk: bytes) -> Optional[int]:
     # Expected structure head:
     # cdm, u16 unknown, u16 const, u8 const, u8 dbflag, string name, string stadium, u8 country
     try:
-        if not chunk.startswith(CDM):
+        if chunk[: len(CDM)] != CDM:
             return None
         i = len(CDM)
         _, i = read_u16(chunk, i)  # tunknown00
@@ -117,13 +77,10 @@ def parse_args() -> argparse.Namespace:
 
 def main() -> None:
     args = parse_args()
-    blob = args.pkf.read_bytes()
-    ptrs = parse_pointers(blob)
-
     countries: Dict[int, Optional[int]] = {}
-    for p in ptrs:
-        chunk = blob[p.start : p.start + p.size]
-        countries[p.index] = parse_country_byte(chunk)
+    with PkfFile(args.pkf) as pkf:
+        for p, chunk in pkf.records():
+            countries[p.index] = parse_country_byte(chunk)
 
     rows = list(csv.DictReader(args.mapping.open("r", encoding="utf-8", newline="")))
     by_idx = {int(r["pcf_index"]): r for r in rows}
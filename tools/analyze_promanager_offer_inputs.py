@@ -11,6 +11,8 @@ from collections import Counter
 from pathlib import Path
 from typing import Dict, List, Set
 
+from pkf_container import PkfFile
+
 
 DEFAULT_MAPPING = Path(__file__).resolve().parent / "out" / "pcf55_full_mapping_global.csv"
 DEFAULT_PKF = Path(__file__).resolve().parents[2] / "PCF55" / "FUTBOL5" / "FUTBOL5" / "DBDAT" / "EQUIPOS.PKF"
@@ -57,33 +59,11 @@ def skip_string(chunk: bytes, i: int) -> int:
 
 
 def countries_from_pkf(path: Path) -> Dict[int, int]:
-    blob = path.read_bytes()
     out: Dict[int, int] = {}
-
-    i = 232
-    idx = 1
-    offset = 232
-    while i < len(blob):
-        b = blob[i]
-        if b == 0x04:
-            if i + 5 > len(blob):
-                break
-            jump_to = struct.unpack_from("<I", blob, i + 1)[0]
-            i += 5
-            skip = jump_to - offset - 5
-            if skip < 0:
-                break
-            i += skip
-            offset = jump_to
-            continue
-        if b == 0x02:
-            if i + 38 > len(blob):
-                break
-            start = struct.unpack_from("<I", blob, i + 26)[0]
-            size = struct.unpack_from("<I", blob, i + 30)[0]
-            chunk = blob[start : start + size]
+    with PkfFile(path) as pkf:
+        for ptr, chunk in pkf.records():
             try:
-                if chunk.startswith(CDM):
+                if chunk[: len(CDM)] == CDM:
                     j = len(CDM)
                     _, j = read_u16(chunk, j)
                     _, j = read_u16(chunk, j)
@@ -92,16 +72,9 @@ def countries_from_pkf(path: Path) -> Dict[int, int]:
                     j = skip_string(chunk, j)
                     j = skip_string(chunk, j)
                     country, _ = read_u8(chunk, j)
-                    out[idx] = int(country)
+                    out[ptr.index] = int(country)
             except Exception:
                 pass
-            i += 38
-            idx += 1
-            offset += 38
-            continue
-        if b == 0x05 and blob[i + 1 : i + 5] == b"\x00\x00\x00\x00":
-            break
-        i += 1
     return out
 
 
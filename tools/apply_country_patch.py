@@ -13,6 +13,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from pkf_container import PkfFile
+
 
 DEFAULT_PKF = (
     Path(__file__).resolve().parents[2]
@@ -29,13 +31,6 @@ SPANISH_COMPS = {"ES1", "ES2", "E3G1", "E3G2"}
 CDM = b"Copyright (c)1996 Dinamic Multimedia"
 
 
-@dataclass
-class Pointer:
-    index: int
-    start: int
-    size: int
-
-
 @dataclass
 class CountryField:
     index: int
@@ -43,40 +38,6 @@ class CountryField:
     value: int
 
 
-def parse_pointers(blob: bytes) -> List[Pointer]:
-    pointers: List[Pointer] = []
-    i = 232
-    idx = 1
-    offset = 232
-    while i < len(blob):
-        b = blob[i]
-        if b == 0x04:
-            if i + 5 > len(blob):
-                break
-            jump_to = struct.unpack_from("<I", blob, i + 1)[0]
-            i += 5
-            skip = jump_to - offset - 5
-            if skip < 0:
-                break
-            i += skip
-            offset = jump_to
-            continue
-        if b == 0x02:
-            if i + 38 > len(blob):
-                break
-            start = struct.unpack_from("<I", blob, i + 26)[0]
-            size = struct.unpack_from("<I", blob, i + 30)[0]
-            pointers.append(Pointer(index=idx, start=start, size=size))
-            i += 38
-            idx += 1
-            offset += 38
-            continue
-        if b == 0x05 and blob[i + 1 : i + 5] == b"\x00\x00\x00\x00":
-            break
-        i += 1
-    return pointers
-
-
 def read_u8(chunk: bytes, i: int) -> tuple[int, int]:
     if i >= len(chunk):
         raise ValueError("u8 out of bounds")
@@ -98,7 +59,7 @@ def skip_string(chunk: bytes, i: int) -> int:
 
 def parse_country_field(chunk: bytes, start: int, index: int) -> Optional[CountryField]:
     try:
-        if not chunk.startswith(CDM):
+        if chunk[: len(CDM)] != CDM:
             return None
         i = len(CDM)
         _, i = read_u16(chunk, i)
@@ -178,15 +139,14 @@ def parse_args() -> argparse.Namespace:
 def main() -> None:
     args = parse_args()
     mapping = load_mapping(args.mapping)
-    original = args.pkf.read_bytes()
-    blob = bytearray(original)
-
     fields: List[CountryField] = []
-    for ptr in parse_pointers(original):
-        chunk = original[ptr.start : ptr.start + ptr.size]
-        cf = parse_country_field(chunk, ptr.start, ptr.index)
-        if cf is not None:
-            fields.append(cf)
+    with PkfFile(args.pkf) as pkf:
+        original = pkf.read_bytes()
+        for ptr, chunk in pkf.records():
+            cf = parse_country_field(chunk, ptr.start, ptr.index)
+            if cf is not None:
+                fields.append(cf)
+    blob = bytearray(original)
     by_index = {f.index: f for f in fields}
 
     if args.mode == "spanish_only":
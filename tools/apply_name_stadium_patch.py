@@ -13,6 +13,10 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from pkf_container import PkfFile, Pointer
+from pkf_text import fits_cp1252, validate_fixed_fields
+from pkf_text import encode_fixed_text as pkf_encode_fixed_text
+
 
 DEFAULT_PKF = (
     Path(__file__).resolve().parents[2]
@@ -27,13 +31,6 @@ DEFAULT_MAPPING = Path(__file__).resolve().parent / "out" / "pcf55_transfermarkt
 CDM = b"Copyright (c)1996 Dinamic Multimedia"
 
 
-@dataclass
-class Pointer:
-    index: int
-    start: int
-    size: int
-
-
 @dataclass
 class CoreTextFields:
     team_pos: int
@@ -42,28 +39,6 @@ class CoreTextFields:
     stadium_len: int
 
 
-def bijective(b: int) -> int:
-    if b < 32:
-        return b + 97 if (b & 1) == 0 else b + 95
-    if b < 64:
-        return b + 33 if (b & 1) == 0 else b + 31
-    if b < 96:
-        return b - 31 if (b & 1) == 0 else b - 33
-    if b < 128:
-        return b - 95 if (b & 1) == 0 else b - 97
-    if b < 160:
-        return b + 97 if (b & 1) == 0 else b + 95
-    if b < 192:
-        return b + 33 if (b & 1) == 0 else b + 31
-    if b < 224:
-        return b - 31 if (b & 1) == 0 else b - 33
-    return b - 95 if (b & 1) == 0 else b - 97
-
-
-def _fits_cp1252(text: str, fixed_len: int) -> bool:
-    return len(text.encode("cp1252", errors="replace")) <= fixed_len
-
-
 def _normalize_ascii(text: str) -> str:
     raw = (text or "").strip()
     raw = "".join(c for c in unicodedata.normalize("NFKD", raw) if not unicodedata.combining(c))
@@ -72,7 +47,7 @@ def _normalize_ascii(text: str) -> str:
 
 def _fit_text(text: str, fixed_len: int) -> str:
     s = _normalize_ascii(text)
-    if _fits_cp1252(s, fixed_len):
+    if fits_cp1252(s, fixed_len):
         return s
 
     # Progressive abbreviations to keep semantic meaning.
@@ -137,7 +112,7 @@ def _fit_text(text: str, fixed_len: int) -> str:
 
     for v in variants:
         v = " ".join(v.split())
-        if _fits_cp1252(v, fixed_len):
+        if fits_cp1252(v, fixed_len):
             return v
 
     # Final hard truncate (cp1252-byte aware).
@@ -146,14 +121,7 @@ def _fit_text(text: str, fixed_len: int) -> str:
 
 
 def encode_fixed_text(plain_text: str, fixed_len: int) -> tuple[bytes, str]:
-    payload = _fit_text((plain_text or "").strip(), fixed_len)
-    raw = payload.encode("cp1252", errors="replace")
-    if len(raw) > fixed_len:
-        raw = raw[:fixed_len]
-        payload = raw.decode("cp1252", errors="replace").rstrip()
-    if len(raw) < fixed_len:
-        raw = raw + (b" " * (fixed_len - len(raw)))
-    return bytes(bijective(b) for b in raw), payload
+    return pkf_encode_fixed_text(plain_text, fixed_len, fit=_fit_text)
 
 
 def load_extracted(path: Path) -> Dict[int, Dict[str, object]]:
@@ -161,45 +129,6 @@ def load_extracted(path: Path) -> Dict[int, Dict[str, object]]:
     return {int(item["index"]): item for item in data}
 
 
-def parse_pointers(blob: bytes) -> Dict[int, Pointer]:
-    pointers: Dict[int, Pointer] = {}
-    i = 232
-    idx = 1
-    offset = 232
-
-    while i < len(blob):
-        b = blob[i]
-        if b == 0x04:
-            if i + 5 > len(blob):
-                break
-            jump_to = struct.unpack_from("<I", blob, i + 1)[0]
-            i += 5
-            skip = jump_to - offset - 5
-            if skip < 0:
-                break
-            i += skip
-            offset = jump_to
-            continue
-
-        if b == 0x02:
-            if i + 38 > len(blob):
-                break
-            start = struct.unpack_from("<I", blob, i + 26)[0]
-            size = struct.unpack_from("<I", blob, i + 30)[0]
-            pointers[idx] = Pointer(index=idx, start=start, size=size)
-            i += 38
-            idx += 1
-            offset += 38
-            continue
-
-        if b == 0x05 and blob[i + 1 : i + 5] == b"\x00\x00\x00\x00":
-            break
-
-        i += 1
-
-    return pointers
-
-
 def read_u8(chunk: bytes, i: int) -> tuple[int, int]:
     if i >= len(chunk):
         raise ValueError("u8 out of bounds")
@@ -213,7 +142,7 @@ def read_u16(chunk: bytes, i: int) -> tuple[int, int]:
 
 
 def parse_core_text_fields(chunk: bytes) -> Optional[CoreTextFields]:
-    if not chunk.startswith(CDM):
+    if chunk[: len(CDM)] != CDM:
         return None
     try:
         i = len(CDM)
@@ -269,12 +198,13 @@ def load_mapping(path: Path, min_score: float, only_accepted: bool) -> List[Dict
 def apply_patch(
     original: bytes,
     blob: bytearray,
+    pointers: Dict[int, Pointer],
     mapping_rows: List[Dict[str, str]],
     skip_indices: set[int],
     extracted_by_index: Dict[int, Dict[str, object]],
     allow_heuristic_full_name: bool,
 ) -> Dict[str, int]:
-    pointers = parse_pointers(original)
+    view = memoryview(original)
     updated_teams = 0
     updated_full_names = 0
     updated_stadiums = 0
@@ -283,6 +213,7 @@ def apply_patch(
     missing_pointer = 0
     missing_core_fields = 0
     skipped_full_name_heuristic = 0
+    written_texts: List[tuple[str, int]] = []
 
     for row in mapping_rows:
         idx = int(row["pcf_index"])
@@ -295,8 +226,7 @@ def apply_patch(
             missing_pointer += 1
             continue
 
-        chunk = original[ptr.start : ptr.start + ptr.size]
-        core = parse_core_text_fields(chunk)
+        core = parse_core_text_fields(view[ptr.start : ptr.end])
         if core is None:
             missing_core_fields += 1
             continue
@@ -311,6 +241,7 @@ def apply_patch(
                 truncated_fields += 1
             text_start = ptr.start + int(core.team_pos) + 2
             blob[text_start : text_start + fixed_len] = payload
+            written_texts.append((_normalize_ascii(tm_team), fixed_len))
             updated_teams += 1
         else:
             skipped += 1
@@ -322,6 +253,7 @@ def apply_patch(
                 truncated_fields += 1
             text_start = ptr.start + int(core.stadium_pos) + 2
             blob[text_start : text_start + fixed_len] = payload
+            written_texts.append((_normalize_ascii(tm_stadium), fixed_len))
             updated_stadiums += 1
 
         # Optional and unsafe by default: heuristics can target non-string fields.
@@ -344,11 +276,15 @@ def apply_patch(
         else:
             skipped_full_name_heuristic += 1
 
+    # Characters cp1252 cannot store are written as "?".
+    lossy_fields = sum(1 for _, bad in validate_fixed_fields(written_texts) if bad)
+
     return {
         "updated_teams": updated_teams,
         "updated_full_names": updated_full_names,
         "updated_stadiums": updated_stadiums,
         "truncated_fields": truncated_fields,
+        "lossy_fields": lossy_fields,
         "skipped": skipped,
         "missing_pointer": missing_pointer,
         "missing_core_fields": missing_core_fields,
@@ -406,11 +342,14 @@ def main() -> None:
     extracted = load_extracted(args.extracted) if args.allow_heuristic_full_name else {}
     mapping_rows = load_mapping(args.mapping, args.min_score, args.only_accepted)
 
-    original = args.pkf.read_bytes()
+    with PkfFile(args.pkf) as pkf:
+        original = pkf.read_bytes()
+        pointers = pkf.by_index
     blob = bytearray(original)
     stats = apply_patch(
         original=original,
         blob=blob,
+        pointers=pointers,
         mapping_rows=mapping_rows,
         skip_indices=set(args.skip_indices),
         extracted_by_index=extracted,
@@ -441,6 +380,7 @@ def main() -> None:
                 f"full_names={stats['updated_full_names']}",
                 f"stadiums={stats['updated_stadiums']}",
                 f"truncated={stats['truncated_fields']}",
+                f"lossy={stats['lossy_fields']}",
                 f"skipped={stats['skipped']}",
                 f"missing_ptr={stats['missing_pointer']}",
                 f"missing_core={stats['missing_core_fields']}",
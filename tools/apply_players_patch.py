@@ -4,15 +4,22 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import csv
 import datetime as dt
 import json
+import multiprocessing
+import os
 import re
-import struct
+import shutil
 from collections import defaultdict, deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Set
+
+from pkf_container import ByteRange, PkfFile, diff_ranges, write_ranges
+from pkf_text import decode_text, fits_cp1252, validate_fixed_fields
+from pkf_text import encode_fixed_text as pkf_encode_fixed_text
 
 
 DEFAULT_PKF = (
@@ -46,13 +53,6 @@ FILLER_TOKENS = {
 }
 
 
-@dataclass
-class Pointer:
-    index: int
-    start: int
-    size: int
-
-
 @dataclass
 class SourcePlayer:
     name: str
@@ -94,35 +94,9 @@ class ParseError(Exception):
     pass
 
 
-def bijective(b: int) -> int:
-    if b < 32:
-        return b + 97 if (b & 1) == 0 else b + 95
-    if b < 64:
-        return b + 33 if (b & 1) == 0 else b + 31
-    if b < 96:
-        return b - 31 if (b & 1) == 0 else b - 33
-    if b < 128:
-        return b - 95 if (b & 1) == 0 else b - 97
-    if b < 160:
-        return b + 97 if (b & 1) == 0 else b + 95
-    if b < 192:
-        return b + 33 if (b & 1) == 0 else b + 31
-    if b < 224:
-        return b - 31 if (b & 1) == 0 else b - 33
-    return b - 95 if (b & 1) == 0 else b - 97
-
-
-def decode_text(raw: bytes) -> str:
-    return bytes(bijective(b) for b in raw).decode("cp1252", errors="replace")
-
-
-def _fits_cp1252(text: str, fixed_len: int) -> bool:
-    return len(text.encode("cp1252", errors="replace")) <= fixed_len
-
-
 def _fit_text(text: str, fixed_len: int) -> str:
     s = " ".join((text or "").strip().split())
-    if _fits_cp1252(s, fixed_len):
+    if fits_cp1252(s, fixed_len):
         return s
 
     variants = [s]
@@ -152,7 +126,7 @@ def _fit_text(text: str, fixed_len: int) -> str:
 
     for v in variants:
         v = " ".join(v.split())
-        if _fits_cp1252(v, fixed_len):
+        if fits_cp1252(v, fixed_len):
             return v
 
     raw = s.encode("cp1252", errors="replace")[:fixed_len]
@@ -160,57 +134,13 @@ def _fit_text(text: str, fixed_len: int) -> str:
 
 
 def encode_fixed_text(plain_text: str, fixed_len: int) -> tuple[bytes, str]:
-    payload = _fit_text((plain_text or "").strip(), fixed_len)
-    raw = payload.encode("cp1252", errors="replace")
-    if len(raw) > fixed_len:
-        raw = raw[:fixed_len]
-        payload = raw.decode("cp1252", errors="replace").rstrip()
-    if len(raw) < fixed_len:
-        raw = raw + (b" " * (fixed_len - len(raw)))
-    return bytes(bijective(b) for b in raw), payload
+    return pkf_encode_fixed_text(plain_text, fixed_len, fit=_fit_text)
 
 
 def normalize(s: str) -> str:
     return " ".join((s or "").strip().lower().split())
 
 
-def parse_pointers(blob: bytes) -> List[Pointer]:
-    pointers: List[Pointer] = []
-    i = 232
-    idx = 1
-    offset = 232
-
-    while i < len(blob):
-        b = blob[i]
-        if b == 0x04:
-            if i + 5 > len(blob):
-                break
-            jump_to = struct.unpack_from("<I", blob, i + 1)[0]
-            i += 5
-            skip = jump_to - offset - 5
-            if skip < 0:
-                raise ValueError(f"Invalid pointer jump at {i}: skip={skip}")
-            i += skip
-            offset = jump_to
-            continue
-
-        if b == 0x02:
-            if i + 38 > len(blob):
-                break
-            start = struct.unpack_from("<I", blob, i + 26)[0]
-            size = struct.unpack_from("<I", blob, i + 30)[0]
-            pointers.append(Pointer(index=idx, start=start, size=size))
-            i += 38
-            idx += 1
-            offset += 38
-            continue
-
-        if b == 0x05 and blob[i + 1 : i + 5] == b"\x00\x00\x00\x00":
-            break
-        i += 1
-    return pointers
-
-
 def read_u8(chunk: bytes, i: int) -> tuple[int, int]:
     if i >= len(chunk):
         raise ParseError("u8 out of bounds")
@@ -529,7 +459,13 @@ def patch_record(
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("--pkf", type=Path, default=DEFAULT_PKF)
+    parser.add_argument(
+        "--pkf",
+        type=Path,
+        nargs="+",
+        default=[DEFAULT_PKF],
+        help="One or more PKF files to patch with the same mapping (patched in parallel).",
+    )
     parser.add_argument("--mapping", type=Path, default=DEFAULT_MAPPING)
     parser.add_argument("--players-csv", type=Path, default=DEFAULT_PLAYERS_CSV)
     parser.add_argument("--report", type=Path, default=DEFAULT_REPORT)
@@ -553,6 +489,17 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument("--in-place", action="store_true")
     parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only compute and report the changed byte ranges; write nothing.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used when several --pkf files are given.",
+    )
     parser.add_argument(
         "--skip-indices",
         nargs="*",
@@ -575,16 +522,28 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def main() -> None:
-    args = parse_args()
-    mapping = load_mapping(args.mapping, args.min_score, args.only_accepted)
-    source_players = load_source_players(args.players_csv)
-    skip_indices = set(args.skip_indices or [])
-
-    original = args.pkf.read_bytes()
-    blob = bytearray(original)
-    pointers = {p.index: p for p in parse_pointers(original)}
-
+@dataclass
+class PatchOptions:
+    skip_indices: Set[int]
+    min_chain_players: int
+    season_year: int
+    attributes_mode: str
+    guard_chain: bool
+
+
+def patch_pkf(
+    path: Path,
+    mapping: Dict[int, Dict[str, str]],
+    source_players: Dict[str, List[SourcePlayer]],
+    options: PatchOptions,
+) -> Dict[str, object]:
+    """Patch one PKF in memory; returns its report plus the changed byte ranges.
+
+    The file itself is only read (mmap); team chunks are patched in one
+    private copy of the whole file, so pointers whose chunks overlap or alias
+    see each other's edits, and the copy is reduced to the byte ranges that
+    differ from the file.
+    """
     report_rows: List[Dict[str, object]] = []
     totals = {
         "teams_requested": len(mapping),
@@ -597,163 +556,249 @@ def main() -> None:
         "birth_year_changed": 0,
         "attrs_changed": 0,
         "truncated_fields": 0,
+        "lossy_fields": 0,
         "teams_missing_source": 0,
         "teams_skipped": 0,
         "teams_reverted_guard": 0,
     }
 
-    for idx, row in sorted(mapping.items()):
-        if idx in skip_indices:
-            totals["teams_skipped"] += 1
-            report_rows.append(
-                {
-                    "pcf_index": idx,
-                    "tm_team": row.get("tm_team", ""),
-                    "status": "skipped_by_index",
-                }
-            )
-            continue
+    with PkfFile(path, strict=True) as pkf:
+        work = bytearray(pkf.data)
+        for idx, row in sorted(mapping.items()):
+            if idx in options.skip_indices:
+                totals["teams_skipped"] += 1
+                report_rows.append(
+                    {
+                        "pcf_index": idx,
+                        "tm_team": row.get("tm_team", ""),
+                        "status": "skipped_by_index",
+                    }
+                )
+                continue
 
-        ptr = pointers.get(idx)
-        if ptr is None:
-            report_rows.append({"pcf_index": idx, "status": "missing_pointer"})
-            continue
+            ptr = pkf.by_index.get(idx)
+            if ptr is None:
+                report_rows.append({"pcf_index": idx, "status": "missing_pointer"})
+                continue
 
-        chunk_before = bytes(blob[ptr.start : ptr.start + ptr.size])
-        records = detect_player_chain(chunk_before, min_players=args.min_chain_players)
-        if not records:
-            report_rows.append(
-                {
-                    "pcf_index": idx,
-                    "tm_team": row.get("tm_team", ""),
-                    "status": "no_player_chain",
-                    "chunk_size": ptr.size,
-                }
-            )
-            continue
+            chunk_before = bytes(work[ptr.start : ptr.end])
+            records = detect_player_chain(chunk_before, min_players=options.min_chain_players)
+            if not records:
+                report_rows.append(
+                    {
+                        "pcf_index": idx,
+                        "tm_team": row.get("tm_team", ""),
+                        "status": "no_player_chain",
+                        "chunk_size": ptr.size,
+                    }
+                )
+                continue
 
-        totals["teams_with_chain"] += 1
-        totals["players_detected"] += len(records)
+            totals["teams_with_chain"] += 1
+            totals["players_detected"] += len(records)
+
+            team_key = normalize(row.get("tm_team", ""))
+            src_players = source_players.get(team_key, [])
+            if not src_players:
+                totals["teams_missing_source"] += 1
+                report_rows.append(
+                    {
+                        "pcf_index": idx,
+                        "tm_team": row.get("tm_team", ""),
+                        "status": "missing_source_team",
+                        "players_detected": len(records),
+                    }
+                )
+                continue
+
+            assigned = assign_sources(records, src_players)
+            chunk = bytearray(chunk_before)
+            patched = 0
+            team_stats = {
+                "name_changed": 0,
+                "fullname_changed": 0,
+                "birth_year_changed": 0,
+                "attrs_changed": 0,
+                "truncated_fields": 0,
+                "lossy_fields": 0,
+            }
+            # Names with characters cp1252 cannot store end up with "?" in game.
+            fields = []
+            for rec, src in zip(records, assigned):
+                if src is not None:
+                    fields.append((short_name_from_full(src.name), rec.name_len))
+                    fields.append((src.name, rec.full_len))
+            team_stats["lossy_fields"] = sum(1 for _, bad in validate_fixed_fields(fields) if bad)
+
+            for rec, src in zip(records, assigned):
+                if src is None:
+                    continue
+                st = patch_record(
+                    blob=chunk,
+                    chunk_start=0,
+                    rec=rec,
+                    src=src,
+                    season_year=options.season_year,
+                    attributes_mode=options.attributes_mode,
+                )
+                patched += 1
+                for k in st:
+                    team_stats[k] += st[k]
+
+            if options.guard_chain:
+                records_after = detect_player_chain(bytes(chunk), min_players=options.min_chain_players)
+                if not records_after:
+                    totals["teams_reverted_guard"] += 1
+                    report_rows.append(
+                        {
+                            "pcf_index": idx,
+                            "pcf_team": row.get("pcf_team", ""),
+                            "tm_team": row.get("tm_team", ""),
+                            "status": "reverted_guard_no_chain",
+                            "players_detected_before": len(records),
+                            "players_source": len(src_players),
+                        }
+                    )
+                    continue
+
+            team_ranges = diff_ranges(chunk_before, bytes(chunk), base=ptr.start)
+            work[ptr.start : ptr.end] = chunk
+            if patched > 0:
+                totals["teams_patched"] += 1
+            totals["players_patched"] += patched
+            for k in team_stats:
+                totals[k] += team_stats[k]
 
-        team_key = normalize(row.get("tm_team", ""))
-        src_players = source_players.get(team_key, [])
-        if not src_players:
-            totals["teams_missing_source"] += 1
             report_rows.append(
                 {
                     "pcf_index": idx,
+                    "pcf_team": row.get("pcf_team", ""),
                     "tm_team": row.get("tm_team", ""),
-                    "status": "missing_source_team",
+                    "status": "patched",
                     "players_detected": len(records),
+                    "players_source": len(src_players),
+                    "players_patched": patched,
+                    "changed_ranges": len(team_ranges),
+                    **team_stats,
                 }
             )
-            continue
 
-        assigned = assign_sources(records, src_players)
-        patched = 0
-        team_stats = {
-            "name_changed": 0,
-            "fullname_changed": 0,
-            "birth_year_changed": 0,
-            "attrs_changed": 0,
-            "truncated_fields": 0,
-        }
-
-        for rec, src in zip(records, assigned):
-            if src is None:
-                continue
-            st = patch_record(
-                blob=blob,
-                chunk_start=ptr.start,
-                rec=rec,
-                src=src,
-                season_year=args.season_year,
-                attributes_mode=args.attributes_mode,
-            )
-            patched += 1
-            for k in team_stats:
-                team_stats[k] += st[k]
-
-        if args.guard_chain:
-            chunk_after = bytes(blob[ptr.start : ptr.start + ptr.size])
-            records_after = detect_player_chain(chunk_after, min_players=args.min_chain_players)
-            if not records_after:
-                blob[ptr.start : ptr.start + ptr.size] = chunk_before
-                totals["teams_reverted_guard"] += 1
-                report_rows.append(
-                    {
-                        "pcf_index": idx,
-                        "pcf_team": row.get("pcf_team", ""),
-                        "tm_team": row.get("tm_team", ""),
-                        "status": "reverted_guard_no_chain",
-                        "players_detected_before": len(records),
-                        "players_source": len(src_players),
-                    }
-                )
-                continue
+        ranges: List[ByteRange] = diff_ranges(bytes(pkf.data), bytes(work))
+
+    return {"path": path, "totals": totals, "teams": report_rows, "ranges": ranges}
+
+
+def patch_pkfs(
+    paths: List[Path],
+    mapping: Dict[int, Dict[str, str]],
+    source_players: Dict[str, List[SourcePlayer]],
+    options: PatchOptions,
+    workers: int,
+) -> List[Dict[str, object]]:
+    """patch_pkf over several files, one process per file when workers > 1."""
+    if workers <= 1 or len(paths) <= 1:
+        return [patch_pkf(p, mapping, source_players, options) for p in paths]
+    ctx = multiprocessing.get_context("spawn" if os.name == "nt" else "fork")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(paths)), mp_context=ctx) as pool:
+        futures = [pool.submit(patch_pkf, p, mapping, source_players, options) for p in paths]
+        return [f.result() for f in futures]
 
-        if patched > 0:
-            totals["teams_patched"] += 1
-        totals["players_patched"] += patched
-        for k in team_stats:
-            totals[k] += team_stats[k]
 
-        report_rows.append(
+def range_rows(ranges: List[ByteRange]) -> List[Dict[str, object]]:
+    return [{"offset": off, "length": len(new), "before": old.hex(), "after": new.hex()} for off, old, new in ranges]
+
+
+def main() -> None:
+    args = parse_args()
+    paths: List[Path] = list(args.pkf)
+    if args.output is not None and len(paths) > 1:
+        raise SystemExit("--output only works with a single --pkf; use --in-place or the default names.")
+    mapping = load_mapping(args.mapping, args.min_score, args.only_accepted)
+    source_players = load_source_players(args.players_csv)
+    options = PatchOptions(
+        skip_indices=set(args.skip_indices or []),
+        min_chain_players=args.min_chain_players,
+        season_year=args.season_year,
+        attributes_mode=args.attributes_mode,
+        guard_chain=args.guard_chain,
+    )
+    results = patch_pkfs(paths, mapping, source_players, options, args.workers)
+
+    timestamp = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_reports: List[Dict[str, object]] = []
+    for res in results:
+        path = res["path"]
+        ranges = res["ranges"]
+        backup = None
+        if args.dry_run:
+            out_path = None
+        else:
+            backup = path.with_suffix(path.suffix + f".{timestamp}.bak")
+            shutil.copyfile(path, backup)
+            if args.in_place:
+                out_path = path
+            else:
+                out_path = args.output or path.with_name(path.stem + ".players_patched" + path.suffix)
+                shutil.copyfile(path, out_path)
+            write_ranges(out_path, ranges)
+        file_reports.append(
             {
-                "pcf_index": idx,
-                "pcf_team": row.get("pcf_team", ""),
-                "tm_team": row.get("tm_team", ""),
-                "status": "patched",
-                "players_detected": len(records),
-                "players_source": len(src_players),
-                "players_patched": patched,
-                **team_stats,
+                "pkf_input": str(path),
+                "pkf_output": str(out_path) if out_path else None,
+                "backup": str(backup) if backup else None,
+                "dry_run": bool(args.dry_run),
+                "changed_ranges": len(ranges),
+                "changed_bytes": sum(len(new) for _, _, new in ranges),
+                "totals": res["totals"],
+                "teams": res["teams"],
+                "ranges": range_rows(ranges),
             }
         )
 
-    timestamp = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup = args.pkf.with_suffix(args.pkf.suffix + f".{timestamp}.bak")
-    backup.write_bytes(original)
-
-    if args.in_place:
-        out_path = args.pkf
-    else:
-        out_path = args.output or args.pkf.with_name(args.pkf.stem + ".players_patched" + args.pkf.suffix)
-    out_path.write_bytes(bytes(blob))
-
-    report = {
-        "pkf_input": str(args.pkf),
-        "pkf_output": str(out_path),
-        "backup": str(backup),
+    common = {
         "mapping": str(args.mapping),
         "players_csv": str(args.players_csv),
         "attributes_mode": args.attributes_mode,
-        "totals": totals,
-        "teams": report_rows,
     }
+    if len(file_reports) == 1:
+        report = {**file_reports[0], **common}
+    else:
+        totals: Dict[str, int] = defaultdict(int)
+        for fr in file_reports:
+            for k, v in fr["totals"].items():
+                totals[k] += v
+        report = {**common, "dry_run": bool(args.dry_run), "totals": dict(totals), "files": file_reports}
     args.report.parent.mkdir(parents=True, exist_ok=True)
     args.report.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
 
-    print(f"Backup: {backup}")
-    print(f"Output: {out_path}")
-    print(f"Attributes mode: {args.attributes_mode}")
-    print(
-        "Totals: "
-        + ", ".join(
-            [
-                f"teams_requested={totals['teams_requested']}",
-                f"teams_with_chain={totals['teams_with_chain']}",
-                f"teams_patched={totals['teams_patched']}",
-                f"players_detected={totals['players_detected']}",
-                f"players_patched={totals['players_patched']}",
-                f"attrs_changed={totals['attrs_changed']}",
-                f"birth_year_changed={totals['birth_year_changed']}",
-                f"truncated={totals['truncated_fields']}",
-                f"teams_skipped={totals['teams_skipped']}",
-                f"teams_reverted_guard={totals['teams_reverted_guard']}",
-            ]
+    for fr in file_reports:
+        totals = fr["totals"]
+        print(f"PKF: {fr['pkf_input']}")
+        if fr["dry_run"]:
+            print("  Dry run: nothing written")
+        else:
+            print(f"  Backup: {fr['backup']}")
+            print(f"  Output: {fr['pkf_output']}")
+        print(f"  Changed: {fr['changed_ranges']} ranges, {fr['changed_bytes']} bytes")
+        print(
+            "  Totals: "
+            + ", ".join(
+                [
+                    f"teams_requested={totals['teams_requested']}",
+                    f"teams_with_chain={totals['teams_with_chain']}",
+                    f"teams_patched={totals['teams_patched']}",
+                    f"players_detected={totals['players_detected']}",
+                    f"players_patched={totals['players_patched']}",
+                    f"attrs_changed={totals['attrs_changed']}",
+                    f"birth_year_changed={totals['birth_year_changed']}",
+                    f"truncated={totals['truncated_fields']}",
+                    f"lossy={totals['lossy_fields']}",
+                    f"teams_skipped={totals['teams_skipped']}",
+                    f"teams_reverted_guard={totals['teams_reverted_guard']}",
+                ]
+            )
         )
-    )
+    print(f"Attributes mode: {args.attributes_mode}")
     print(f"Report: {args.report}")
 
 
@@ -1,23 +1,36 @@
 #!/usr/bin/env python
-"""Patch crest PKFs with real club logos sourced from Transfermarkt."""
+"""Patch crest PKFs with real club logos sourced from Transfermarkt.
+
+Rendered DM chunks are cached on disk by content: the key is the hash of
+the logo PNG, the target width/height and the hash of the palette, so a
+re-run only quantizes logos that are new or changed. Missing chunks are
+rendered in a process pool. When the PKF layout is already compact and
+every chunk keeps its size, only the changed bytes are written back.
+"""
 
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import csv
 import datetime as dt
+import hashlib
 import json
+import os
 import re
 import struct
 import unicodedata
-from dataclasses import dataclass
 from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 import requests
 from PIL import Image
 
+from pkf_container import ByteRange, PkfFile, Pointer, diff_ranges, write_ranges
+
 
 BASE = Path(__file__).resolve().parents[2] / "PCF55" / "FUTBOL5" / "FUTBOL5" / "DBDAT"
 OUT_DIR = Path(__file__).resolve().parent / "out"
@@ -26,6 +39,7 @@ DEFAULT_MAPPING = OUT_DIR / "pcf55_full_mapping_global.csv"
 DEFAULT_TM_JSON = OUT_DIR / "transfermarkt_teams_global.json"
 DEFAULT_PALETTE = Path(__file__).resolve().parents[1] / "pcx-utils" / "fut" / "meta" / "palette.bmp"
 DEFAULT_CACHE = OUT_DIR / "tm_crests_cache"
+DEFAULT_CHUNK_CACHE = OUT_DIR / "dm_chunk_cache"
 DEFAULT_PREVIEW = OUT_DIR / "tm_crests_preview"
 DEFAULT_REPORT = OUT_DIR / "shield_real_patch_report.json"
 
@@ -35,6 +49,13 @@ SHIELD_FILES = [
     BASE / "RIDIESC.PKF",
 ]
 
+# Bump when compose_logo / to_indexed_with_palette / build_dm_chunk change
+# so chunks rendered by an older version are not reused.
+RENDER_VERSION = 1
+
+# (logo path, width, height) of one rendered chunk.
+RenderKey = Tuple[str, int, int]
+
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -44,54 +65,6 @@ HEADERS = {
 }
 
 
-@dataclass
-class PtrEntry:
-    index: int
-    start: int
-    size: int
-    entry_off: int
-
-
-def parse_pointer_entries(blob: bytes) -> Tuple[List[PtrEntry], int]:
-    out: List[PtrEntry] = []
-    i = 232
-    idx = 1
-    offset = 232
-    table_end = 232
-    while i < len(blob):
-        b = blob[i]
-        if b == 0x04:
-            if i + 5 > len(blob):
-                break
-            jump_to = struct.unpack_from("<I", blob, i + 1)[0]
-            i += 5
-            skip = jump_to - offset - 5
-            if skip < 0:
-                break
-            i += skip
-            offset = jump_to
-            table_end = max(table_end, i)
-            continue
-        if b == 0x02:
-            if i + 38 > len(blob):
-                break
-            start = struct.unpack_from("<I", blob, i + 26)[0]
-            size = struct.unpack_from("<I", blob, i + 30)[0]
-            out.append(PtrEntry(index=idx, start=start, size=size, entry_off=i))
-            i += 38
-            idx += 1
-            offset += 38
-            table_end = max(table_end, i)
-            continue
-        if b == 0x05 and blob[i + 1 : i + 5] == b"\x00\x00\x00\x00":
-            table_end = max(table_end, i + 5)
-            break
-        i += 1
-    if out:
-        table_end = max(table_end, max(p.entry_off + 38 for p in out))
-    return out, table_end
-
-
 def norm_name(text: str) -> str:
     s = (text or "").strip().lower()
     s = unicodedata.normalize("NFKD", s)
@@ -251,13 +224,11 @@ def to_indexed_with_palette(
     rgb = rgba.convert("RGB")
     idx = rgb.quantize(palette=palette_img, dither=Image.Dither.NONE)
 
-    alpha = rgba.getchannel("A").tobytes()
-    data = bytearray(idx.tobytes())
-    for i, a in enumerate(alpha):
-        if a < 16:
-            data[i] = 0
+    # Nearly transparent pixels -> index 0.
+    clear = rgba.getchannel("A").point([255] * 16 + [0] * 240)
+    idx.paste(0, mask=clear)
 
-    out = Image.frombytes("P", idx.size, bytes(data))
+    out = Image.frombytes("P", idx.size, idx.tobytes())
     out.putpalette(palette_img.getpalette()[:768])
     return out
 
@@ -314,9 +285,127 @@ def build_dm_chunk(indexed: Image.Image) -> bytes:
     return bytes(header) + bytes(payload)
 
 
+def dm_chunk_to_image(chunk: bytes, palette_img: Image.Image) -> Image.Image:
+    """Inverse of build_dm_chunk (used for the preview PNGs)."""
+    width, height = dm_dims_from_chunk(chunk)
+    row = ((width + 3) // 4) * 4
+    payload = chunk[56:]
+    lines = [payload[y * row : y * row + width] for y in range(height - 1, -1, -1)]
+    out = Image.frombytes("P", (width, height), b"".join(lines))
+    out.putpalette(palette_img.getpalette()[:768])
+    return out
+
+
+def sha256_file(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def palette_hash(palette_img: Image.Image) -> str:
+    return hashlib.sha256(bytes(palette_img.getpalette()[:768])).hexdigest()
+
+
+def chunk_cache_path(cache_dir: Path, logo_sha: str, width: int, height: int, palette_sha: str) -> Path:
+    key = hashlib.sha256(f"{RENDER_VERSION}:{logo_sha}:{width}x{height}:{palette_sha}".encode("ascii")).hexdigest()
+    return cache_dir / key[:2] / f"{key}.dm"
+
+
+@lru_cache(maxsize=None)
+def load_palette(path: str) -> Image.Image:
+    return Image.open(path).convert("P")
+
+
+def render_chunk(logo_png: str, width: int, height: int, palette_path: str) -> bytes:
+    rgba = compose_logo(Path(logo_png), width, height)
+    return build_dm_chunk(to_indexed_with_palette(rgba, load_palette(palette_path)))
+
+
+def logo_jobs(paths: List[Path], slot_to_logo: Dict[int, Path]) -> List[RenderKey]:
+    """Every (logo, width, height) the shield PKFs need, in first-use order."""
+    jobs: Dict[RenderKey, None] = {}
+    for path in paths:
+        with PkfFile(path, strict=True) as pkf:
+            for ptr in pkf.pointers:
+                logo_png = slot_to_logo.get(ptr.index)
+                if logo_png is None:
+                    continue
+                try:
+                    width, height = dm_dims_from_chunk(bytes(pkf.record(ptr)[:56]))
+                except ValueError:
+                    continue
+                jobs[(str(logo_png), width, height)] = None
+    return list(jobs)
+
+
+def render_logos(
+    jobs: List[RenderKey],
+    palette_path: Path,
+    chunk_cache: Optional[Path],
+    workers: int,
+) -> Tuple[Dict[RenderKey, bytes], int]:
+    """DM chunk per job, from the chunk cache or rendered; returns (chunks, rendered count)."""
+    chunks: Dict[RenderKey, bytes] = {}
+    pending: List[Tuple[RenderKey, Optional[Path]]] = []
+    palette_sha = palette_hash(load_palette(str(palette_path)))
+    logo_sha: Dict[str, str] = {}
+    for job in jobs:
+        cached = None
+        if chunk_cache is not None:
+            logo, width, height = job
+            if logo not in logo_sha:
+                logo_sha[logo] = sha256_file(Path(logo))
+            cached = chunk_cache_path(chunk_cache, logo_sha[logo], width, height, palette_sha)
+            if cached.exists():
+                chunks[job] = cached.read_bytes()
+                continue
+        pending.append((job, cached))
+
+    args = ([j[0] for j, _ in pending], [j[1] for j, _ in pending], [j[2] for j, _ in pending], repeat(str(palette_path)))
+    if workers <= 1 or len(pending) <= 1:
+        rendered = list(map(render_chunk, *args))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            chunksize = max(1, len(pending) // (workers * 4))
+            rendered = list(pool.map(render_chunk, *args, chunksize=chunksize))
+
+    for (job, cached), chunk in zip(pending, rendered):
+        chunks[job] = chunk
+        if cached is not None:
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cached.with_suffix(".tmp")
+            tmp.write_bytes(chunk)
+            os.replace(tmp, cached)
+    return chunks, len(pending)
+
+
+def changed_chunk_ranges(
+    original: bytes,
+    ptrs: List[Pointer],
+    chunks_by_slot: Dict[int, bytes],
+    table_end: int,
+) -> Optional[List[ByteRange]]:
+    """Changed bytes when rebuild_pkf would keep the layout, else None.
+
+    That is the case when the chunks already sit back to back after the
+    pointer table (as rebuild_pkf leaves them) and no chunk changes size.
+    """
+    if not ptrs:
+        return None
+    cursor = max(table_end, max(p.entry_off + 38 for p in ptrs))
+    for ptr in ptrs:
+        if ptr.start != cursor or len(chunks_by_slot[ptr.index]) != ptr.size:
+            return None
+        cursor += ptr.size
+    if cursor != len(original):
+        return None
+    ranges: List[ByteRange] = []
+    for ptr in ptrs:
+        ranges.extend(diff_ranges(original[ptr.start : ptr.end], chunks_by_slot[ptr.index], base=ptr.start))
+    return ranges
+
+
 def rebuild_pkf(
     original: bytes,
-    ptrs: List[PtrEntry],
+    ptrs: List[Pointer],
     chunks_by_slot: Dict[int, bytes],
     table_end: int,
 ) -> bytes:
@@ -342,14 +431,17 @@ def rebuild_pkf(
 def patch_one_pkf(
     path: Path,
     slot_to_logo: Dict[int, Path],
+    rendered: Dict[RenderKey, bytes],
     palette_img: Image.Image,
     preview_dir: Path,
     *,
     dry_run: bool,
 ) -> Dict[str, object]:
-    original = path.read_bytes()
-    ptrs, table_end = parse_pointer_entries(original)
-    rendered: Dict[Tuple[str, int, int], bytes] = {}
+    with PkfFile(path, strict=True) as pkf:
+        original = pkf.read_bytes()
+        ptrs = pkf.pointers
+        table_end = pkf.table.table_end
+    previewed = set()
     chunks_by_slot: Dict[int, bytes] = {}
 
     preview_dir.mkdir(parents=True, exist_ok=True)
@@ -377,13 +469,10 @@ def patch_one_pkf(
             continue
 
         key = (str(logo_png), width, height)
-        if key not in rendered:
-            rgba = compose_logo(logo_png, width, height)
-            indexed = to_indexed_with_palette(rgba, palette_img)
-            rendered[key] = build_dm_chunk(indexed)
-
+        if key not in previewed:
+            previewed.add(key)
             preview_name = f"{path.stem.lower()}_slot_{slot:03d}_{logo_png.stem}_{width}x{height}.png"
-            indexed.save(preview_dir / preview_name)
+            dm_chunk_to_image(rendered[key], palette_img).save(preview_dir / preview_name)
 
         new_chunk = rendered[key]
         chunks_by_slot[slot] = new_chunk
@@ -392,14 +481,25 @@ def patch_one_pkf(
         else:
             kept += 1
 
-    new_blob = rebuild_pkf(original, ptrs, chunks_by_slot, table_end=table_end)
+    ranges = changed_chunk_ranges(original, ptrs, chunks_by_slot, table_end)
+    if ranges is None:
+        new_blob = rebuild_pkf(original, ptrs, chunks_by_slot, table_end=table_end)
+        write_mode = "unchanged" if new_blob == original else "rebuilt"
+    else:
+        new_blob = original
+        write_mode = "in_place" if ranges else "unchanged"
 
     backup = None
-    if not dry_run:
+    bytes_written = 0
+    if not dry_run and write_mode != "unchanged":
         ts = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_path = path.with_suffix(path.suffix + f".{ts}.bak")
         backup_path.write_bytes(original)
-        path.write_bytes(new_blob)
+        if ranges is None:
+            path.write_bytes(new_blob)
+            bytes_written = len(new_blob)
+        else:
+            bytes_written = write_ranges(path, ranges)
         backup = str(backup_path)
 
     return {
@@ -410,6 +510,8 @@ def patch_one_pkf(
         "kept_slots": kept,
         "errors": errors[:100],
         "backup": backup,
+        "write_mode": write_mode,
+        "bytes_written": bytes_written,
         "size_before": len(original),
         "size_after": len(new_blob),
     }
@@ -421,6 +523,9 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--tm-json", type=Path, default=DEFAULT_TM_JSON)
     p.add_argument("--palette", type=Path, default=DEFAULT_PALETTE)
     p.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE)
+    p.add_argument("--chunk-cache", type=Path, default=DEFAULT_CHUNK_CACHE, help="Rendered DM chunks by content hash")
+    p.add_argument("--no-chunk-cache", action="store_true", help="Render every logo again, ignore the chunk cache")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes rendering logos")
     p.add_argument("--preview-dir", type=Path, default=DEFAULT_PREVIEW)
     p.add_argument("--report", type=Path, default=DEFAULT_REPORT)
     p.add_argument("--min-score", type=float, default=0.72)
@@ -458,12 +563,19 @@ def main() -> None:
                 }
             )
 
-    palette_img = Image.open(args.palette).convert("P")
+    palette_img = load_palette(str(args.palette))
+    rendered, rendered_count = render_logos(
+        logo_jobs(SHIELD_FILES, slot_to_logo),
+        args.palette,
+        None if args.no_chunk_cache else args.chunk_cache,
+        args.workers,
+    )
 
     file_reports = [
         patch_one_pkf(
             p,
             slot_to_logo,
+            rendered,
             palette_img,
             args.preview_dir,
             dry_run=args.dry_run,
@@ -486,6 +598,8 @@ def main() -> None:
         "unresolved_slots": unresolved_slots,
         "downloaded_logos": downloaded,
         "download_errors": download_errors,
+        "logo_chunks": len(rendered),
+        "logo_chunks_rendered": rendered_count,
         "files": file_reports,
         "resolve_evidence_head": evidence[:300],
     }
@@ -496,10 +610,11 @@ def main() -> None:
     print(f"Resolved slots: {len(resolved)}/{len(mapping_rows)}")
     print(f"Slots with logo: {len(slot_to_logo)}")
     print(f"Unresolved slots: {len(unresolved_slots)}")
+    print(f"Logo chunks: {len(rendered)} (rendered {rendered_count}, cached {len(rendered) - rendered_count})")
     for fr in file_reports:
         print(
             f"{fr['file']}: changed={fr['changed_slots']} kept={fr['kept_slots']} "
-            f"size {fr['size_before']} -> {fr['size_after']}"
+            f"size {fr['size_before']} -> {fr['size_after']} ({fr['write_mode']}, {fr['bytes_written']} bytes written)"
         )
     print(f"Report: {args.report}")
 
@@ -11,11 +11,11 @@ import json
 import re
 import struct
 import unicodedata
-from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Tuple
 
 from extract_pcf55_teams import extract
+from pkf_container import PkfFile
 
 
 BASE = Path(__file__).resolve().parents[2] / "PCF55" / "FUTBOL5" / "FUTBOL5" / "DBDAT"
@@ -30,48 +30,6 @@ SHIELD_FILES = [
 ]
 
 
-@dataclass
-class PtrEntry:
-    index: int
-    start: int
-    size: int
-    entry_off: int
-
-
-def parse_pointer_entries(blob: bytes) -> List[PtrEntry]:
-    out: List[PtrEntry] = []
-    i = 232
-    idx = 1
-    offset = 232
-    while i < len(blob):
-        b = blob[i]
-        if b == 0x04:
-            if i + 5 > len(blob):
-                break
-            jump_to = struct.unpack_from("<I", blob, i + 1)[0]
-            i += 5
-            skip = jump_to - offset - 5
-            if skip < 0:
-                break
-            i += skip
-            offset = jump_to
-            continue
-        if b == 0x02:
-            if i + 38 > len(blob):
-                break
-            start = struct.unpack_from("<I", blob, i + 26)[0]
-            size = struct.unpack_from("<I", blob, i + 30)[0]
-            out.append(PtrEntry(index=idx, start=start, size=size, entry_off=i))
-            i += 38
-            idx += 1
-            offset += 38
-            continue
-        if b == 0x05 and blob[i + 1 : i + 5] == b"\x00\x00\x00\x00":
-            break
-        i += 1
-    return out
-
-
 def norm(s: str) -> str:
     s = (s or "").strip().lower()
     s = unicodedata.normalize("NFKD", s)
@@ -161,10 +119,11 @@ def build_aliases(
 
 
 def patch_one_pkf(path: Path, aliases: Dict[int, int]) -> Dict[str, object]:
-    original = path.read_bytes()
+    with PkfFile(path) as pkf:
+        original = pkf.read_bytes()
+        ptrs = pkf.pointers
+        by_idx = pkf.by_index
     blob = bytearray(original)
-    ptrs = parse_pointer_entries(original)
-    by_idx = {p.index: p for p in ptrs}
 
     changed = 0
     details: List[Dict[str, int]] = []
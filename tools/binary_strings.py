@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""String inventories of game binaries (MANDOS.DAT, DBASEDOS.DAT, PKF...).
+
+Everything here runs in C-level passes instead of a Python loop per byte:
+
+- null-terminated tokens come from ``bytes.split`` / one regex ``finditer``;
+- printability is ``len(raw.translate(None, NON_PRINTABLE))`` (the
+  non-printable bytes are deleted, what is left is counted);
+- many literal tokens are counted in a single regex pass.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+
+# Printable: 32..126 and 160..255 (cp1252 text range used by the game).
+NON_PRINTABLE = bytes(range(0, 32)) + bytes(range(127, 160))
+PRINTABLE_RATIO = 0.8
+
+_TOKEN_RE = re.compile(rb"[^\x00]+")
+_RUN_RE_CACHE: Dict[int, "re.Pattern[bytes]"] = {}
+
+
+@dataclass
+class Token:
+    idx: int
+    off: int
+    length: int
+    text: str
+
+
+def printable_count(raw: bytes) -> int:
+    return len(raw.translate(None, NON_PRINTABLE))
+
+
+def is_mostly_printable(raw: bytes, ratio: float = PRINTABLE_RATIO) -> bool:
+    if not raw:
+        return True
+    return printable_count(raw) >= int(len(raw) * ratio)
+
+
+def iter_tokens(blob: bytes) -> Iterator[Tuple[int, bytes]]:
+    """(offset, raw) of every non-empty null-terminated token.
+
+    An unterminated tail at the end of the blob is not a C string and is skipped.
+    """
+    n = len(blob)
+    for m in _TOKEN_RE.finditer(blob):
+        if m.end() < n:
+            yield m.start(), m.group()
+
+
+def decode_tokens(blob: bytes) -> List[Token]:
+    return [
+        Token(idx=idx, off=off, length=len(raw), text=raw.decode("cp1252", errors="replace"))
+        for idx, (off, raw) in enumerate(iter_tokens(blob))
+    ]
+
+
+def printable_tokens(
+    blob: bytes,
+    min_len: int = 2,
+    max_len: int = 80,
+    ratio: float = PRINTABLE_RATIO,
+) -> List[str]:
+    """Stripped text of the null-delimited tokens that look like strings."""
+    out: List[str] = []
+    for tok in blob.split(b"\x00"):
+        if not (min_len <= len(tok) <= max_len):
+            continue
+        if printable_count(tok) < int(len(tok) * ratio):
+            continue
+        s = tok.decode("cp1252", errors="replace").strip()
+        if s:
+            out.append(s)
+    return out
+
+
+def printable_runs(data: bytes, min_len: int) -> Iterator[Tuple[int, bytes]]:
+    """(offset, raw) of maximal runs of printable bytes, at least `min_len` long."""
+    rx = _RUN_RE_CACHE.get(min_len)
+    if rx is None:
+        rx = re.compile(rb"[\x20-\x7e\xa0-\xff]{%d,}" % max(1, min_len))
+        _RUN_RE_CACHE[min_len] = rx
+    for m in rx.finditer(data):
+        yield m.start(), m.group()
+
+
+def count_literals(text: str, literals: Sequence[str]) -> Dict[str, int]:
+    """Non-overlapping occurrences of every literal (as ``str.count``), one pass.
+
+    The alternation is ordered longest first, so a hit is the longest literal
+    at that position; every literal that is a prefix of it starts there too.
+    """
+    counts = {t: 0 for t in literals}
+    if "" in counts:
+        counts[""] = len(text) + 1
+    uniq = [t for t in counts if t]
+    if not uniq:
+        return counts
+    rx = re.compile("|".join(re.escape(t) for t in sorted(uniq, key=len, reverse=True)))
+    prefixes = {t: [u for u in uniq if t.startswith(u)] for t in uniq}
+    next_free = dict.fromkeys(uniq, 0)
+    m = rx.search(text)
+    while m is not None:
+        pos = m.start()
+        for t in prefixes[m.group()]:
+            if pos >= next_free[t]:
+                counts[t] += 1
+                next_free[t] = pos + len(t)
+        m = rx.search(text, pos + 1)
+    return counts
@@ -11,7 +11,9 @@ from collections import defaultdict
 from dataclasses import dataclass
 from difflib import SequenceMatcher
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from team_matching import NameIndex, length_ratio_bound
 
 
 DEFAULT_EXTRACTED = Path(__file__).resolve().parent / "out" / "pcf55_teams_extracted.csv"
@@ -267,25 +269,41 @@ def apply_target_counts(tm_rows: List[Dict[str, object]], target_counts: Dict[st
     return selected
 
 
-def choose_slot(team_name: str, stadium_name: str, slots: List[Slot]) -> Tuple[int, float, float]:
+def choose_slot(
+    team_name: str,
+    stadium_name: str,
+    slots: List[Slot],
+    index: Optional[NameIndex] = None,
+) -> Tuple[int, float, float]:
+    """Cheapest live slot for a team: (position in `slots`, cost, similarity).
+
+    Cost = truncation penalties - name similarity - extraction confidence,
+    first slot on ties. `index` is a `NameIndex` over the slot team names;
+    slots discarded from it are skipped.
+    """
+    if index is None:
+        index = NameIndex((s.team_name for s in slots), normalize)
     need_team = byte_len_cp1252(team_name)
     need_stadium = byte_len_cp1252(stadium_name)
+    query = normalize(team_name)
 
-    best_i = 0
-    best_cost = 10**9
-    best_sim = 0.0
-    for i, slot in enumerate(slots):
+    def fixed_cost(slot: Slot) -> float:
         trunc_team = max(0, need_team - slot.team_len)
         trunc_stadium = max(0, need_stadium - max(1, slot.stadium_len))
+        return (trunc_team * 20.0) + (trunc_stadium * 8.0)
+
+    def exact(i: int) -> float:
+        slot = slots[i]
+        sim = index.ratio(i, query)
+        return -(fixed_cost(slot) - (sim * 4.0) - (slot.confidence * 1.0))
 
-        sim = name_similarity(team_name, slot.team_name)
-        cost = (trunc_team * 20.0) + (trunc_stadium * 8.0) - (sim * 4.0) - (slot.confidence * 1.0)
+    def bound(i: int) -> float:
+        slot = slots[i]
+        sim = length_ratio_bound(len(query), len(index.norms[i]))
+        return -(fixed_cost(slot) - (sim * 4.0) - (slot.confidence * 1.0))
 
-        if cost < best_cost:
-            best_cost = cost
-            best_i = i
-            best_sim = sim
-    return best_i, best_cost, best_sim
+    best_i, best = index.search(index.blocked(query), lambda _best: index.live_ids(), exact, bound)
+    return best_i, -best, index.ratio(best_i, query)
 
 
 def unmatched_sort_key(team: Dict[str, object], priority_rank: Dict[str, int]) -> Tuple[int, float, int]:
@@ -427,15 +445,17 @@ def main() -> None:
 
     unmatched_tm = still_unmatched
 
+    slot_index = NameIndex((s.team_name for s in available_slots), normalize)
     for t in unmatched_tm:
-        if not available_slots:
+        if not slot_index.live:
             break
         team_name_raw = str(t.get("team_name", "") or "")
         team_name = patch_team_name(team_name_raw)
         stadium_name_raw = str(t.get("stadium_name", "") or "")
         stadium_name = patch_stadium_name(stadium_name_raw)
-        pick_i, cost, sim = choose_slot(team_name, stadium_name, available_slots)
-        slot = available_slots.pop(pick_i)
+        pick_i, cost, sim = choose_slot(team_name, stadium_name, available_slots, slot_index)
+        slot = available_slots[pick_i]
+        slot_index.discard(pick_i)
         rows_out.append(
             {
                 "pcf_index": slot.index,
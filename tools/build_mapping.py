@@ -6,12 +6,11 @@ from __future__ import annotations
 import argparse
 import csv
 import json
-import re
-import unicodedata
 from dataclasses import dataclass
-from difflib import SequenceMatcher
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from team_matching import NameIndex, best_similarity
 
 
 DEFAULT_PCF_EXTRACTED = Path(__file__).resolve().parent / "out" / "pcf55_teams_extracted.json"
@@ -20,25 +19,6 @@ DEFAULT_OUT_CSV = Path(__file__).resolve().parent / "out" / "pcf55_transfermarkt
 DEFAULT_OUT_JSON = Path(__file__).resolve().parent / "out" / "pcf55_transfermarkt_mapping.json"
 
 
-STOPWORDS = {
-    "club",
-    "cf",
-    "fc",
-    "real",
-    "deportivo",
-    "futbol",
-    "football",
-    "sporting",
-    "athletic",
-    "s",
-    "a",
-    "d",
-    "ud",
-    "cd",
-    "sd",
-}
-
-
 @dataclass
 class MatchRow:
     pcf_index: int
@@ -54,56 +34,20 @@ class MatchRow:
     accepted: bool
 
 
-def normalize(s: str) -> str:
-    s = (s or "").strip().lower()
-    s = "".join(
-        c
-        for c in unicodedata.normalize("NFKD", s)
-        if not unicodedata.combining(c)
-    )
-    s = re.sub(r"[^a-z0-9 ]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
-
-def token_set(s: str) -> set[str]:
-    tokens = set(normalize(s).split())
-    return {t for t in tokens if t and t not in STOPWORDS}
-
-
-def similarity(a: str, b: str) -> float:
-    na = normalize(a)
-    nb = normalize(b)
-    if not na or not nb:
-        return 0.0
-
-    seq = SequenceMatcher(None, na, nb).ratio()
-
-    ta = token_set(a)
-    tb = token_set(b)
-    if ta and tb:
-        jacc = len(ta & tb) / len(ta | tb)
-    else:
-        jacc = 0.0
-
-    starts = 1.0 if na.startswith(nb) or nb.startswith(na) else 0.0
-
-    has_b_a = " b " in f" {na} " or na.endswith(" b")
-    has_b_b = " b " in f" {nb} " or nb.endswith(" b")
-    b_penalty = 0.15 if (has_b_a ^ has_b_b) else 0.0
-
-    return (0.65 * seq + 0.30 * jacc + 0.05 * starts) - b_penalty
-
+def best_match(
+    pcf_name: str,
+    tm_teams: List[Dict[str, object]],
+    index: Optional[NameIndex] = None,
+) -> Tuple[Dict[str, object], float]:
+    """Highest `similarity` Transfermarkt team, first one on ties.
 
-def best_match(pcf_name: str, tm_teams: List[Dict[str, object]]) -> Tuple[Dict[str, object], float]:
-    best_team = tm_teams[0]
-    best_score = -1.0
-    for tm in tm_teams:
-        score = similarity(pcf_name, str(tm.get("team_name", "")))
-        if score > best_score:
-            best_team = tm
-            best_score = score
-    return best_team, round(best_score, 4)
+    Pass a prebuilt `NameIndex` over the team names when matching many PCF
+    teams against the same list.
+    """
+    if index is None:
+        index = NameIndex(str(tm.get("team_name", "")) for tm in tm_teams)
+    best_i, best_score = best_similarity(index, pcf_name)
+    return tm_teams[best_i], round(best_score, 4)
 
 
 def load_json(path: Path) -> object:
@@ -120,6 +64,7 @@ def build_rows(
     if not tm_teams:
         return []
 
+    index = NameIndex(str(tm.get("team_name", "")) for tm in tm_teams)
     rows: List[MatchRow] = []
     for pcf in pcf_data:
         pcf_team = str(pcf.get("team_name", "")).strip()
@@ -129,7 +74,7 @@ def build_rows(
         if pcf_conf < min_pcf_confidence:
             continue
 
-        tm, score = best_match(pcf_team, tm_teams)
+        tm, score = best_match(pcf_team, tm_teams, index)
         accepted = score >= min_score
         rows.append(
             MatchRow(
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""Single-pass multi-pattern byte scanner for the reverse-engineering tools.
+
+Every pattern (ASCII anchors, little-endian dword targets, keys...) is
+reduced to its first 4 bytes and hashed into one lookup table. With NumPy
+the buffer is read in blocks as overlapping u32 words, every offset is
+probed against the table in one vectorized pass and only the few candidate
+offsets are compared with the full patterns. Hits are reported for every
+pattern, overlapping ones included, exactly as a ``bytes.find`` loop per
+pattern would.
+
+Without NumPy, and for patterns shorter than 4 bytes, each pattern falls
+back to its own ``find`` loop.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Hashable, List, Mapping, Union
+
+try:
+    import numpy as np
+except ImportError:  # optional: without NumPy every pattern gets its own find loop
+    np = None
+
+
+# Anything with .find() and the buffer protocol.
+Buffer = Union[bytes, bytearray, mmap.mmap]
+
+PREFIX_LEN = 4
+# Offsets probed per block (the u32 view costs 4 bytes per offset).
+BLOCK_SIZE = 1 << 22
+HASH_BITS = 22
+_HASH_MUL = 2654435761  # Knuth multiplicative hash
+
+
+def dword(value: int) -> bytes:
+    return struct.pack("<I", value & 0xFFFFFFFF)
+
+
+def find_all(buf: Buffer, pattern: bytes) -> List[int]:
+    out: List[int] = []
+    pos = buf.find(pattern)
+    while pos != -1:
+        out.append(pos)
+        pos = buf.find(pattern, pos + 1)
+    return out
+
+
+def _hash(words: "np.ndarray") -> "np.ndarray":
+    return (words * np.uint32(_HASH_MUL)) >> np.uint32(32 - HASH_BITS)
+
+
+class ByteScanner:
+    """Compiled set of labelled byte patterns.
+
+    ``scan`` returns ``{label: [offsets]}`` with every label present, offsets
+    ascending. Labels that share a pattern get the same offsets.
+    """
+
+    def __init__(self, patterns: Mapping[Hashable, bytes]):
+        self.patterns: Dict[Hashable, bytes] = dict(patterns)
+        self._labels: Dict[bytes, List[Hashable]] = defaultdict(list)
+        for label, pat in self.patterns.items():
+            self._labels[bytes(pat)].append(label)
+        self._short = [p for p in self._labels if len(p) < PREFIX_LEN]
+        self._by_prefix: Dict[bytes, List[bytes]] = defaultdict(list)
+        for pat in self._labels:
+            if len(pat) >= PREFIX_LEN:
+                self._by_prefix[pat[:PREFIX_LEN]].append(pat)
+        self._table = None
+        if np is not None and self._by_prefix:
+            keys = np.array([int.from_bytes(p, "little") for p in self._by_prefix], dtype=np.uint32)
+            self._table = np.zeros(1 << HASH_BITS, dtype=bool)
+            self._table[_hash(keys)] = True
+
+    def _candidates(self, buf: Buffer) -> List[int]:
+        """Offsets whose u32 word hashes like one of the pattern prefixes."""
+        n = len(buf)
+        last = n - PREFIX_LEN  # last offset with a full word
+        out: List[int] = []
+        for start in range(0, last + 1, BLOCK_SIZE):
+            count = min(BLOCK_SIZE, last + 1 - start)
+            words = np.empty(count, dtype=np.uint32)
+            for k in range(PREFIX_LEN):
+                m = (count - k + PREFIX_LEN - 1) // PREFIX_LEN
+                if m > 0:
+                    words[k::PREFIX_LEN] = np.frombuffer(buf, dtype="<u4", count=m, offset=start + k)
+            hits = np.flatnonzero(self._table[_hash(words)])
+            out.extend((hits + start).tolist())
+        return out
+
+    def scan(self, buf: Buffer) -> Dict[Hashable, List[int]]:
+        found: Dict[bytes, List[int]] = {p: [] for p in self._labels}
+        if self._table is None:
+            for pat in self._labels:
+                found[pat] = find_all(buf, pat)
+        else:
+            for pos in self._candidates(buf):
+                for pat in self._by_prefix.get(bytes(buf[pos : pos + PREFIX_LEN]), ()):
+                    if buf[pos : pos + len(pat)] == pat:
+                        found[pat].append(pos)
+            for pat in self._short:
+                found[pat] = find_all(buf, pat)
+        return {label: found[bytes(pat)] for label, pat in self.patterns.items()}
+
+    def scan_path(self, path: Path) -> Dict[Hashable, List[int]]:
+        with Path(path).open("rb") as fh:
+            try:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file cannot be mapped
+                return self.scan(b"")
+            with mm:
+                return self.scan(mm)
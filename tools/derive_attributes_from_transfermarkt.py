@@ -1,22 +1,42 @@
 #!/usr/bin/env python
-"""Derive PCF-style player attributes from Transfermarkt squads/values."""
+"""Derive PCF-style player attributes from Transfermarkt squads/values.
+
+The derivation is incremental. Every player gets a hash of the inputs that
+decide its attributes (role group, market value, age and the global value
+range). A manifest next to the players CSV keeps that hash, the attributes
+and the provenance of each row. On a re-run only players whose hash changed
+are derived again, in one vectorized pass per role group (NumPy when
+installed).
+"""
 
 from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
 import json
 import math
+import time
 from collections import defaultdict
+from dataclasses import dataclass
 from pathlib import Path
 from statistics import mean
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: without NumPy each player is derived on its own
+    np = None
 
 
 DEFAULT_TM_JSON = Path(__file__).resolve().parent / "out" / "transfermarkt_teams.json"
 DEFAULT_MAPPING = Path(__file__).resolve().parent / "out" / "pcf55_transfermarkt_mapping.csv"
 DEFAULT_OUT_PLAYERS = Path(__file__).resolve().parent / "out" / "pcf55_derived_attributes.csv"
 DEFAULT_OUT_TEAMS = Path(__file__).resolve().parent / "out" / "pcf55_derived_team_strength.csv"
+# Bump when BASE or the derive formulas change so old manifests are ignored.
+MANIFEST_SCHEMA = 1
+
+ATTR_KEYS = ["VE", "RE", "AG", "CA", "ME", "PORTERO", "ENTRADA", "REGATE", "REMATE", "PASE", "TIRO"]
 
 
 def clamp(v: float, lo: int = 1, hi: int = 99) -> int:
@@ -95,7 +115,10 @@ def value_norm(v: float, lo: float, hi: float) -> float:
 
 
 def derive_attrs(position: str, market_value: float, age: int | None, lo: float, hi: float) -> Dict[str, int]:
-    grp = role_group(position)
+    return derive_group_attrs(role_group(position), market_value, age, lo, hi)
+
+
+def derive_group_attrs(grp: str, market_value: float, age: int | None, lo: float, hi: float) -> Dict[str, int]:
     b = BASE[grp]
     n = value_norm(market_value, lo, hi)
     boost = -12.0 + 28.0 * n
@@ -133,6 +156,110 @@ def derive_attrs(position: str, market_value: float, age: int | None, lo: float,
     }
 
 
+def _clamp_array(v: "np.ndarray") -> "np.ndarray":
+    # np.round rounds half to even, like round() in clamp().
+    return np.clip(np.round(v), 1, 99).astype(np.int64)
+
+
+def derive_group(
+    grp: str, market_values: List[float], ages: List[Optional[int]], lo: float, hi: float
+) -> List[Dict[str, int]]:
+    """derive_group_attrs for many players of one role group, as array ops."""
+    if np is None:
+        return [derive_group_attrs(grp, v, a, lo, hi) for v, a in zip(market_values, ages)]
+    b = BASE[grp]
+    # log10 stays math.log10 (via value_norm) so results match derive_attrs bit for bit.
+    boost = -12.0 + 28.0 * np.array([value_norm(v, lo, hi) for v in market_values], dtype=np.float64)
+    age_arr = np.array([np.nan if a is None else a for a in ages], dtype=np.float64)
+    age_adj = np.where(np.isnan(age_arr), 0.0, np.clip(-0.45 * np.abs(age_arr - 27), -8.0, 2.0))
+
+    cols = {
+        "VE": _clamp_array(b["VE"] + 0.34 * boost + 0.15 * age_adj),
+        "RE": _clamp_array(b["RE"] + 0.28 * boost + 0.20 * age_adj),
+        "AG": _clamp_array(b["AG"] + 0.22 * boost + 0.10 * age_adj),
+        "CA": _clamp_array(b["CA"] + 0.40 * boost + 0.20 * age_adj),
+        "PORTERO": _clamp_array(b["PORTERO"] + (0.65 if grp == "GK" else 0.10) * boost + 0.10 * age_adj),
+        "ENTRADA": _clamp_array(b["ENTRADA"] + 0.30 * boost + 0.05 * age_adj),
+        "REGATE": _clamp_array(b["REGATE"] + 0.36 * boost + 0.10 * age_adj),
+        "REMATE": _clamp_array(b["REMATE"] + 0.40 * boost + 0.08 * age_adj),
+        "PASE": _clamp_array(b["PASE"] + 0.34 * boost + 0.10 * age_adj),
+        "TIRO": _clamp_array(b["TIRO"] + 0.40 * boost + 0.08 * age_adj),
+    }
+    cols["ME"] = _clamp_array((cols["VE"] + cols["RE"] + cols["AG"] + cols["CA"]) / 4.0)
+    rows = zip(*(cols[k].tolist() for k in ATTR_KEYS))
+    return [dict(zip(ATTR_KEYS, values)) for values in rows]
+
+
+@dataclass
+class PlayerInput:
+    key: str
+    grp: str
+    market_value: float
+    age: Optional[int]
+
+
+def player_input(key: str, player: Dict[str, object]) -> PlayerInput:
+    age = player.get("age")
+    return PlayerInput(
+        key=key,
+        grp=role_group(str(player.get("position") or "")),
+        market_value=float(player.get("market_value_eur") or 0.0),
+        age=age if isinstance(age, int) else None,
+    )
+
+
+def input_hash(p: PlayerInput, lo: float, hi: float) -> str:
+    # The value range is global: when it moves, every player is derived again.
+    raw = json.dumps([MANIFEST_SCHEMA, p.grp, p.market_value, p.age, lo, hi])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def load_manifest(path: Path) -> Dict[str, Dict[str, object]]:
+    """{player_key: {"input_hash", "attrs", ...}}; empty if missing or stale."""
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if raw.get("schema") != MANIFEST_SCHEMA:
+        return {}
+    players = raw.get("players")
+    return players if isinstance(players, dict) else {}
+
+
+def save_manifest(path: Path, sources: Dict[str, object], players: Dict[str, Dict[str, object]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"schema": MANIFEST_SCHEMA, "sources": sources, "players": players}
+    path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+
+def derive_players(
+    inputs: List[PlayerInput], previous: Dict[str, Dict[str, object]], lo: float, hi: float
+) -> Tuple[Dict[str, Dict[str, int]], Dict[str, str], List[str]]:
+    """Attributes per player key, their input hashes and the keys derived again."""
+    attrs: Dict[str, Dict[str, int]] = {}
+    hashes: Dict[str, str] = {}
+    pending: Dict[str, List[PlayerInput]] = defaultdict(list)
+    for p in inputs:
+        hashes[p.key] = input_hash(p, lo, hi)
+        cached = previous.get(p.key)
+        if cached and cached.get("input_hash") == hashes[p.key] and isinstance(cached.get("attrs"), dict):
+            attrs[p.key] = cached["attrs"]
+        else:
+            pending[p.grp].append(p)
+
+    rederived: List[str] = []
+    for grp, group in pending.items():
+        derived = derive_group(grp, [p.market_value for p in group], [p.age for p in group], lo, hi)
+        for p, values in zip(group, derived):
+            attrs[p.key] = values
+            rederived.append(p.key)
+    return attrs, hashes, rederived
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--transfermarkt", type=Path, default=DEFAULT_TM_JSON)
@@ -140,6 +267,13 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--min-score", type=float, default=0.72)
     parser.add_argument("--out-players", type=Path, default=DEFAULT_OUT_PLAYERS)
     parser.add_argument("--out-teams", type=Path, default=DEFAULT_OUT_TEAMS)
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=None,
+        help="Per-player hashes/attributes/provenance (default: <out-players>.manifest.json)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the manifest and derive every player")
     return parser.parse_args()
 
 
@@ -160,6 +294,26 @@ def main() -> None:
 
     lo, hi = normalize_values(all_players_for_norm)
 
+    manifest_path = args.manifest or args.out_players.with_suffix(".manifest.json")
+    previous = {} if args.no_cache else load_manifest(manifest_path)
+    team_keys: List[List[str]] = []
+    inputs: List[PlayerInput] = []
+    seen: Dict[str, int] = defaultdict(int)
+    for row, team in selected_teams:
+        keys: List[str] = []
+        for player in team.get("squad", []):
+            key = f"{row['pcf_index']}|{team.get('team_name', '')}|{player.get('name', '')}"
+            seen[key] += 1
+            if seen[key] > 1:
+                key = f"{key}#{seen[key]}"
+            keys.append(key)
+            inputs.append(player_input(key, player))
+        team_keys.append(keys)
+    attrs_by_key, hashes, rederived = derive_players(inputs, previous, lo, hi)
+    now = time.strftime("%Y-%m-%dT%H:%M:%S")
+    fresh = set(rederived)
+    manifest_players: Dict[str, Dict[str, object]] = {}
+
     args.out_players.parent.mkdir(parents=True, exist_ok=True)
     args.out_teams.parent.mkdir(parents=True, exist_ok=True)
 
@@ -193,20 +347,24 @@ def main() -> None:
             ]
         )
 
-        for row, team in selected_teams:
+        for (row, team), keys in zip(selected_teams, team_keys):
             tm_team = str(team.get("team_name", ""))
             comp = str(team.get("competition", ""))
             pcf_index = int(row["pcf_index"])
             pcf_team = row["pcf_team"]
             team_value[tm_team] = float(team.get("squad_total_value_eur") or team.get("team_market_value_eur") or 0.0)
-            for player in team.get("squad", []):
-                attrs = derive_attrs(
-                    position=str(player.get("position") or ""),
-                    market_value=float(player.get("market_value_eur") or 0.0),
-                    age=player.get("age") if isinstance(player.get("age"), int) else None,
-                    lo=lo,
-                    hi=hi,
-                )
+            for key, player in zip(keys, team.get("squad", [])):
+                attrs = attrs_by_key[key]
+                manifest_players[key] = {
+                    "input_hash": hashes[key],
+                    "attrs": attrs,
+                    "pcf_index": pcf_index,
+                    "tm_team": tm_team,
+                    "competition": comp,
+                    "team_url": team.get("team_url", ""),
+                    "player_name": player.get("name", ""),
+                    "derived_at": now if key in fresh else previous[key].get("derived_at", now),
+                }
                 team_me[tm_team].append(attrs["ME"])
                 w.writerow(
                     [
@@ -249,10 +407,25 @@ def main() -> None:
                 ]
             )
 
+    save_manifest(
+        manifest_path,
+        {
+            "transfermarkt": str(args.transfermarkt),
+            "transfermarkt_sha256": file_sha256(args.transfermarkt),
+            "mapping": str(args.mapping),
+            "mapping_sha256": file_sha256(args.mapping),
+            "min_score": args.min_score,
+            "value_log10_range": [lo, hi],
+            "generated_at": now,
+        },
+        manifest_players,
+    )
+
     print(f"Teams used: {len(selected_teams)}")
-    print(f"Players written: {rows_out}")
+    print(f"Players written: {rows_out} (re-derived {len(rederived)}, unchanged {rows_out - len(rederived)})")
     print(f"Players CSV: {args.out_players}")
     print(f"Teams CSV  : {args.out_teams}")
+    print(f"Manifest   : {manifest_path}")
 
 
 if __name__ == "__main__":
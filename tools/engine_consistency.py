@@ -4,19 +4,24 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import csv
 import json
 import math
+import os
 import random
+import sys
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 DEFAULT_MAPPING = Path(__file__).resolve().parent / "out" / "pcf55_transfermarkt_mapping.csv"
 DEFAULT_TM_JSON = Path(__file__).resolve().parent / "out" / "transfermarkt_teams.json"
 DEFAULT_OUT_JSON = Path(__file__).resolve().parent / "out" / "engine_consistency_report.json"
 DEFAULT_OUT_CSV = Path(__file__).resolve().parent / "out" / "engine_strength_reference.csv"
+DEFAULT_OUT_POINTS_CSV = Path(__file__).resolve().parent / "out" / "engine_points_reference.csv"
+CLI_DIR = Path(__file__).resolve().parents[1] / "cli"
 
 
 @dataclass
@@ -179,6 +184,144 @@ def simulate_points(teams: List[TeamStrength], seed: int = 42) -> Dict[int, floa
     return points
 
 
+@dataclass
+class EnginePoints:
+    slot_id: int
+    team: str
+    competition: str
+    squad_value_eur: float
+    engine_strength: float
+    seasons: int
+    mean_points: float
+    sd_points: float
+    ci95_low: float
+    ci95_high: float
+
+
+# Per-process state for the real-engine mode (filled by _init_engine_worker).
+_ENGINE = None
+_LEAGUES: Dict[str, list] = {}
+
+
+def _init_engine_worker() -> None:
+    """
+    Import the CLI engine and memoize each team's starting XI and strength.
+    simulate_match stays the real one; it just stops re-sorting squads and
+    recomputing strength on every match (both are constant without tactics).
+    """
+    global _ENGINE, _LEAGUES
+    if _ENGINE is not None:
+        return
+    if str(CLI_DIR) not in sys.path:
+        sys.path.insert(0, str(CLI_DIR))
+    import pcfutbol_cli as engine
+
+    base_squad = engine._match_squad
+    base_strength = engine._calc_team_strength_android
+    squads: Dict[int, list] = {}
+    strengths: Dict[Tuple[int, bool], float] = {}
+
+    def match_squad(team):
+        if team.slot_id not in squads:
+            squads[team.slot_id] = base_squad(team)
+        return squads[team.slot_id]
+
+    def team_strength(team, tactic, is_home):
+        if tactic:
+            return base_strength(team, tactic, is_home)
+        key = (team.slot_id, bool(is_home))
+        if key not in strengths:
+            strengths[key] = base_strength(team, tactic, is_home)
+        return strengths[key]
+
+    engine._match_squad = match_squad
+    engine._calc_team_strength_android = team_strength
+    leagues: Dict[str, list] = {}
+    for team in engine.load_teams().values():
+        leagues.setdefault(team.comp, []).append(team)
+    _LEAGUES = {comp: sorted(teams, key=lambda t: t.slot_id) for comp, teams in leagues.items()}
+    _ENGINE = engine
+
+
+def _simulate_engine_season(job: Tuple[str, int]) -> Tuple[str, Dict[int, int]]:
+    """One full double round-robin season of a league through the real simulate_match."""
+    _init_engine_worker()
+    comp, seed = job
+    teams = _LEAGUES[comp]
+    points = {t.slot_id: 0 for t in teams}
+    for i, (home, away) in enumerate(_ENGINE.generate_fixtures(teams), start=1):
+        hg, ag = _ENGINE.simulate_match(home, away, seed ^ i)
+        if hg > ag:
+            points[home.slot_id] += 3
+        elif ag > hg:
+            points[away.slot_id] += 3
+        else:
+            points[home.slot_id] += 1
+            points[away.slot_id] += 1
+    return comp, points
+
+
+def simulate_engine_points(seeds: int, workers: int, comps: Optional[List[str]] = None) -> List[EnginePoints]:
+    """Monte Carlo seasons per league in a process pool: mean points and 95% CI per team."""
+    _init_engine_worker()
+    selected = [c for c in (comps or sorted(_LEAGUES)) if len(_LEAGUES.get(c, [])) >= 2]
+    jobs = [(comp, (k * 0x9E3779B1 + 12345) & 0xFFFFFFFF) for comp in selected for k in range(seeds)]
+    samples: Dict[int, List[int]] = {}
+    if workers > 1 and len(jobs) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_engine_worker) as pool:
+            results = list(pool.map(_simulate_engine_season, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        results = [_simulate_engine_season(job) for job in jobs]
+    for _, points in results:
+        for slot, pts in points.items():
+            samples.setdefault(slot, []).append(pts)
+
+    out: List[EnginePoints] = []
+    for comp in selected:
+        for team in _LEAGUES[comp]:
+            pts = samples.get(team.slot_id, [])
+            n = len(pts)
+            mean = sum(pts) / n if n else 0.0
+            sd = math.sqrt(sum((x - mean) ** 2 for x in pts) / (n - 1)) if n > 1 else 0.0
+            half = 1.96 * sd / math.sqrt(n) if n > 1 else 0.0
+            out.append(
+                EnginePoints(
+                    slot_id=team.slot_id,
+                    team=team.name,
+                    competition=comp,
+                    squad_value_eur=float(sum(p.market_value for p in team.players)),
+                    engine_strength=round(_ENGINE._calc_team_strength_android(team, None, False), 2),
+                    seasons=n,
+                    mean_points=round(mean, 2),
+                    sd_points=round(sd, 2),
+                    ci95_low=round(mean - half, 2),
+                    ci95_high=round(mean + half, 2),
+                )
+            )
+    return out
+
+
+def league_correlations(rows: List[EnginePoints]) -> Dict[str, float]:
+    """Spearman squad value vs mean points per league (points are not comparable across leagues)."""
+    by_comp: Dict[str, List[EnginePoints]] = {}
+    for row in rows:
+        by_comp.setdefault(row.competition, []).append(row)
+    return {
+        comp: round(spearman([r.squad_value_eur for r in items], [r.mean_points for r in items]), 4)
+        for comp, items in sorted(by_comp.items())
+    }
+
+
+def write_points_csv(rows: List[EnginePoints], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fields = list(EnginePoints.__dataclass_fields__)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        for row in sorted(rows, key=lambda r: (r.competition, -r.mean_points)):
+            w.writerow(asdict(row))
+
+
 def write_csv(rows: List[TeamStrength], path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8", newline="") as f:
@@ -217,6 +360,16 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--min-score", type=float, default=0.72)
     parser.add_argument("--out-json", type=Path, default=DEFAULT_OUT_JSON)
     parser.add_argument("--out-csv", type=Path, default=DEFAULT_OUT_CSV)
+    parser.add_argument("--out-points-csv", type=Path, default=DEFAULT_OUT_POINTS_CSV)
+    parser.add_argument(
+        "--engine",
+        choices=["real", "proxy"],
+        default="real",
+        help="real: Monte Carlo over the CLI simulate_match; proxy: legacy logistic model",
+    )
+    parser.add_argument("--seeds", type=int, default=40, help="simulated seasons per league (real engine)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--comps", nargs="*", default=None, help="leagues to simulate (real engine, default all)")
     return parser.parse_args()
 
 
@@ -231,9 +384,16 @@ def main() -> None:
     strength_vec = [s.strength_0_100 for s in strengths]
     corr_value_strength = spearman(value_vec, strength_vec) if strengths else 0.0
 
-    points = simulate_points(strengths) if strengths else {}
-    sim_points = [points[s.pcf_index] for s in strengths] if strengths else []
-    corr_value_points = spearman(value_vec, sim_points) if strengths else 0.0
+    engine_rows: List[EnginePoints] = []
+    per_league: Dict[str, float] = {}
+    if args.engine == "real":
+        engine_rows = simulate_engine_points(args.seeds, max(1, args.workers), args.comps)
+        per_league = league_correlations(engine_rows)
+        corr_value_points = sum(per_league.values()) / len(per_league) if per_league else 0.0
+    else:
+        points = simulate_points(strengths) if strengths else {}
+        sim_points = [points[s.pcf_index] for s in strengths] if strengths else []
+        corr_value_points = spearman(value_vec, sim_points) if strengths else 0.0
 
     report = {
         "engine_logic_reference": {
@@ -249,6 +409,11 @@ def main() -> None:
             "unique_teams_after_dedupe": len(unique_rows),
             "duplicate_mappings_dropped": len(dupes),
         },
+        "simulation": {
+            "engine": args.engine,
+            "seasons_per_league": args.seeds if args.engine == "real" else 1,
+            "spearman_value_vs_points_by_league": per_league,
+        },
         "correlations": {
             "spearman_value_vs_strength": round(corr_value_strength, 4),
             "spearman_value_vs_simulated_points": round(corr_value_points, 4),
@@ -267,11 +432,14 @@ def main() -> None:
             for r in dupes
         ],
         "strength_rows": [asdict(s) for s in strengths],
+        "engine_points_rows": [asdict(r) for r in engine_rows],
     }
 
     args.out_json.parent.mkdir(parents=True, exist_ok=True)
     args.out_json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
     write_csv(strengths, args.out_csv)
+    if engine_rows:
+        write_points_csv(engine_rows, args.out_points_csv)
 
     print(f"Mapped rows: {len(mapped)}")
     print(f"Unique teams: {len(unique_rows)}")
@@ -280,6 +448,8 @@ def main() -> None:
     print(f"Spearman value vs simulated points: {corr_value_points:.4f}")
     print(f"JSON: {args.out_json}")
     print(f"CSV : {args.out_csv}")
+    if engine_rows:
+        print(f"Engine points CSV: {args.out_points_csv} ({len(engine_rows)} teams, {args.seeds} seasons/league)")
 
 
 if __name__ == "__main__":
@@ -7,10 +7,12 @@ import argparse
 import csv
 import json
 import re
-import struct
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+from pkf_container import PkfFile, Pointer
+from pkf_text import decode_bytes
 
 
 DEFAULT_PKF = (
@@ -23,6 +25,16 @@ DEFAULT_PKF = (
 )
 
 PLAUSIBLE_TEXT_RE = re.compile(r"^[A-Za-z0-9À-ÿ][A-Za-z0-9À-ÿ '\-.,()/&]{1,64}$")
+# Characters PLAUSIBLE_TEXT_RE allows that are not letters (str.isalpha).
+_NON_LETTERS = str.maketrans("", "", "0123456789 '-.,()/&\u00d7\u00f7")
+# cp1252 bytes that can appear in a plausible text: PLAUSIBLE_TEXT_RE's
+# characters plus NUL and whitespace (only valid at the ends, before strip()).
+_TEXT_BYTES = (
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 '-.,()/&"
+    + bytes(range(0xC0, 0x100))
+    + b"\x00\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f\xa0"
+)
+_PREFIX_RE_CACHE: Dict[int, "re.Pattern[bytes]"] = {}
 GENERIC_BLOCKLIST = {
     "patrocinador",
     "proveedor",
@@ -45,14 +57,6 @@ CLUB_HINTS = (
 )
 
 
-@dataclass
-class Pointer:
-    index: int
-    start: int
-    size: int
-    uid_hex: str
-
-
 @dataclass
 class Candidate:
     pos: int
@@ -79,76 +83,6 @@ class ExtractedTeam:
     candidates: List[Candidate]
 
 
-def bijective(b: int) -> int:
-    if b < 32:
-        return b + 97 if (b & 1) == 0 else b + 95
-    if b < 64:
-        return b + 33 if (b & 1) == 0 else b + 31
-    if b < 96:
-        return b - 31 if (b & 1) == 0 else b - 33
-    if b < 128:
-        return b - 95 if (b & 1) == 0 else b - 97
-    if b < 160:
-        return b + 97 if (b & 1) == 0 else b + 95
-    if b < 192:
-        return b + 33 if (b & 1) == 0 else b + 31
-    if b < 224:
-        return b - 31 if (b & 1) == 0 else b - 33
-    return b - 95 if (b & 1) == 0 else b - 97
-
-
-def decode_pcx_text(raw: bytes) -> str:
-    decoded = bytes(bijective(b) for b in raw)
-    return decoded.decode("cp1252", errors="replace")
-
-
-def parse_pointers(blob: bytes) -> List[Pointer]:
-    pointers: List[Pointer] = []
-    i = 232
-    idx = 1
-    offset = 232
-
-    while i < len(blob):
-        b = blob[i]
-        if b == 0x04:
-            if i + 5 > len(blob):
-                break
-            jump_to = struct.unpack_from("<I", blob, i + 1)[0]
-            i += 5
-            skip = jump_to - offset - 5
-            if skip < 0:
-                raise ValueError(f"Invalid pointer jump at {i}: skip={skip}")
-            i += skip
-            offset = jump_to
-            continue
-
-        if b == 0x02:
-            if i + 38 > len(blob):
-                break
-            uid = blob[i + 5 : i + 9]
-            start = struct.unpack_from("<I", blob, i + 26)[0]
-            size = struct.unpack_from("<I", blob, i + 30)[0]
-            pointers.append(
-                Pointer(
-                    index=idx,
-                    start=start,
-                    size=size,
-                    uid_hex=uid.hex(" "),
-                )
-            )
-            i += 38
-            idx += 1
-            offset += 38
-            continue
-
-        if b == 0x05 and blob[i + 1 : i + 5] == b"\x00\x00\x00\x00":
-            break
-
-        i += 1
-
-    return pointers
-
-
 def normalize(s: str) -> str:
     return re.sub(r"\s+", " ", s.strip().lower())
 
@@ -159,24 +93,52 @@ def is_plausible_text(s: str) -> bool:
         return False
     if not PLAUSIBLE_TEXT_RE.match(s):
         return False
-    letters = sum(ch.isalpha() for ch in s)
+    letters = len(s.translate(_NON_LETTERS))
     return letters >= max(2, int(len(s) * 0.35))
 
 
+def _length_prefix_re(max_len: int) -> "re.Pattern[bytes]":
+    """Offsets holding a u16 LE length in [2, max_len] (lookahead: overlapping)."""
+    if max_len >= 256:
+        return re.compile(rb"(?=[\s\S]{2})")
+    return re.compile(rb"(?=[\x02-%s]\x00)" % re.escape(bytes([max(2, max_len)])))
+
+
 def scan_candidates(chunk: bytes, max_scan: int = 260, max_len: int = 64) -> List[Candidate]:
+    """Length-prefixed plausible strings at the start of a team chunk.
+
+    Same greedy walk as a byte-by-byte scan (an accepted string is skipped
+    over), but only offsets whose u16 prefix is a valid length are visited:
+    they come from one compiled byte regex, and a byte-set check on the
+    decoded window discards most of them before any str decoding.
+    """
     out: List[Candidate] = []
-    pos = 0
-    limit = min(max_scan, max(0, len(chunk) - 2))
-
-    while pos < limit:
-        n = chunk[pos] | (chunk[pos + 1] << 8)
-        if 2 <= n <= max_len and pos + 2 + n <= len(chunk):
-            text = decode_pcx_text(chunk[pos + 2 : pos + 2 + n]).replace("\x00", " ").strip()
-            if is_plausible_text(text):
-                out.append(Candidate(pos=pos, length=n, text=text))
-                pos += 2 + n
-                continue
-        pos += 1
+    size = len(chunk)
+    limit = min(max_scan, max(0, size - 2))
+    if max_len < 2 or limit <= 0:
+        return out
+    rx = _PREFIX_RE_CACHE.get(max_len)
+    if rx is None:
+        rx = _PREFIX_RE_CACHE[max_len] = _length_prefix_re(max_len)
+    head = bytes(chunk[: limit + 1])
+    # Decode the whole scan window once; candidates are slices of it.
+    window = decode_bytes(chunk[: limit + 2 + max_len])
+
+    next_pos = 0
+    for m in rx.finditer(head, 0, limit + 1):
+        pos = m.start()
+        if pos < next_pos or pos >= limit:
+            continue
+        n = head[pos] | (head[pos + 1] << 8)
+        if not (2 <= n <= max_len) or pos + 2 + n > size:
+            continue
+        raw = window[pos + 2 : pos + 2 + n]
+        if raw.translate(None, _TEXT_BYTES):
+            continue
+        text = raw.decode("cp1252", errors="replace").replace("\x00", " ").strip()
+        if is_plausible_text(text):
+            out.append(Candidate(pos=pos, length=n, text=text))
+            next_pos = pos + 2 + n
 
     return out
 
@@ -248,37 +210,35 @@ def pick_fields(candidates: List[Candidate]) -> tuple[Optional[Candidate], Optio
 
 
 def extract(pkf_path: Path, max_scan: int) -> List[ExtractedTeam]:
-    blob = pkf_path.read_bytes()
-    pointers = parse_pointers(blob)
-
     teams: List[ExtractedTeam] = []
-    for ptr in pointers:
-        chunk = blob[ptr.start : ptr.start + ptr.size]
-        candidates = scan_candidates(chunk, max_scan=max_scan)
-        team, stadium, full_name, confidence = pick_fields(candidates)
-
-        teams.append(
-            ExtractedTeam(
-                index=ptr.index,
-                start=ptr.start,
-                size=ptr.size,
-                uid_hex=ptr.uid_hex,
-                team_name=team.text if team else "",
-                team_pos=team.pos if team else None,
-                team_len=team.length if team else None,
-                stadium_name=stadium.text if stadium else "",
-                stadium_pos=stadium.pos if stadium else None,
-                stadium_len=stadium.length if stadium else None,
-                full_name=full_name.text if full_name else "",
-                full_pos=full_name.pos if full_name else None,
-                full_len=full_name.length if full_name else None,
-                confidence=confidence,
-                candidates=candidates[:10],
-            )
-        )
+    with PkfFile(pkf_path, strict=True) as pkf:
+        for ptr, chunk in pkf.records():
+            teams.append(extract_team(ptr, chunk, max_scan))
     return teams
 
 
+def extract_team(ptr: Pointer, chunk: memoryview, max_scan: int) -> ExtractedTeam:
+    candidates = scan_candidates(chunk, max_scan=max_scan)
+    team, stadium, full_name, confidence = pick_fields(candidates)
+    return ExtractedTeam(
+        index=ptr.index,
+        start=ptr.start,
+        size=ptr.size,
+        uid_hex=ptr.uid_hex,
+        team_name=team.text if team else "",
+        team_pos=team.pos if team else None,
+        team_len=team.length if team else None,
+        stadium_name=stadium.text if stadium else "",
+        stadium_pos=stadium.pos if stadium else None,
+        stadium_len=stadium.length if stadium else None,
+        full_name=full_name.text if full_name else "",
+        full_pos=full_name.pos if full_name else None,
+        full_len=full_name.length if full_name else None,
+        confidence=confidence,
+        candidates=candidates[:10],
+    )
+
+
 def write_outputs(teams: List[ExtractedTeam], out_dir: Path) -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
     json_path = out_dir / "pcf55_teams_extracted.json"
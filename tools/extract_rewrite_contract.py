@@ -5,10 +5,11 @@ from __future__ import annotations
 
 import argparse
 import json
-import re
 from pathlib import Path
 from typing import Dict, List
 
+from binary_strings import count_literals
+
 
 DEFAULT_INVENTORY = Path(__file__).resolve().parent / "out" / "reverse_full_game.json"
 DEFAULT_MANDOS = Path(__file__).resolve().parents[2] / "PCF55" / "FUTBOL5" / "FUTBOL5" / "MANDOS.DAT"
@@ -73,13 +74,8 @@ def extract_strings(path: Path) -> List[str]:
 
 
 def count_tokens(strings: List[str], tokens: List[str]) -> Dict[str, int]:
-    joined = "\x00".join(strings)
-    out: Dict[str, int] = {}
-    for t in tokens:
-        c = len(re.findall(re.escape(t), joined))
-        if c > 0:
-            out[t] = c
-    return out
+    counts = count_literals("\x00".join(strings), tokens)
+    return {t: c for t, c in counts.items() if c > 0}
 
 
 def filter_paths(strings: List[str]) -> Dict[str, List[str]]:
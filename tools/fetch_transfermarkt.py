@@ -1,24 +1,32 @@
 ﻿#!/usr/bin/env python
-"""Fetch Transfermarkt competition and squad data for a season."""
+"""Fetch Transfermarkt competition and squad data for a season.
+
+Pages go through a persistent HTTP cache (see ``http_cache.py``): a refresh
+revalidates every page with its ETag / Last-Modified and only downloads the
+ones that changed, and ``--replay`` rebuilds the JSON from the cache alone.
+Requests run in a small worker pool behind a shared token-bucket limiter.
+"""
 
 from __future__ import annotations
 
 import argparse
 import json
 import re
-import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from typing import Dict, List, Optional
 from urllib.parse import urljoin
 
-import requests
 from bs4 import BeautifulSoup, Tag
 
+from http_cache import CachedFetcher, HttpCache, TokenBucket
+
 
 BASE_URL = "https://www.transfermarkt.com"
 DEFAULT_COMPETITIONS = ["ES1", "ES2"]
 DEFAULT_SEASON = 2025  # season 2025/2026
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / "out" / "http_cache"
 
 COMPETITION_SLUGS = {
     "ES1": "laliga",
@@ -87,15 +95,13 @@ def text_or_empty(node: Optional[Tag]) -> str:
     return node.get_text(" ", strip=True)
 
 
-def get_soup(session: requests.Session, url: str) -> BeautifulSoup:
-    res = session.get(url, timeout=30)
-    res.raise_for_status()
-    return BeautifulSoup(res.text, "html.parser")
+def get_soup(fetcher: CachedFetcher, url: str) -> BeautifulSoup:
+    return BeautifulSoup(fetcher.get_text(url), "html.parser")
 
 
-def build_competition_url(comp: str, season: int) -> str:
+def build_competition_url(comp: str, season: int, base_url: str = BASE_URL) -> str:
     slug = COMPETITION_SLUGS.get(comp.upper(), comp.lower())
-    return f"{BASE_URL}/{slug}/startseite/wettbewerb/{comp}?saison_id={season}"
+    return f"{base_url}/{slug}/startseite/wettbewerb/{comp}?saison_id={season}"
 
 
 def extract_team_market_value(row: Tag) -> str:
@@ -105,7 +111,9 @@ def extract_team_market_value(row: Tag) -> str:
             return value
     return ""
 
-def parse_competition_teams(soup: BeautifulSoup, competition: str) -> List[Dict[str, str]]:
+def parse_competition_teams(
+    soup: BeautifulSoup, competition: str, base_url: str = BASE_URL
+) -> List[Dict[str, str]]:
     teams: List[Dict[str, str]] = []
     for row in soup.select("table.items tbody tr"):
         classes = row.get("class", [])
@@ -124,7 +132,7 @@ def parse_competition_teams(soup: BeautifulSoup, competition: str) -> List[Dict[
             continue
 
         name = (anchor.get("title") or anchor.get_text(" ", strip=True)).strip()
-        team_url = urljoin(BASE_URL, href)
+        team_url = urljoin(base_url, href)
         mv_text = extract_team_market_value(row)
         teams.append(
             {
@@ -137,12 +145,12 @@ def parse_competition_teams(soup: BeautifulSoup, competition: str) -> List[Dict[
     return teams
 
 
-def build_squad_url(team_url: str, season: int) -> str:
+def build_squad_url(team_url: str, season: int, base_url: str = BASE_URL) -> str:
     m = re.search(r"/([^/]+)/startseite/verein/([0-9]+)", team_url)
     if not m:
         return team_url
     slug, club_id = m.group(1), m.group(2)
-    return f"{BASE_URL}/{slug}/kader/verein/{club_id}/saison_id/{season}/plus/1"
+    return f"{base_url}/{slug}/kader/verein/{club_id}/saison_id/{season}/plus/1"
 
 
 def parse_stadium_meta(soup: BeautifulSoup) -> tuple[str, Optional[int]]:
@@ -251,14 +259,16 @@ def parse_squad_players(soup: BeautifulSoup) -> List[Player]:
         )
     return players
 
-def fetch_team(session: requests.Session, team_row: Dict[str, str], season: int, sleep_sec: float) -> Team:
-    squad_url = build_squad_url(team_row["team_url"], season)
-    soup = get_soup(session, squad_url)
+def fetch_team(
+    fetcher: CachedFetcher, team_row: Dict[str, str], season: int, base_url: str = BASE_URL
+) -> Team:
+    squad_url = build_squad_url(team_row["team_url"], season, base_url)
+    soup = get_soup(fetcher, squad_url)
     stadium_name, stadium_capacity = parse_stadium_meta(soup)
     squad = parse_squad_players(soup)
     squad_total = sum(p.market_value_eur or 0.0 for p in squad)
 
-    team = Team(
+    return Team(
         competition=team_row["competition"],
         team_name=team_row["team_name"],
         team_url=team_row["team_url"],
@@ -270,28 +280,34 @@ def fetch_team(session: requests.Session, team_row: Dict[str, str], season: int,
         squad_total_value_eur=squad_total,
     )
 
-    if sleep_sec > 0:
-        time.sleep(sleep_sec)
-    return team
-
 
-def fetch_all(competitions: List[str], season: int, sleep_sec: float) -> Dict[str, object]:
-    session = requests.Session()
-    session.headers.update(HEADERS)
+def fetch_all(
+    competitions: List[str],
+    season: int,
+    fetcher: CachedFetcher,
+    workers: int = 4,
+    base_url: str = BASE_URL,
+) -> Dict[str, object]:
+    def fetch_rows(comp: str) -> List[Dict[str, str]]:
+        soup = get_soup(fetcher, build_competition_url(comp, season, base_url))
+        return parse_competition_teams(soup, comp, base_url)
 
     all_teams: List[Team] = []
-    for comp in competitions:
-        url = build_competition_url(comp, season)
-        soup = get_soup(session, url)
-        rows = parse_competition_teams(soup, comp)
-        print(f"[{comp}] teams on page: {len(rows)}")
-        for n, row in enumerate(rows, start=1):
-            print(f"  - ({n}/{len(rows)}) {row['team_name']}")
-            try:
-                team = fetch_team(session, row, season, sleep_sec=sleep_sec)
-                all_teams.append(team)
-            except Exception as exc:  # noqa: BLE001
-                print(f"    ! failed: {exc}")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        comp_rows = list(pool.map(fetch_rows, competitions))
+        # Every squad page is queued up front; results are read back in page order.
+        jobs = [
+            [(row, pool.submit(fetch_team, fetcher, row, season, base_url)) for row in rows]
+            for rows in comp_rows
+        ]
+        for comp, comp_jobs in zip(competitions, jobs):
+            print(f"[{comp}] teams on page: {len(comp_jobs)}")
+            for n, (row, job) in enumerate(comp_jobs, start=1):
+                print(f"  - ({n}/{len(comp_jobs)}) {row['team_name']}")
+                try:
+                    all_teams.append(job.result())
+                except Exception as exc:  # noqa: BLE001
+                    print(f"    ! failed: {exc}")
 
     payload = {
         "source": "transfermarkt",
@@ -320,7 +336,23 @@ def parse_args() -> argparse.Namespace:
         "--sleep-sec",
         type=float,
         default=0.35,
-        help="Delay between team requests",
+        help="Mean delay between network requests (token-bucket rate = 1/sleep-sec, 0 = unlimited)",
+    )
+    parser.add_argument("--burst", type=int, default=2, help="Requests allowed back to back before the rate applies")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent requests")
+    parser.add_argument("--base-url", default=BASE_URL, help="Site root (e.g. a local stand-in server)")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR, help="Persistent HTTP cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the HTTP cache")
+    parser.add_argument(
+        "--cache-max-age",
+        type=float,
+        default=0.0,
+        help="Serve cached pages younger than this many seconds without revalidating them",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Serve every page from the cache, never touch the network (fails on a cache miss)",
     )
     parser.add_argument(
         "--out",
@@ -333,7 +365,28 @@ def parse_args() -> argparse.Namespace:
 
 def main() -> None:
     args = parse_args()
-    payload = fetch_all(args.competitions, args.season, args.sleep_sec)
+    if args.replay and args.no_cache:
+        raise SystemExit("--replay needs the cache (drop --no-cache)")
+    cache = None if args.no_cache else HttpCache(args.cache_dir)
+    rate = 1.0 / args.sleep_sec if args.sleep_sec > 0 else 0.0
+    fetcher = CachedFetcher(
+        cache,
+        headers=HEADERS,
+        bucket=TokenBucket(rate, args.burst),
+        replay=args.replay,
+        max_age=args.cache_max_age,
+    )
+    try:
+        payload = fetch_all(args.competitions, args.season, fetcher, args.workers, args.base_url.rstrip("/"))
+    finally:
+        if cache is not None and not args.replay:
+            cache.save()
+    stats = fetcher.stats
+    print(
+        "HTTP: "
+        f"downloaded={stats['downloaded']}, not_modified={stats['not_modified']}, "
+        f"fresh={stats['fresh']}, replayed={stats['replayed']}"
+    )
     args.out.parent.mkdir(parents=True, exist_ok=True)
     args.out.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"Wrote {args.out}")
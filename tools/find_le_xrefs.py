@@ -5,10 +5,10 @@ from __future__ import annotations
 
 import argparse
 import json
-import struct
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from byte_scan import ByteScanner, dword
 from reverse_le import LeInfo, parse_le
 
 
@@ -29,25 +29,6 @@ def file_off_to_va(info: LeInfo, off: int) -> Optional[int]:
     return None
 
 
-def find_ascii(blob: bytes, needle: bytes) -> List[int]:
-    out: List[int] = []
-    i = blob.find(needle)
-    while i != -1:
-        out.append(i)
-        i = blob.find(needle, i + 1)
-    return out
-
-
-def find_dword(blob: bytes, value: int) -> List[int]:
-    key = struct.pack("<I", value & 0xFFFFFFFF)
-    out: List[int] = []
-    i = blob.find(key)
-    while i != -1:
-        out.append(i)
-        i = blob.find(key, i + 1)
-    return out
-
-
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description=__doc__)
     p.add_argument("--file", type=Path, default=DEFAULT_FILE, help="LE binary to analyze.")
@@ -71,28 +52,32 @@ def parse_args() -> argparse.Namespace:
 
 def main() -> None:
     args = parse_args()
-    blob = args.file.read_bytes()
     info = parse_le(args.file)
 
     anchors: Dict[str, List[Dict[str, int]]] = {}
     xrefs: Dict[str, List[Dict[str, int]]] = {}
 
+    # One pass for every anchor string, then one pass for every anchor VA.
+    anchor_patterns = {pat: pat.encode("cp1252", errors="replace") for pat in args.patterns}
+    anchor_hits = ByteScanner(anchor_patterns).scan_path(args.file)
     for pat in args.patterns:
-        pat_b = pat.encode("cp1252", errors="replace")
-        offs = find_ascii(blob, pat_b)
         rows: List[Dict[str, int]] = []
-        for off in offs:
+        for off in anchor_hits[pat]:
             va = file_off_to_va(info, off)
             if va is None:
                 continue
             rows.append({"file_offset": off, "va": va})
         anchors[pat] = rows
 
+    target_vas = sorted({int(r["va"]) for rows in anchors.values() for r in rows})
+    va_hits = ByteScanner({va: dword(va) for va in target_vas}).scan_path(args.file)
+
+    for pat in args.patterns:
         xr_rows: List[Dict[str, int]] = []
         seen = set()
-        for r in rows:
+        for r in anchors[pat]:
             va = int(r["va"])
-            ref_offs = find_dword(blob, va)
+            ref_offs = va_hits[va]
             for ref in ref_offs:
                 if ref == int(r["file_offset"]):
                     continue
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+"""Persistent HTTP cache, rate limiting and replay for the web fetchers.
+
+- Response bodies are stored content-addressed (``objects/ab/<sha256>``);
+  ``index.json`` maps every URL to its body hash and validators.
+- Cached URLs are revalidated with If-None-Match / If-Modified-Since, so a
+  refresh only downloads the pages that changed (304 -> cached body).
+- ``TokenBucket`` bounds the request rate shared by all worker threads.
+- In replay mode nothing goes to the network: every URL must be cached.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+
+
+INDEX_SCHEMA = 1
+
+
+class CacheMiss(LookupError):
+    pass
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second, bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    sha256: str
+    encoding: str
+    etag: str
+    last_modified: str
+    fetched_at: float
+
+
+class HttpCache:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+        self.entries: Dict[str, CacheEntry] = {}
+        try:
+            raw = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raw = {}
+        if raw.get("schema") == INDEX_SCHEMA:
+            for url, row in (raw.get("entries") or {}).items():
+                try:
+                    self.entries[url] = CacheEntry(**row)
+                except TypeError:
+                    continue
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self.entries.get(url)
+        if entry is None or not self.object_path(entry.sha256).exists():
+            return None
+        return entry
+
+    def body(self, entry: CacheEntry) -> bytes:
+        return self.object_path(entry.sha256).read_bytes()
+
+    def text(self, entry: CacheEntry) -> str:
+        return self.body(entry).decode(entry.encoding or "utf-8", errors="replace")
+
+    def put(self, url: str, body: bytes, encoding: str, etag: str, last_modified: str) -> CacheEntry:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+        entry = CacheEntry(url, digest, encoding, etag, last_modified, time.time())
+        with self._lock:
+            self.entries[url] = entry
+        return entry
+
+    def touch(self, url: str) -> None:
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is not None:
+                entry.fetched_at = time.time()
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = {
+                "schema": INDEX_SCHEMA,
+                "entries": {url: asdict(e) for url, e in sorted(self.entries.items())},
+            }
+        tmp = self.index_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+
+class CachedFetcher:
+    """GET through the cache; safe to share between worker threads.
+
+    `max_age` (seconds) serves recent entries without revalidating them.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[HttpCache],
+        headers: Optional[Dict[str, str]] = None,
+        bucket: Optional[TokenBucket] = None,
+        replay: bool = False,
+        max_age: float = 0.0,
+        timeout: float = 30.0,
+    ):
+        if replay and cache is None:
+            raise ValueError("replay mode needs a cache")
+        self.cache = cache
+        self.headers = dict(headers or {})
+        self.bucket = bucket or TokenBucket(0.0)
+        self.replay = replay
+        self.max_age = max_age
+        self.timeout = timeout
+        self.stats: Counter = Counter()
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get_text(self, url: str) -> str:
+        entry = self.cache.get(url) if self.cache is not None else None
+        if self.replay:
+            if entry is None:
+                raise CacheMiss(url)
+            self._count("replayed")
+            return self.cache.text(entry)
+        if entry is not None and self.max_age > 0 and time.time() - entry.fetched_at < self.max_age:
+            self._count("fresh")
+            return self.cache.text(entry)
+
+        conditional: Dict[str, str] = {}
+        if entry is not None:
+            if entry.etag:
+                conditional["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                conditional["If-Modified-Since"] = entry.last_modified
+        self.bucket.acquire()
+        res = self._session().get(url, headers=conditional, timeout=self.timeout)
+        if res.status_code == 304 and entry is not None:
+            self.cache.touch(url)
+            self._count("not_modified")
+            return self.cache.text(entry)
+        res.raise_for_status()
+        self._count("downloaded")
+        encoding = res.encoding or res.apparent_encoding or "utf-8"
+        if self.cache is not None:
+            self.cache.put(
+                url,
+                res.content,
+                encoding,
+                res.headers.get("ETag", ""),
+                res.headers.get("Last-Modified", ""),
+            )
+        return res.content.decode(encoding, errors="replace")
@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+"""Shared zero-copy reader for PCF55 .PKF containers.
+
+A PKF file starts with a pointer table at offset 232:
+
+- ``0x02`` + 37 bytes: pointer entry (uid at +5, record start at +26 and
+  record size at +30, both u32 LE);
+- ``0x04`` + u32: jump, the table continues at that absolute offset;
+- ``0x05 00 00 00 00``: end of table.
+
+`PkfFile` maps the file with mmap, parses the table once and exposes every
+record as a memoryview slice, so tools only touch the bytes they read. The
+parsed table is cached in a small binary sidecar under ``tools/out/ptrindex``
+keyed by the file size and mtime, so the game directory is never written and
+an unchanged file is never walked (or hashed) twice.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+
+PKF_TABLE_START = 232
+POINTER_ENTRY_SIZE = 38
+INDEX_SCHEMA = 2
+INDEX_SUFFIX = ".ptrindex"
+INDEX_MAGIC = b"PKFX"
+INDEX_DIR = Path(__file__).resolve().parent / "out" / "ptrindex"
+# magic, schema, size, mtime_ns, table_end, jumps, bad_jump_at (-1 = none), count
+_INDEX_HEAD = struct.Struct("<4sHQqIIiI")
+# start, size, entry_off, uid
+_INDEX_ROW = struct.Struct("<III4s")
+
+_MARKER_RE = re.compile(rb"[\x02\x04\x05]")
+_END_MARK = b"\x00\x00\x00\x00"
+_NONZERO_RE = re.compile(rb"[^\x00]+")
+
+
+class PkfError(ValueError):
+    pass
+
+
+@dataclass
+class Pointer:
+    index: int
+    start: int
+    size: int
+    entry_off: int
+    uid: bytes
+
+    @property
+    def end(self) -> int:
+        return self.start + self.size
+
+    @property
+    def uid_hex(self) -> str:
+        return self.uid.hex(" ")
+
+
+@dataclass
+class PointerTable:
+    pointers: List[Pointer]
+    table_end: int
+    jumps: int
+    # Offset of a backwards jump that stopped the walk (corrupt table).
+    bad_jump_at: Optional[int] = None
+    _by_index: Optional[Dict[int, Pointer]] = field(default=None, repr=False)
+
+    @property
+    def by_index(self) -> Dict[int, Pointer]:
+        if self._by_index is None:
+            self._by_index = {p.index: p for p in self.pointers}
+        return self._by_index
+
+    def pack(self, key: Tuple[int, int]) -> bytes:
+        bad = -1 if self.bad_jump_at is None else self.bad_jump_at
+        head = _INDEX_HEAD.pack(
+            INDEX_MAGIC, INDEX_SCHEMA, *key, self.table_end, self.jumps, bad, len(self.pointers)
+        )
+        return head + b"".join(_INDEX_ROW.pack(p.start, p.size, p.entry_off, p.uid) for p in self.pointers)
+
+    @classmethod
+    def unpack(cls, raw: bytes, key: Tuple[int, int]) -> Optional["PointerTable"]:
+        if len(raw) < _INDEX_HEAD.size:
+            return None
+        magic, schema, size, mtime_ns, table_end, jumps, bad, count = _INDEX_HEAD.unpack_from(raw)
+        if magic != INDEX_MAGIC or schema != INDEX_SCHEMA or (size, mtime_ns) != key:
+            return None
+        if len(raw) != _INDEX_HEAD.size + count * _INDEX_ROW.size:
+            return None
+        pointers = [
+            Pointer(idx, start, size, entry_off, uid)
+            for idx, (start, size, entry_off, uid) in enumerate(
+                _INDEX_ROW.iter_unpack(raw[_INDEX_HEAD.size :]), start=1
+            )
+        ]
+        return cls(pointers=pointers, table_end=table_end, jumps=jumps, bad_jump_at=None if bad < 0 else bad)
+
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+def parse_pointer_table(blob: Buffer) -> PointerTable:
+    """Walk the pointer table of a whole PKF buffer."""
+    pointers: List[Pointer] = []
+    n = len(blob)
+    i = PKF_TABLE_START
+    idx = 1
+    offset = PKF_TABLE_START
+    table_end = PKF_TABLE_START
+    jumps = 0
+    bad_jump_at = None
+
+    while i < n:
+        b = blob[i]
+        if b == 0x04:
+            if i + 5 > n:
+                break
+            jump_to = struct.unpack_from("<I", blob, i + 1)[0]
+            i += 5
+            skip = jump_to - offset - 5
+            if skip < 0:
+                bad_jump_at = i
+                break
+            i += skip
+            offset = jump_to
+            jumps += 1
+            table_end = max(table_end, i)
+            continue
+
+        if b == 0x02:
+            if i + POINTER_ENTRY_SIZE > n:
+                break
+            start, size = struct.unpack_from("<II", blob, i + 26)
+            uid = bytes(blob[i + 5 : i + 9])
+            pointers.append(Pointer(index=idx, start=start, size=size, entry_off=i, uid=uid))
+            i += POINTER_ENTRY_SIZE
+            idx += 1
+            offset += POINTER_ENTRY_SIZE
+            table_end = max(table_end, i)
+            continue
+
+        if b == 0x05 and bytes(blob[i + 1 : i + 5]) == _END_MARK:
+            table_end = max(table_end, i + 5)
+            break
+
+        # Filler bytes: jump straight to the next possible marker.
+        m = _MARKER_RE.search(blob, i + 1)
+        if m is None:
+            break
+        i = m.start()
+
+    return PointerTable(pointers=pointers, table_end=table_end, jumps=jumps, bad_jump_at=bad_jump_at)
+
+
+def parse_pointers(blob: Buffer, strict: bool = False) -> List[Pointer]:
+    table = parse_pointer_table(blob)
+    if strict:
+        check_table(table)
+    return table.pointers
+
+
+def check_table(table: PointerTable) -> None:
+    if table.bad_jump_at is not None:
+        raise PkfError(f"Invalid pointer jump at {table.bad_jump_at}")
+
+
+def index_path(path: Path) -> Path:
+    """Sidecar for ``path`` under INDEX_DIR; the hashed absolute path keeps same-named files apart."""
+    tag = hashlib.sha1(str(Path(path).resolve()).encode("utf-8")).hexdigest()[:12]
+    return INDEX_DIR / f"{Path(path).name}.{tag}{INDEX_SUFFIX}"
+
+
+def load_cached_table(path: Path, key: Tuple[int, int]) -> Optional[PointerTable]:
+    try:
+        raw = index_path(path).read_bytes()
+    except OSError:
+        return None
+    return PointerTable.unpack(raw, key)
+
+
+def store_cached_table(path: Path, key: Tuple[int, int], table: PointerTable) -> None:
+    target = index_path(path)
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(table.pack(key))
+    except OSError:
+        pass  # the index is only a cache
+
+
+class PkfFile:
+    """Memory-mapped PKF with a lazily loaded, cached pointer table.
+
+    Use as a context manager. Record views borrow the mapping, so convert
+    them with ``bytes()`` if they must outlive the ``with`` block, and close
+    the file before rewriting it (Windows refuses to replace mapped files).
+    """
+
+    def __init__(self, path: Path, strict: bool = False, use_index: bool = True):
+        self.path = Path(path)
+        self.strict = strict
+        self.use_index = use_index
+        self._fh = self.path.open("rb")
+        try:
+            self._mm: Optional[mmap.mmap] = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self.data = memoryview(self._mm)
+        except ValueError:  # empty file cannot be mapped
+            self._mm = None
+            self.data = memoryview(b"")
+        st = os.fstat(self._fh.fileno())
+        self.key: Tuple[int, int] = (st.st_size, st.st_mtime_ns)
+        self._table: Optional[PointerTable] = None
+
+    def __enter__(self) -> "PkfFile":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.data.release()
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # a record view escaped; the map closes when it is collected
+            self._mm = None
+        self._fh.close()
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def table(self) -> PointerTable:
+        if self._table is None:
+            table = load_cached_table(self.path, self.key) if self.use_index else None
+            if table is None:
+                table = parse_pointer_table(self.data)
+                if self.use_index:
+                    store_cached_table(self.path, self.key, table)
+            if self.strict:
+                check_table(table)
+            self._table = table
+        return self._table
+
+    @property
+    def pointers(self) -> List[Pointer]:
+        return self.table.pointers
+
+    @property
+    def by_index(self) -> Dict[int, Pointer]:
+        return self.table.by_index
+
+    def record(self, ptr: Union[Pointer, int]) -> memoryview:
+        if not isinstance(ptr, Pointer):
+            ptr = self.by_index[ptr]
+        return self.data[ptr.start : ptr.end]
+
+    def records(self) -> Iterator[Tuple[Pointer, memoryview]]:
+        for ptr in self.pointers:
+            yield ptr, self.data[ptr.start : ptr.end]
+
+    def read_bytes(self) -> bytes:
+        """Full copy of the file, for backups and rewrite buffers."""
+        return bytes(self.data)
+
+
+# (absolute offset, bytes before, bytes after)
+ByteRange = Tuple[int, bytes, bytes]
+
+
+def diff_ranges(before: bytes, after: bytes, base: int = 0, merge_gap: int = 4) -> List[ByteRange]:
+    """Changed byte ranges between two equal-length buffers.
+
+    Runs closer than `merge_gap` unchanged bytes are merged into one range.
+    """
+    if len(before) != len(after):
+        raise PkfError("diff_ranges needs equal-length buffers")
+    if before == after:
+        return []
+    n = len(before)
+    xor = (int.from_bytes(before, "little") ^ int.from_bytes(after, "little")).to_bytes(n, "little")
+    spans: List[List[int]] = []
+    for m in _NONZERO_RE.finditer(xor):
+        if spans and m.start() - spans[-1][1] <= merge_gap:
+            spans[-1][1] = m.end()
+        else:
+            spans.append([m.start(), m.end()])
+    return [(base + a, bytes(before[a:b]), bytes(after[a:b])) for a, b in spans]
+
+
+def write_ranges(path: Path, ranges: List[ByteRange], verify: bool = True) -> int:
+    """Write byte ranges in place through a writable mmap; returns bytes written.
+
+    With `verify`, every range must still hold its "before" bytes, so a file
+    changed since the diff was computed is left untouched.
+    """
+    if not ranges:
+        return 0
+    with Path(path).open("r+b") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_WRITE) as mm:
+        if verify:
+            for off, old, _ in ranges:
+                if mm[off : off + len(old)] != old:
+                    raise PkfError(f"{path}: bytes at {off} changed since the diff was computed")
+        written = 0
+        for off, _, new in ranges:
+            mm[off : off + len(new)] = new
+            written += len(new)
+        mm.flush()
+    return written
+
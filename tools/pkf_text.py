@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Table-driven text codec for PCF55 PKF string fields.
+
+PKF strings are cp1252 bytes passed through a fixed byte permutation
+(`bijective`). The permutation is precomputed into 256-byte tables so whole
+fields, or whole record windows, are converted with one `bytes.translate`
+call instead of a Python-level loop per byte.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+def bijective(b: int) -> int:
+    if b < 32:
+        return b + 97 if (b & 1) == 0 else b + 95
+    if b < 64:
+        return b + 33 if (b & 1) == 0 else b + 31
+    if b < 96:
+        return b - 31 if (b & 1) == 0 else b - 33
+    if b < 128:
+        return b - 95 if (b & 1) == 0 else b - 97
+    if b < 160:
+        return b + 97 if (b & 1) == 0 else b + 95
+    if b < 192:
+        return b + 33 if (b & 1) == 0 else b + 31
+    if b < 224:
+        return b - 31 if (b & 1) == 0 else b - 33
+    return b - 95 if (b & 1) == 0 else b - 97
+
+
+DECODE_TABLE = bytes(bijective(b) for b in range(256))
+ENCODE_TABLE = bytes(DECODE_TABLE.index(b) for b in range(256))
+
+# Characters cp1252 can store; anything else is written as "?".
+CP1252_CHARS = "".join(bytes([b]).decode("cp1252", errors="ignore") for b in range(256))
+_NON_CP1252_RE = re.compile("[^" + re.escape(CP1252_CHARS) + "]")
+
+Raw = Union[bytes, bytearray, memoryview]
+
+
+def decode_bytes(raw: Raw) -> bytes:
+    """PKF bytes -> cp1252 bytes."""
+    return bytes(raw).translate(DECODE_TABLE)
+
+
+def decode_text(raw: Raw) -> str:
+    return decode_bytes(raw).decode("cp1252", errors="replace")
+
+
+def encode_text(text: str) -> bytes:
+    """Plain text -> PKF bytes (unencodable characters become "?")."""
+    return text.encode("cp1252", errors="replace").translate(ENCODE_TABLE)
+
+
+def fits_cp1252(text: str, fixed_len: int) -> bool:
+    # cp1252 is single-byte and errors="replace" emits one "?" per character,
+    # so the encoded length is always len(text).
+    return len(text) <= fixed_len
+
+
+def encode_fixed_text(
+    plain_text: str,
+    fixed_len: int,
+    fit: Optional[Callable[[str, int], str]] = None,
+) -> Tuple[bytes, str]:
+    """Encode into exactly `fixed_len` PKF bytes, space padded.
+
+    `fit` shortens the text first (abbreviations, initials...). Returns the
+    payload and the plain text actually stored.
+    """
+    payload = (plain_text or "").strip()
+    if fit is not None:
+        payload = fit(payload, fixed_len)
+    raw = payload.encode("cp1252", errors="replace")
+    if len(raw) > fixed_len:
+        raw = raw[:fixed_len]
+        payload = raw.decode("cp1252", errors="replace").rstrip()
+    if len(raw) < fixed_len:
+        raw = raw + (b" " * (fixed_len - len(raw)))
+    return raw.translate(ENCODE_TABLE), payload
+
+
+def unencodable_chars(text: str) -> str:
+    return "".join(_NON_CP1252_RE.findall(text))
+
+
+def validate_fixed_fields(fields: Iterable[Tuple[str, int]]) -> List[Tuple[bool, str]]:
+    """Batch check of (text, fixed_len) pairs before patching.
+
+    Returns, per field, whether the stripped text fits as-is and the
+    characters that cp1252 cannot store (they would be written as "?").
+    """
+    items: Sequence[Tuple[str, int]] = list(fields)
+    texts = [(t or "").strip() for t, _ in items]
+    # One regex pass over all texts; the per-field scan only runs if it hits.
+    if not _NON_CP1252_RE.search("\x00".join(texts)):
+        return [(len(t) <= n, "") for t, (_, n) in zip(texts, items)]
+    return [(len(t) <= n, unencodable_chars(t)) for t, (_, n) in zip(texts, items)]
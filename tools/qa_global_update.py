@@ -11,6 +11,9 @@ from collections import Counter
 from pathlib import Path
 from typing import Dict, List, Set
 
+from binary_strings import printable_tokens
+from pkf_container import PkfFile
+
 
 DEFAULT_MAPPING = Path(__file__).resolve().parent / "out" / "pcf55_full_mapping_global.csv"
 DEFAULT_PLAYER_REPORT = Path(__file__).resolve().parent / "out" / "player_patch_report_global.json"
@@ -72,56 +75,23 @@ def skip_string(chunk: bytes, i: int) -> int:
 
 
 def parse_country_by_index(pkf: Path) -> Dict[int, int]:
-    blob = pkf.read_bytes()
-
-    pointers: List[tuple[int, int, int]] = []
-    i = 232
-    idx = 1
-    offset = 232
-    while i < len(blob):
-        b = blob[i]
-        if b == 0x04:
-            if i + 5 > len(blob):
-                break
-            jump_to = struct.unpack_from("<I", blob, i + 1)[0]
-            i += 5
-            skip = jump_to - offset - 5
-            if skip < 0:
-                break
-            i += skip
-            offset = jump_to
-            continue
-        if b == 0x02:
-            if i + 38 > len(blob):
-                break
-            start = struct.unpack_from("<I", blob, i + 26)[0]
-            size = struct.unpack_from("<I", blob, i + 30)[0]
-            pointers.append((idx, start, size))
-            i += 38
-            idx += 1
-            offset += 38
-            continue
-        if b == 0x05 and blob[i + 1 : i + 5] == b"\x00\x00\x00\x00":
-            break
-        i += 1
-
     out: Dict[int, int] = {}
-    for idx, start, size in pointers:
-        chunk = blob[start : start + size]
-        try:
-            if not chunk.startswith(CDM):
+    with PkfFile(pkf) as container:
+        for ptr, chunk in container.records():
+            try:
+                if chunk[: len(CDM)] != CDM:
+                    continue
+                j = len(CDM)
+                _, j = read_u16(chunk, j)
+                _, j = read_u16(chunk, j)
+                _, j = read_u8(chunk, j)
+                _, j = read_u8(chunk, j)
+                j = skip_string(chunk, j)
+                j = skip_string(chunk, j)
+                country, _ = read_u8(chunk, j)
+                out[ptr.index] = int(country)
+            except Exception:
                 continue
-            j = len(CDM)
-            _, j = read_u16(chunk, j)
-            _, j = read_u16(chunk, j)
-            _, j = read_u8(chunk, j)
-            _, j = read_u8(chunk, j)
-            j = skip_string(chunk, j)
-            j = skip_string(chunk, j)
-            country, _ = read_u8(chunk, j)
-            out[idx] = int(country)
-        except Exception:
-            continue
     return out
 
 
@@ -134,17 +104,7 @@ def ids_in_dbc(path: Path) -> Set[int]:
 
 
 def scan_tokens(path: Path) -> List[str]:
-    out: List[str] = []
-    for tok in path.read_bytes().split(b"\x00"):
-        if not (2 <= len(tok) <= 80):
-            continue
-        printable = sum(1 for c in tok if 32 <= c <= 126 or 160 <= c <= 255)
-        if printable < int(len(tok) * 0.8):
-            continue
-        s = tok.decode("cp1252", errors="replace").strip()
-        if s:
-            out.append(s)
-    return out
+    return printable_tokens(path.read_bytes())
 
 
 def parse_args() -> argparse.Namespace:
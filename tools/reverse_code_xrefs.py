@@ -5,6 +5,7 @@ from __future__ import annotations
 
 import argparse
 import json
+from collections import defaultdict
 from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -12,6 +13,7 @@ from typing import Dict, List, Optional
 from capstone import CS_ARCH_X86, CS_MODE_32, Cs  # type: ignore
 from capstone.x86 import X86_OP_IMM, X86_OP_MEM  # type: ignore
 
+from byte_scan import ByteScanner, dword
 from reverse_le import LeInfo, LeObject, parse_le
 
 
@@ -143,7 +145,9 @@ def main() -> None:
 
     xrefs: List[Xref] = []
     insn_count = 0
-    target_vas = {name: d["va"] for name, d in targets.items()}
+    names_by_va: Dict[int, List[str]] = defaultdict(list)
+    for name, d in targets.items():
+        names_by_va[d["va"]].append(name)
 
     for insn in md.disasm(code, base_va):
         insn_count += 1
@@ -154,37 +158,27 @@ def main() -> None:
             continue
         for op in insn.operands:
             if op.type == X86_OP_IMM:
-                imm = op.imm & 0xFFFFFFFF
-                for name, tv in target_vas.items():
-                    if imm == tv:
-                        xrefs.append(
-                            Xref(
-                                target_name=name,
-                                target_va=tv,
-                                target_file_offset=targets[name]["file_offset"],
-                                insn_va=insn.address,
-                                insn_file_offset=insn_file_off,
-                                mnemonic=insn.mnemonic,
-                                op_str=insn.op_str,
-                                kind="imm",
-                            )
-                        )
+                value, kind = op.imm & 0xFFFFFFFF, "imm"
             elif op.type == X86_OP_MEM:
-                disp = op.mem.disp & 0xFFFFFFFF
-                for name, tv in target_vas.items():
-                    if disp == tv:
-                        xrefs.append(
-                            Xref(
-                                target_name=name,
-                                target_va=tv,
-                                target_file_offset=targets[name]["file_offset"],
-                                insn_va=insn.address,
-                                insn_file_offset=insn_file_off,
-                                mnemonic=insn.mnemonic,
-                                op_str=insn.op_str,
-                                kind="mem-disp",
-                            )
-                        )
+                value, kind = op.mem.disp & 0xFFFFFFFF, "mem-disp"
+            else:
+                continue
+            for name in names_by_va.get(value, ()):
+                xrefs.append(
+                    Xref(
+                        target_name=name,
+                        target_va=value,
+                        target_file_offset=targets[name]["file_offset"],
+                        insn_va=insn.address,
+                        insn_file_offset=insn_file_off,
+                        mnemonic=insn.mnemonic,
+                        op_str=insn.op_str,
+                        kind=kind,
+                    )
+                )
+
+    # Raw VA literals anywhere in the object (data tables included), one pass.
+    literal_hits = ByteScanner({name: dword(d["va"]) for name, d in targets.items()}).scan(code)
 
     report = {
         "file": str(args.file),
@@ -193,6 +187,7 @@ def main() -> None:
         "targets": targets,
         "insn_scanned": insn_count,
         "xrefs": [asdict(x) for x in xrefs],
+        "literal_hits": {name: [om.file_start + off for off in offs] for name, offs in literal_hits.items()},
     }
 
     if args.out:
@@ -205,6 +200,7 @@ def main() -> None:
     for k, v in targets.items():
         print(f"  - {k}: file={v['file_offset']} va=0x{v['va']:08X}")
     print(f"Xrefs found: {len(xrefs)}")
+    print(f"VA literals in object: {sum(len(v) for v in literal_hits.values())}")
     for xr in xrefs[:30]:
         print(
             f"  - {xr.target_name}: {xr.mnemonic} {xr.op_str} "
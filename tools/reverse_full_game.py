@@ -8,25 +8,37 @@ This script scans the full game tree and builds:
 - DBC id distributions (1..260)
 - key symbol/pattern hit map (manager/pro-manager/competitions)
 - markdown summary for fast human review
+
+Files are scanned in a process pool. Every entry is stored in a manifest
+keyed by path, size and mtime, so a re-run only rescans files that changed.
 """
 
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import hashlib
 import html
 import json
+import os
 import re
 import struct
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+from byte_scan import ByteScanner
+from pkf_container import parse_pointer_table
 from reverse_le import parse_le
 
 
 DEFAULT_ROOT = Path(__file__).resolve().parents[2] / "PCF55" / "FUTBOL5" / "FUTBOL5"
 DEFAULT_OUT_JSON = Path(__file__).resolve().parent / "out" / "reverse_full_game.json"
 DEFAULT_OUT_MD = Path(__file__).resolve().parent / "out" / "reverse_full_game.md"
+DEFAULT_MANIFEST = Path(__file__).resolve().parent / "out" / "reverse_full_game.manifest.json"
+# Bump when scan_file output changes so old manifests are ignored.
+MANIFEST_SCHEMA = 1
 
 PATTERNS = [
     r"TACTICS\PROMANAG",
@@ -68,17 +80,6 @@ INCLUDE_EXTS = {
 }
 
 
-def sha256(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        while True:
-            chunk = f.read(1024 * 1024)
-            if not chunk:
-                break
-            h.update(chunk)
-    return h.hexdigest()
-
-
 def classify_binary(blob: bytes) -> str:
     if blob.startswith(b"MZ"):
         if len(blob) >= 0x40:
@@ -95,14 +96,15 @@ def classify_binary(blob: bytes) -> str:
     return "raw"
 
 
-def find_offsets(blob: bytes, pattern: str) -> List[int]:
-    p = pattern.encode("cp1252", errors="replace")
-    out: List[int] = []
-    pos = blob.find(p)
-    while pos != -1:
-        out.append(pos)
-        pos = blob.find(p, pos + 1)
-    return out
+@lru_cache(maxsize=8)
+def pattern_scanner(patterns: Tuple[str, ...]) -> ByteScanner:
+    return ByteScanner({p: p.encode("cp1252", errors="replace") for p in patterns})
+
+
+def find_pattern_hits(blob: bytes, patterns: List[str]) -> Dict[str, List[int]]:
+    """Offsets of every pattern in one pass; patterns without hits are left out."""
+    found = pattern_scanner(tuple(patterns)).scan(blob)
+    return {pat: found[pat] for pat in patterns if found[pat]}
 
 
 def extract_context(blob: bytes, off: int, span: int = 64) -> str:
@@ -116,36 +118,8 @@ def extract_context(blob: bytes, off: int, span: int = 64) -> str:
 
 
 def parse_pkf_pointer_count(blob: bytes) -> Dict[str, int]:
-    # Mirrors legacy pointer table parser behavior: starts around offset 232.
-    i = 232
-    offset = 232
-    count = 0
-    jumps = 0
-    while i < len(blob):
-        b = blob[i]
-        if b == 0x04:
-            if i + 5 > len(blob):
-                break
-            jump_to = struct.unpack_from("<I", blob, i + 1)[0]
-            i += 5
-            skip = jump_to - offset - 5
-            if skip < 0:
-                break
-            i += skip
-            offset = jump_to
-            jumps += 1
-            continue
-        if b == 0x02:
-            if i + 38 > len(blob):
-                break
-            i += 38
-            count += 1
-            offset += 38
-            continue
-        if b == 0x05 and blob[i + 1 : i + 5] == b"\x00\x00\x00\x00":
-            break
-        i += 1
-    return {"pointer_count": count, "jump_blocks": jumps}
+    table = parse_pointer_table(blob)
+    return {"pointer_count": len(table.pointers), "jump_blocks": table.jumps}
 
 
 def parse_dbc_stats(blob: bytes) -> Dict[str, object]:
@@ -181,17 +155,13 @@ def scan_file(path: Path, root: Path, patterns: List[str]) -> Dict[str, object]:
     entry: Dict[str, object] = {
         "path": rel,
         "size": len(blob),
-        "sha256": sha256(path),
+        "sha256": hashlib.sha256(blob).hexdigest(),
         "ext": ext,
         "binary_type": classify_binary(blob),
         "pattern_hits": {},
     }
 
-    pat_hits: Dict[str, List[int]] = {}
-    for pat in patterns:
-        offs = find_offsets(blob, pat)
-        if offs:
-            pat_hits[pat] = offs
+    pat_hits = find_pattern_hits(blob, patterns)
     entry["pattern_hits"] = pat_hits
 
     if entry["binary_type"] == "mz-le":
@@ -255,6 +225,37 @@ def scan_file(path: Path, root: Path, patterns: List[str]) -> Dict[str, object]:
     return entry
 
 
+def manifest_key(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def load_manifest(path: Path, patterns: List[str]) -> Dict[str, Dict[str, object]]:
+    """{rel_path: {"size", "mtime_ns", "entry"}}; empty if missing or stale."""
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if raw.get("schema") != MANIFEST_SCHEMA or raw.get("patterns") != patterns:
+        return {}
+    files = raw.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def save_manifest(path: Path, patterns: List[str], files: Dict[str, Dict[str, object]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"schema": MANIFEST_SCHEMA, "patterns": patterns, "files": files}
+    path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+
+def scan_all(paths: List[Path], root: Path, patterns: List[str], workers: int) -> List[Dict[str, object]]:
+    if workers <= 1 or len(paths) <= 1:
+        return [scan_file(p, root, patterns) for p in paths]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        chunksize = max(1, len(paths) // (workers * 4))
+        return list(pool.map(scan_file, paths, repeat(root), repeat(patterns), chunksize=chunksize))
+
+
 def build_summary(files: List[Dict[str, object]]) -> Dict[str, object]:
     type_counts: Dict[str, int] = {}
     ext_counts: Dict[str, int] = {}
@@ -397,6 +398,9 @@ def parse_args() -> argparse.Namespace:
         help="Extensions to scan (e.g. .dat .dbc .pkf .exe .htm)",
     )
     p.add_argument("--max-files", type=int, default=0, help="Optional cap for faster dry runs (0=no cap)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes used to scan files")
+    p.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST, help="Per-file cache keyed by path/size/mtime")
+    p.add_argument("--no-cache", action="store_true", help="Ignore the manifest and rescan every file")
     return p.parse_args()
 
 
@@ -414,9 +418,29 @@ def main() -> None:
     if args.max_files > 0:
         all_files = all_files[: args.max_files]
 
-    rows: List[Dict[str, object]] = []
+    manifest = {} if args.no_cache else load_manifest(args.manifest, PATTERNS)
+    keys: Dict[str, Tuple[int, int]] = {}
+    entries: Dict[str, Dict[str, object]] = {}
+    pending: List[Path] = []
     for p in all_files:
-        rows.append(scan_file(p, args.root, PATTERNS))
+        rel = str(p.relative_to(args.root)).replace("\\", "/")
+        keys[rel] = manifest_key(p)
+        cached = manifest.get(rel)
+        if cached and (cached.get("size"), cached.get("mtime_ns")) == keys[rel]:
+            entries[rel] = cached["entry"]
+        else:
+            pending.append(p)
+    reused = len(entries)
+
+    for entry in scan_all(pending, args.root, PATTERNS, args.workers):
+        entries[str(entry["path"])] = entry
+    rows = [entries[rel] for rel in keys]
+
+    save_manifest(
+        args.manifest,
+        PATTERNS,
+        {rel: {"size": size, "mtime_ns": mtime_ns, "entry": entries[rel]} for rel, (size, mtime_ns) in keys.items()},
+    )
 
     report = {
         "root": str(args.root),
@@ -431,7 +455,7 @@ def main() -> None:
     args.out_md.write_text(render_markdown(report), encoding="utf-8")
 
     print(f"Root: {args.root}")
-    print(f"Files scanned: {len(rows)}")
+    print(f"Files scanned: {len(rows)} (rescanned {len(pending)}, unchanged {reused})")
     print(f"JSON: {args.out_json}")
     print(f"MD  : {args.out_md}")
 
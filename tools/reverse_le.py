@@ -4,12 +4,26 @@
 from __future__ import annotations
 
 import argparse
+import bisect
 import json
+import re
 import struct
 from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from binary_strings import printable_runs
+
+try:
+    import numpy as np
+except ImportError:  # optional: without NumPy differing chunks are scanned with a regex
+    np = None
+
+
+# Files are compared in chunks of this size; only differing chunks are scanned.
+DIFF_CHUNK_SIZE = 1 << 16
+_NONZERO_RE = re.compile(rb"[^\x00]+")
+
 
 @dataclass
 class LeObject:
@@ -177,57 +191,107 @@ def object_for_page(info: LeInfo, page: Optional[int]) -> Optional[int]:
     return None
 
 
-def diff_ranges(a: bytes, b: bytes) -> List[Tuple[int, int]]:
+class LeOffsetIndex:
+    """Bisect lookups of section, page and object for file offsets of one LE.
+
+    Gives the same answers as section_for_offset/page_for_offset/object_for_page
+    without scanning the object table for every offset.
+    """
+
+    def __init__(self, info: LeInfo):
+        self.info = info
+        header_end = info.le_offset + 0xC0
+        data_off = info.data_pages_offset
+        self._section_starts = [info.le_offset, header_end]
+        self._section_names = ["mz_stub", "le_header", "le_loader_tables" if data_off else "unknown"]
+        if data_off:
+            self._section_starts.append(max(data_off, header_end))
+            self._section_names.append("le_paged_data")
+
+        # Page segments where the covering objects do not change; each keeps
+        # the first object (table order) that covers it, as object_for_page.
+        bounds = set()
+        for obj in info.objects:
+            if obj.page_count > 0:
+                bounds.update((obj.page_first, obj.page_last + 1))
+        self._page_starts = sorted(bounds)
+        self._page_objects = [object_for_page(info, p) for p in self._page_starts]
+
+    def section(self, off: int) -> str:
+        return self._section_names[bisect.bisect_right(self._section_starts, off)]
+
+    def page(self, off: int) -> Optional[int]:
+        return page_for_offset(self.info, off)
+
+    def object(self, page: Optional[int]) -> Optional[int]:
+        if page is None:
+            return None
+        k = bisect.bisect_right(self._page_starts, page) - 1
+        return self._page_objects[k] if k >= 0 else None
+
+
+def _chunk_diff_runs(a: bytes, b: bytes, base: int) -> List[Tuple[int, int]]:
+    """Inclusive (start, end) runs of differing bytes in two equal-length chunks."""
+    if np is not None:
+        ne = np.frombuffer(a, dtype=np.uint8) != np.frombuffer(b, dtype=np.uint8)
+        edges = np.diff(np.concatenate(([False], ne, [False])).view(np.int8))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) - 1
+        return [(base + s, base + e) for s, e in zip(starts.tolist(), ends.tolist())]
+    xor = (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(len(a), "little")
+    return [(base + m.start(), base + m.end() - 1) for m in _NONZERO_RE.finditer(xor)]
+
+
+def diff_ranges(a: bytes, b: bytes, chunk_size: int = DIFF_CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """Inclusive (start, end) ranges where `a` and `b` differ.
+
+    Equal chunks are skipped with a single slice comparison; runs that cross
+    a chunk border are joined. A length difference is reported as one
+    trailing range.
+    """
     out: List[Tuple[int, int]] = []
     n = min(len(a), len(b))
-    i = 0
-    while i < n:
-        if a[i] == b[i]:
-            i += 1
+    for off in range(0, n, chunk_size):
+        end = min(off + chunk_size, n)
+        ca = a[off:end]
+        cb = b[off:end]
+        if ca == cb:
             continue
-        s = i
-        while i < n and a[i] != b[i]:
-            i += 1
-        out.append((s, i - 1))
+        for s, e in _chunk_diff_runs(ca, cb, off):
+            if out and out[-1][1] == s - 1:
+                out[-1] = (out[-1][0], e)
+            else:
+                out.append((s, e))
     if len(a) != len(b):
         out.append((n, max(len(a), len(b)) - 1))
     return out
 
 
 def classify_diffs(info: LeInfo, ranges: List[Tuple[int, int]]) -> List[DiffRange]:
+    index = LeOffsetIndex(info)
     rows: List[DiffRange] = []
     for s, e in ranges:
-        ps = page_for_offset(info, s)
-        pe = page_for_offset(info, e)
-        obj = object_for_page(info, ps)
+        ps = index.page(s)
+        pe = index.page(e)
         rows.append(
             DiffRange(
                 start=s,
                 end=e,
                 length=(e - s + 1),
-                section=section_for_offset(info, s),
+                section=index.section(s),
                 page_start=ps,
                 page_end=pe,
-                object_index=obj,
+                object_index=index.object(ps),
             )
         )
     return rows
 
 
 def find_ascii_tokens(data: bytes, min_len: int) -> List[Dict[str, object]]:
-    rows: List[Dict[str, object]] = []
-    i = 0
-    while i < len(data):
-        if not (32 <= data[i] <= 126 or 160 <= data[i] <= 255):
-            i += 1
-            continue
-        s = i
-        while i < len(data) and (32 <= data[i] <= 126 or 160 <= data[i] <= 255):
-            i += 1
-        if i - s >= min_len:
-            txt = data[s:i].decode("cp1252", errors="replace")
-            rows.append({"offset": s, "len": i - s, "text": txt})
-    return rows
+    return [
+        {"offset": off, "len": len(raw), "text": raw.decode("cp1252", errors="replace")}
+        for off, raw in printable_runs(data, min_len)
+    ]
 
 
 def parse_args() -> argparse.Namespace:
@@ -4,11 +4,15 @@
 from __future__ import annotations
 
 import argparse
+import bisect
 import json
-from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, List
 
+from binary_strings import Token, decode_tokens, is_mostly_printable
+from byte_scan import ByteScanner
+from reverse_le import diff_ranges as le_diff_ranges
+
 
 DEFAULT_MANDOS = Path(__file__).resolve().parents[2] / "PCF55" / "FUTBOL5" / "FUTBOL5" / "MANDOS.DAT"
 DEFAULT_OUT = Path(__file__).resolve().parent / "out" / "re_mandos_report.json"
@@ -27,37 +31,6 @@ FLOW_MARKERS = [
 COMP_KEYS = ["LIGA1", "LIGA2", "LIGA2B", "RECOPA", "SCESP", "SCEUR"]
 
 
-@dataclass
-class Token:
-    idx: int
-    off: int
-    length: int
-    text: str
-
-
-def decode_tokens(blob: bytes) -> list[Token]:
-    out: list[Token] = []
-    start = 0
-    idx = 0
-    for i, b in enumerate(blob):
-        if b != 0:
-            continue
-        if i > start:
-            raw = blob[start:i]
-            txt = raw.decode("cp1252", errors="replace")
-            out.append(Token(idx=idx, off=start, length=i - start, text=txt))
-            idx += 1
-        start = i + 1
-    return out
-
-
-def _is_mostly_printable(raw: bytes) -> bool:
-    if not raw:
-        return True
-    printable = sum(1 for b in raw if (32 <= b <= 126) or (160 <= b <= 255))
-    return printable >= int(len(raw) * 0.8)
-
-
 def flow_hits(tokens: list[Token], markers: Iterable[str]) -> list[dict[str, object]]:
     up_markers = [m.upper() for m in markers]
     hits: list[dict[str, object]] = []
@@ -85,17 +58,16 @@ def flow_hits(tokens: list[Token], markers: Iterable[str]) -> list[dict[str, obj
 
 def competition_key_blocks(blob: bytes, keys: Iterable[str]) -> list[dict[str, object]]:
     out: list[dict[str, object]] = []
+    keys = list(keys)
+    hits = ByteScanner({key: key.encode("ascii") for key in keys}).scan(blob)
     for key in keys:
         bkey = key.encode("ascii")
-        pos = 0
-        while True:
-            off = blob.find(bkey, pos)
-            if off < 0:
-                break
-            pos = off + 1
-
-            pair_off = blob.find(bkey, off + len(bkey))
-            if pair_off < 0 or pair_off - off > 16:
+        offs = hits[key]
+        for n, off in enumerate(offs):
+            # Next occurrence not overlapping this one (blob.find from its end).
+            k = bisect.bisect_left(offs, off + len(bkey), n + 1)
+            pair_off = offs[k] if k < len(offs) else None
+            if pair_off is not None and pair_off - off > 16:
                 pair_off = None
 
             pre_u32 = []
@@ -130,21 +102,7 @@ def competition_key_blocks(blob: bytes, keys: Iterable[str]) -> list[dict[str, o
 def diff_ranges(a: bytes, b: bytes) -> list[dict[str, object]]:
     if len(a) != len(b):
         raise ValueError(f"length mismatch: {len(a)} vs {len(b)}")
-    idx = [i for i, (x, y) in enumerate(zip(a, b)) if x != y]
-    if not idx:
-        return []
-
-    ranges = []
-    s = idx[0]
-    p = idx[0]
-    for i in idx[1:]:
-        if i == p + 1:
-            p = i
-            continue
-        ranges.append((s, p))
-        s = p = i
-    ranges.append((s, p))
-
+    ranges = le_diff_ranges(a, b)
     out: list[dict[str, object]] = []
     for s, e in ranges:
         cur = a[s : e + 1]
@@ -158,7 +116,7 @@ def diff_ranges(a: bytes, b: bytes) -> list[dict[str, object]]:
                 "other_hex": oth.hex(),
                 "current_ascii": "".join(chr(x) if 32 <= x < 127 else "." for x in cur),
                 "other_ascii": "".join(chr(x) if 32 <= x < 127 else "." for x in oth),
-                "looks_textual": _is_mostly_printable(cur) and _is_mostly_printable(oth),
+                "looks_textual": is_mostly_printable(cur) and is_mostly_printable(oth),
             }
         )
     return out
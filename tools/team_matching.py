@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+"""Shared name matching for PCF55 <-> Transfermarkt team mapping.
+
+Scoring is the same as the original all-pairs loops (SequenceMatcher ratio,
+token Jaccard, prefix bonus and the "B team" penalty); what changes is how
+candidates are visited. A `NameIndex` keeps a token inverted index and a
+character-trigram index over one side of the mapping:
+
+- blocked candidates (sharing a token or enough trigrams) are scored first,
+  giving a strong incumbent;
+- every other entry is only scored if a cheap upper bound (length ratio,
+  quick_ratio) says it could still beat, or tie, that incumbent.
+
+The bounds are admissible, so the winner (including first-index tie
+breaking) is identical to the exhaustive scan.
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+STOPWORDS = {
+    "club",
+    "cf",
+    "fc",
+    "real",
+    "deportivo",
+    "futbol",
+    "football",
+    "sporting",
+    "athletic",
+    "s",
+    "a",
+    "d",
+    "ud",
+    "cd",
+    "sd",
+}
+
+# Slack added to every upper bound so float rounding never prunes a winner.
+BOUND_EPS = 1e-9
+
+# A non-token candidate needs this share of the query trigrams to be blocked in.
+MIN_TRIGRAM_SHARE = 0.5
+
+
+def normalize(s: str) -> str:
+    s = (s or "").strip().lower()
+    s = "".join(
+        c
+        for c in unicodedata.normalize("NFKD", s)
+        if not unicodedata.combining(c)
+    )
+    s = re.sub(r"[^a-z0-9 ]+", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def token_set(s: str) -> set[str]:
+    return _tokens(normalize(s))
+
+
+def _tokens(norm: str) -> set[str]:
+    return {t for t in norm.split() if t and t not in STOPWORDS}
+
+
+def trigrams(norm: str) -> Set[str]:
+    padded = f" {norm} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _has_b(norm: str) -> bool:
+    return " b " in f" {norm} " or norm.endswith(" b")
+
+
+def _score(seq: float, na: str, nb: str, ta: set, tb: set) -> float:
+    if ta and tb:
+        jacc = len(ta & tb) / len(ta | tb)
+    else:
+        jacc = 0.0
+
+    starts = 1.0 if na.startswith(nb) or nb.startswith(na) else 0.0
+
+    b_penalty = 0.15 if (_has_b(na) ^ _has_b(nb)) else 0.0
+
+    return (0.65 * seq + 0.30 * jacc + 0.05 * starts) - b_penalty
+
+
+def similarity(a: str, b: str) -> float:
+    na = normalize(a)
+    nb = normalize(b)
+    if not na or not nb:
+        return 0.0
+    seq = SequenceMatcher(None, na, nb).ratio()
+    return _score(seq, na, nb, token_set(a), token_set(b))
+
+
+def length_ratio_bound(la: int, lb: int) -> float:
+    """Upper bound of SequenceMatcher.ratio() from lengths alone."""
+    total = la + lb
+    return 2.0 * min(la, lb) / total if total else 1.0
+
+
+class NameIndex:
+    """Token + character-trigram index over a fixed list of names.
+
+    Entries are addressed by their position in the original list. Entries
+    can be discarded (e.g. a slot already assigned) without rebuilding.
+    """
+
+    def __init__(self, names: Iterable[str], normalize_fn: Callable[[str], str] = normalize):
+        self.normalize = normalize_fn
+        self.norms: List[str] = [normalize_fn(n) for n in names]
+        self.tokens: List[set] = [_tokens(n) for n in self.norms]
+        self.alive: List[bool] = [True] * len(self.norms)
+        self.live = len(self.norms)
+        self._matchers: Dict[int, SequenceMatcher] = {}
+        self._token_postings: Dict[str, List[int]] = defaultdict(list)
+        self._gram_postings: Dict[str, List[int]] = defaultdict(list)
+        for i, norm in enumerate(self.norms):
+            for tok in self.tokens[i]:
+                self._token_postings[tok].append(i)
+            for gram in trigrams(norm):
+                self._gram_postings[gram].append(i)
+        self._by_len: List[Tuple[int, int]] = sorted((len(n), i) for i, n in enumerate(self.norms))
+
+    def __len__(self) -> int:
+        return len(self.norms)
+
+    def discard(self, i: int) -> None:
+        if self.alive[i]:
+            self.alive[i] = False
+            self.live -= 1
+
+    def live_ids(self) -> List[int]:
+        return [i for i, ok in enumerate(self.alive) if ok]
+
+    def blocked(self, query_norm: str, query_tokens: Optional[set] = None) -> Set[int]:
+        """Live entries sharing a token or most of the query trigrams."""
+        out: Set[int] = set()
+        for tok in _tokens(query_norm) if query_tokens is None else query_tokens:
+            out.update(self._token_postings.get(tok, ()))
+        grams = trigrams(query_norm)
+        need = max(1, int(len(grams) * MIN_TRIGRAM_SHARE))
+        counts: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for i in self._gram_postings.get(gram, ()):
+                counts[i] += 1
+        out.update(i for i, c in counts.items() if c >= need)
+        return {i for i in out if self.alive[i]}
+
+    def within_length(self, lo: float, hi: float) -> List[int]:
+        """Live entries whose normalized length lies in [lo, hi]."""
+        start = bisect.bisect_left(self._by_len, (lo, -1))
+        out = []
+        for length, i in self._by_len[start:]:
+            if length > hi:
+                break
+            if self.alive[i]:
+                out.append(i)
+        return out
+
+    def _matcher(self, i: int, query_norm: str) -> SequenceMatcher:
+        sm = self._matchers.get(i)
+        if sm is None:
+            sm = SequenceMatcher(None)
+            sm.set_seq2(self.norms[i])
+            self._matchers[i] = sm
+        sm.set_seq1(query_norm)
+        return sm
+
+    def ratio(self, i: int, query_norm: str) -> float:
+        """SequenceMatcher(None, query_norm, entry).ratio(), b-side cached."""
+        return self._matcher(i, query_norm).ratio()
+
+    def quick_ratio(self, i: int, query_norm: str) -> float:
+        return self._matcher(i, query_norm).quick_ratio()
+
+    def search(
+        self,
+        first: Iterable[int],
+        rest: Callable[[float], Iterable[int]],
+        exact: Callable[[int], float],
+        bound: Callable[[int], float],
+    ) -> Tuple[int, float]:
+        """Branch and bound: best (id, score), lowest id wins ties.
+
+        `first` (the blocked candidates) is visited before `rest(best)`, the
+        remaining ids that may still reach the incumbent. Both groups are
+        scanned by decreasing `bound` and cut as soon as it drops below it.
+        """
+        best_i = -1
+        best = float("-inf")
+        first = set(first)
+        for phase in (first, None):
+            ids = phase if phase is not None else (i for i in rest(best) if i not in first)
+            pending = sorted(((bound(i) + BOUND_EPS, i) for i in ids), key=lambda t: (-t[0], t[1]))
+            for ub, i in pending:
+                if ub < best:
+                    break
+                s = exact(i)
+                if s > best or (s == best and i < best_i):
+                    best_i, best = i, s
+        return best_i, best
+
+
+def best_similarity(index: NameIndex, name: str) -> Tuple[int, float]:
+    """Entry of `index` maximizing `similarity(name, entry)`; first wins ties."""
+    na = normalize(name)
+    ta = _tokens(na)
+    la = len(na)
+    if not na:
+        live = index.live_ids()
+        return (live[0], 0.0) if live else (-1, 0.0)
+
+    def exact(i: int) -> float:
+        nb = index.norms[i]
+        if not nb:
+            return 0.0
+        return _score(index.ratio(i, na), na, nb, ta, index.tokens[i])
+
+    def rest(best: float) -> Iterable[int]:
+        # Outside the blocked set the token Jaccard is 0, so a candidate
+        # needs 0.65 * ratio + 0.05 >= best, with ratio <= length ratio.
+        r = (best - 0.05 - BOUND_EPS) / 0.65
+        if r > 1.0:
+            return ()
+        if r <= 0.0:
+            return index.live_ids()
+        return index.within_length(la * r / (2.0 - r) - 1, la * (2.0 - r) / r + 1)
+
+    def bound(i: int) -> float:
+        nb = index.norms[i]
+        if not nb:
+            return 0.0
+        tb = index.tokens[i]
+        jacc = len(ta & tb) / len(ta | tb) if ta and tb else 0.0
+        starts = 1.0 if na.startswith(nb) or nb.startswith(na) else 0.0
+        penalty = 0.15 if (_has_b(na) ^ _has_b(nb)) else 0.0
+        seq = min(length_ratio_bound(la, len(nb)), index.quick_ratio(i, na))
+        return 0.65 * seq + 0.30 * jacc + 0.05 * starts - penalty
+
+    return index.search(index.blocked(na, ta), rest, exact, bound)